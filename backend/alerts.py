@@ -0,0 +1,282 @@
+"""
+Trading Alerts
+Watches each analysis for signal changes, PCR threshold crossings, max-pain
+shifts and target/stop-loss exits; repeats within the debounce window are
+dropped and the rest are delivered to pluggable sinks (webhook, email, file,
+desktop) by one background thread per sink, so a slow sink never holds up
+the analysis tick
+"""
+
+import importlib
+import json
+import logging
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from config import Config
+from market_calendar import CALENDAR
+from metrics import ALERT_DELIVERIES, ALERTS
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookSink:
+    """POST each alert as JSON (Slack/Discord-style 'text' included)"""
+
+    name = 'webhook'
+
+    def __init__(self, url=None, timeout=5):
+        self.url = url or Config.ALERT_WEBHOOK_URL
+        self.timeout = timeout
+        if not self.url:
+            raise ValueError("ALERT_WEBHOOK_URL is not set")
+
+    def send(self, alert):
+        import requests
+
+        response = requests.post(self.url, json=dict(alert, text=alert['message']), timeout=self.timeout)
+        response.raise_for_status()
+
+
+class EmailSink:
+    """Email through a (local) SMTP relay"""
+
+    name = 'email'
+
+    def __init__(self, host=None, port=None, sender=None, recipients=None, timeout=10):
+        self.host = host or Config.ALERT_SMTP_HOST
+        self.port = port or Config.ALERT_SMTP_PORT
+        self.sender = sender or Config.ALERT_EMAIL_FROM
+        recipients = recipients or Config.ALERT_EMAIL_TO
+        self.recipients = [r.strip() for r in recipients.split(',') if r.strip()] \
+            if isinstance(recipients, str) else list(recipients)
+        self.timeout = timeout
+        if not self.recipients:
+            raise ValueError("ALERT_EMAIL_TO is not set")
+
+    def send(self, alert):
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message['Subject'] = f"[{alert['symbol']}] {alert['message']}"
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content(json.dumps(alert, indent=2, default=str))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+class FileSink:
+    """Append alerts to a JSON lines file"""
+
+    name = 'file'
+
+    def __init__(self, path=None):
+        self.path = path or Config.ALERT_FILE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert, default=str) + '\n')
+
+
+class DesktopSink:
+    """Desktop notification via notify-send (Linux) or osascript (macOS)"""
+
+    name = 'desktop'
+
+    def __init__(self):
+        if platform.system() == 'Darwin':
+            self.command = lambda title, body: ['osascript', '-e',
+                                                f'display notification {json.dumps(body)} with title {json.dumps(title)}']
+        elif shutil.which('notify-send'):
+            self.command = lambda title, body: ['notify-send', title, body]
+        else:
+            raise ValueError("No desktop notifier found (notify-send or osascript)")
+
+    def send(self, alert):
+        title = f"{alert['symbol']} {alert['kind'].replace('_', ' ')}"
+        subprocess.run(self.command(title, alert['message']), check=True, timeout=10,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+SINK_TYPES = {
+    'webhook': WebhookSink,
+    'email': EmailSink,
+    'file': FileSink,
+    'desktop': DesktopSink
+}
+
+
+def build_sinks(spec):
+    """
+    Sinks from a spec like 'file,webhook,my_module:make_sink'
+
+    Built-in names are in SINK_TYPES; module:factory entries are imported and
+    called with no arguments. Sinks that cannot be set up are logged and left out.
+    """
+    sinks = []
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            if ':' in entry:
+                module_name, factory = entry.split(':', 1)
+                sinks.append(getattr(importlib.import_module(module_name), factory)())
+            else:
+                sinks.append(SINK_TYPES[entry]())
+        except Exception as e:
+            logger.error("Could not set up alert sink %r: %s", entry, e)
+    return sinks
+
+
+class _SinkWorker:
+    """Bounded queue drained by a daemon thread for one sink"""
+
+    def __init__(self, sink, size=100):
+        self.sink = sink
+        self.name = getattr(sink, 'name', type(sink).__name__)
+        self.queue = queue.Queue(maxsize=size)
+        self.thread = threading.Thread(target=self._run, name=f'alerts-{self.name}', daemon=True)
+        self.thread.start()
+
+    def submit(self, alert):
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            ALERT_DELIVERIES.inc(sink=self.name, result='dropped')
+            logger.warning("Alert sink %s is backed up, dropped: %s", self.name, alert['message'])
+
+    def _run(self):
+        while True:
+            alert = self.queue.get()
+            try:
+                self.sink.send(alert)
+                ALERT_DELIVERIES.inc(sink=self.name, result='ok')
+            except Exception as e:
+                ALERT_DELIVERIES.inc(sink=self.name, result='failed')
+                logger.error("Alert sink %s failed: %s", self.name, e)
+
+
+def pcr_zone(pcr):
+    """'bullish' below PCR_BULLISH, 'bearish' above PCR_BEARISH, else 'neutral' (None without data)"""
+    if not pcr:
+        return None
+    if pcr < Config.PCR_BULLISH:
+        return 'bullish'
+    if pcr > Config.PCR_BEARISH:
+        return 'bearish'
+    return 'neutral'
+
+
+class AlertEngine:
+    """Turns consecutive analyses and exits into debounced alerts"""
+
+    def __init__(self, sinks=None, debounce=None, max_pain_shift=None, history=100, clock=time.time):
+        """
+        Args:
+            sinks: Objects with send(alert) (default build_sinks(Config.ALERT_SINKS))
+            debounce: Seconds a repeat of the same alert (kind, symbol and new state) is suppressed for
+            max_pain_shift: Points max pain must move to alert
+            history: Recent alerts kept for /api/alerts
+            clock: Time source for debouncing and alert timestamps
+        """
+        sinks = build_sinks(Config.ALERT_SINKS) if sinks is None else sinks
+        self.debounce = Config.ALERT_DEBOUNCE_SECONDS if debounce is None else debounce
+        self.max_pain_shift = Config.ALERT_MAX_PAIN_SHIFT if max_pain_shift is None else max_pain_shift
+        self.clock = clock
+        self.recent = deque(maxlen=history)
+        self._workers = [_SinkWorker(sink) for sink in sinks]
+        self._previous = {}  # symbol -> (signal key, pcr zone, max pain at the last shift alert)
+        self._last_sent = {}  # debounce key -> time (entries past the debounce window are pruned)
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def sinks(self):
+        return [worker.name for worker in self._workers]
+
+    def observe(self, symbol, analysis):
+        """Compare an analysis with the previous one for the symbol and alert on changes"""
+        if not analysis:
+            return
+        signal = analysis.get('signal') or {}
+        signal_key = (signal.get('action'), signal.get('type'), signal.get('strategy'))
+        zone = pcr_zone(analysis.get('pcr'))
+        max_pain = analysis.get('max_pain') or 0
+
+        with self._lock:
+            previous = self._previous.get(symbol)
+            prev_max_pain = previous[2] if previous else 0
+            shifted = bool(max_pain and prev_max_pain and abs(max_pain - prev_max_pain) >= self.max_pain_shift)
+            # Max pain is compared with where it was at the last alert, so slow drifts add up
+            anchor = max_pain if shifted or not prev_max_pain else prev_max_pain
+            self._previous[symbol] = (signal_key, zone, anchor)
+        if previous is None:
+            return
+        prev_signal, prev_zone, _ = previous
+
+        if signal_key != prev_signal and signal.get('action'):
+            action = signal['action'] + (f" {signal['type']}" if signal.get('type') else '')
+            self.emit('signal', symbol, f"Signal changed to {action} ({signal.get('confidence', 0)}%)",
+                      severity='warning' if signal['action'] != 'WAIT' else 'info', data=signal,
+                      key=('signal', symbol, signal_key))
+        if zone and prev_zone and zone != prev_zone:
+            self.emit('pcr', symbol, f"PCR {analysis['pcr']} moved from {prev_zone} to {zone}",
+                      data={'pcr': analysis['pcr'], 'from': prev_zone, 'to': zone}, key=('pcr', symbol, zone))
+        if shifted:
+            self.emit('max_pain', symbol, f"Max pain shifted {prev_max_pain} -> {max_pain}",
+                      data={'from': prev_max_pain, 'to': max_pain}, key=('max_pain', symbol, max_pain))
+
+    def exit_hit(self, trade, reason, price, pnl_pct):
+        """Alert on a target or stop-loss exit (one per trade, never debounced away)"""
+        label = 'Target hit' if reason == 'PROFIT_TARGET' else 'Stop loss hit'
+        self.emit('exit', trade['symbol'], f"{label}: {trade['symbol']} at {price} ({pnl_pct:+.2f}%)",
+                  severity='warning', data={'reason': reason, 'price': price, 'pnl_percentage': round(pnl_pct, 2)},
+                  key=('exit', trade.get('trade_id'), reason))
+
+    def recent_alerts(self):
+        """Copy of the recent alerts, newest first (safe while alerts are being added)"""
+        with self._lock:
+            return list(reversed(self.recent))
+
+    def emit(self, kind, symbol, message, severity='info', data=None, key=None):
+        """
+        Queue an alert for every sink unless one with the same key went out within the debounce window
+
+        key defaults to (kind, symbol); observe() adds the new state to it, so
+        only repeats of the same transition are debounced.
+        """
+        key = key or (kind, symbol)
+        now = self.clock()
+        alert = {
+            'timestamp': CALENDAR.now(now).isoformat(),
+            'kind': kind,
+            'symbol': symbol,
+            'severity': severity,
+            'message': message,
+            'data': data or {}
+        }
+        with self._lock:
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.debounce:
+                ALERTS.inc(kind=kind, result='debounced')
+                return None
+            self._last_sent[key] = now
+            self.recent.append(alert)
+            if now - self._pruned_at >= self.debounce:
+                # Keys carry max-pain levels and trade ids, so expired ones would pile up
+                self._last_sent = {k: sent for k, sent in self._last_sent.items() if now - sent < self.debounce}
+                self._pruned_at = now
+
+        ALERTS.inc(kind=kind, result='sent')
+        logger.info("🔔 %s", message)
+        for worker in self._workers:
+            worker.submit(alert)
+        return alert
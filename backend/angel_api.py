@@ -3,46 +3,157 @@ Angel One API Integration
 Handles authentication, order placement, and position management
 """
 
-from SmartApi import SmartConnect
+import logging
 import pyotp
+import threading
+import time
+from broker_session import BrokerSession
+from circuit_breaker import BREAKERS
 from config import Config
+from market_calendar import CALENDAR, ClosedMarketCache
+from metrics import ORDER_LATENCY, record_cache, record_upstream
+from quote_service import QuoteService
+
+logger = logging.getLogger(__name__)
+
+# SmartAPI error codes for an invalid, expired or missing session token
+AUTH_ERRORS = ('AG8001', 'AG8002', 'AG8003')
+
+# Index symbol -> (NSE trading symbol, token)
+INDEX_TOKENS = {
+    'NIFTY': ('NIFTY 50', '99926000'),
+    'BANKNIFTY': ('NIFTY BANK', '99926009'),
+    'FINNIFTY': ('NIFTY FIN SERVICE', '99926037')
+}
 
 class AngelAPI:
     """Wrapper class for Angel One SmartAPI"""
     
     def __init__(self):
-        """Initialize Angel One API client with config credentials"""
-        self.api = SmartConnect(api_key=Config.ANGEL_API_KEY)
-        self.session = None
-        self.logged_in = False
+        """Initialize Angel One API client with config credentials (SmartAPI is loaded on first use)"""
+        self._api = None
+        self._api_lock = threading.Lock()
+        self.sessions = BrokerSession(self._generate_session, self._generate_token)
+        self.quotes = QuoteService(self._fetch_market_data)
         self._candle_cache = {}  # Cache for candle data
         self._cache_duration = 60  # Cache for 60 seconds
+        self._closed = ClosedMarketCache()  # chains and candles fetched after the close
+    
+    @property
+    def api(self):
+        """SmartConnect client, imported and created on first use"""
+        if self._api is None:
+            with self._api_lock:
+                if self._api is None:
+                    # SmartApi is slow to import and looks up the public IP on construction
+                    from SmartApi import SmartConnect
+                    self._api = SmartConnect(api_key=Config.ANGEL_API_KEY)
+        return self._api
         
+    @property
+    def logged_in(self):
+        """Whether the session token is present and unexpired"""
+        return self.sessions.valid()
+    
+    @property
+    def session(self):
+        """Current JWT"""
+        return self.sessions.jwt
+    
     def login(self):
-        """Angel One login with TOTP"""
-        try:
-            totp = pyotp.TOTP(Config.ANGEL_TOTP_SECRET).now()
-            data = self.api.generateSession(Config.ANGEL_CLIENT_ID, Config.ANGEL_PASSWORD, totp)
-            self.session = data['data']['jwtToken']
-            self.logged_in = True
-            print("✅ Angel One Login Success")
-            return True
-        except Exception as e:
-            print(f"❌ Login Failed: {e}")
-            self.logged_in = False
-            return False
+        """
+        Angel One login with TOTP (concurrent callers wait for one attempt)
+        
+        The token is then refreshed in the background before it expires.
+        """
+        return self.sessions.login()
+    
+    def _generate_session(self):
+        """Full TOTP login, returns the tokens"""
+        totp = pyotp.TOTP(Config.ANGEL_TOTP_SECRET).now()
+        data = self.api.generateSession(Config.ANGEL_CLIENT_ID, Config.ANGEL_PASSWORD, totp)
+        if not data.get('status'):
+            raise RuntimeError(data.get('message') or 'login rejected')
+        return data['data']
+    
+    def _generate_token(self, refresh_token):
+        """New JWT from the refresh token (SmartAPI refresh flow)"""
+        data = self.api.generateToken(refresh_token)
+        if not data.get('status'):
+            raise RuntimeError(data.get('message') or 'refresh rejected')
+        return data['data']
+    
+    def _check_session(self, response):
+        """Schedule a background re-login if the broker rejected the token"""
+        if isinstance(response, dict) and response.get('errorcode') in AUTH_ERRORS:
+            self.sessions.invalidate()
+        return response
     
     def is_logged_in(self):
         """Check if logged in"""
         return self.logged_in
     
+    def get_quotes(self, instruments, mode='LTP'):
+        """
+        Quotes for many instruments in as few getMarketData calls as possible
+        
+        Args:
+            instruments: Iterable of (exchange, token), e.g. ('NFO', '43650')
+            mode: LTP, OHLC or FULL
+            
+        Returns:
+            dict: (exchange, token) -> quote (missing if it could not be fetched)
+        """
+        if not self.logged_in:
+            return {}
+        return self.quotes.get(instruments, mode)
+    
+    def get_ltps(self, instruments):
+        """(exchange, token) -> last traded price, batched like get_quotes"""
+        if not self.logged_in:
+            return {}
+        return self.quotes.ltps(instruments)
+    
+    def add_price_listener(self, listener):
+        """Call listener((exchange, token), ltp) for every quote fetched"""
+        self.quotes.listeners.append(listener)
+    
+    def _fetch_market_data(self, mode, exchange_tokens):
+        """One getMarketData call for the quote service (None on failure)"""
+        if not BREAKERS.allow('angel', 'getMarketData'):
+            return None
+        started = time.perf_counter()
+        try:
+            response = self._check_session(self.api.getMarketData(mode, exchange_tokens))
+        except Exception as e:
+            record_upstream('angel', 'getMarketData', started, 'error')
+            BREAKERS.record('angel', 'getMarketData', False)
+            logger.warning("⚠️ Angel One market data failed: %s", e)
+            return None
+        
+        ok = bool(response and response.get('status'))
+        record_upstream('angel', 'getMarketData', started, 'ok' if ok else 'empty')
+        BREAKERS.record('angel', 'getMarketData', ok)
+        return (response.get('data') or {}).get('fetched', []) if ok else None
+    
     def get_ltp(self, symbol="NIFTY BANK"):
-        """Get Last Traded Price"""
+        """Get Last Traded Price (indices go through the batched quote service)"""
+        for name, (index_symbol, token) in INDEX_TOKENS.items():
+            if symbol in (name, index_symbol):
+                return self.get_ltps([('NSE', token)]).get(('NSE', token))
+        
+        if not BREAKERS.allow('angel', 'ltpData'):
+            return None
+        started = time.perf_counter()
         try:
-            response = self.api.ltpData("NSE", symbol, "")
+            response = self._check_session(self.api.ltpData("NSE", symbol, ""))
+            record_upstream('angel', 'ltpData', started, 'ok')
+            BREAKERS.record('angel', 'ltpData', True)
             return response['data']['ltp']
         except Exception as e:
-            print(f"Error getting LTP: {e}")
+            record_upstream('angel', 'ltpData', started, 'error')
+            BREAKERS.record('angel', 'ltpData', False)
+            logger.error("Error getting LTP: %s", e)
             return None
     
     def get_candle_data(self, symbol="NIFTY", interval="FIFTEEN_MINUTE", count=10):
@@ -52,21 +163,24 @@ class AngelAPI:
         """
         try:
             if not self.logged_in:
-                print("❌ Not logged in")
+                logger.warning("❌ Not logged in")
                 return None
             
-            from datetime import datetime, timedelta
-            import time
-            
             # Check cache first
             cache_key = f"{symbol}_{interval}"
             current_time = time.time()
             
+            closed = self._closed.get(('candles', cache_key, count))
+            if closed:
+                return closed
+            
             if cache_key in self._candle_cache:
                 cached_data, cache_time = self._candle_cache[cache_key]
                 if current_time - cache_time < self._cache_duration:
-                    print(f"📦 Using cached candle data for {symbol} ({int(self._cache_duration - (current_time - cache_time))}s old)")
+                    record_cache('candles', True)
+                    logger.debug("📦 Using cached candle data for %s (%ds old)", symbol, current_time - cache_time)
                     return cached_data
+            record_cache('candles', False)
             
             # Get symbol token
             if symbol == "NIFTY":
@@ -79,9 +193,8 @@ class AngelAPI:
                 token = "99926000"
                 exchange = "NSE"
             
-            # Calculate date range
-            to_date = datetime.now()
-            from_date = to_date - timedelta(days=1)  # Last 1 day data
+            # Enough trading sessions back for `count` bars (Mondays, holidays, pre-open)
+            from_date, to_date = CALENDAR.candle_window(interval, count)
             
             params = {
                 "exchange": exchange,
@@ -91,29 +204,43 @@ class AngelAPI:
                 "todate": to_date.strftime("%Y-%m-%d %H:%M")
             }
             
-            print(f"🕯️ Fetching {interval} candles for {symbol}...")
-            candle_data = self.api.getCandleData(params)
+            if not BREAKERS.allow('angel', 'getCandleData'):
+                # Serve the expired cache rather than waiting on a failing endpoint
+                return self._candle_cache[cache_key][0] if cache_key in self._candle_cache else None
+            
+            logger.debug("🕯️ Fetching %s candles for %s...", interval, symbol)
+            started = time.perf_counter()
+            try:
+                candle_data = self._check_session(self.api.getCandleData(params))
+            except Exception:
+                record_upstream('angel', 'getCandleData', started, 'error')
+                BREAKERS.record('angel', 'getCandleData', False)
+                raise
             
+            BREAKERS.record('angel', 'getCandleData', bool(candle_data and candle_data.get('status')))
             if candle_data and candle_data.get('status'):
                 candles = candle_data.get('data', [])
+                record_upstream('angel', 'getCandleData', started, 'ok' if candles else 'empty')
                 if candles:
                     result = candles[-count:]  # Return last N candles
                     # Cache the result
                     self._candle_cache[cache_key] = (result, current_time)
-                    print(f"✅ Got {len(candles)} candles (cached for {self._cache_duration}s)")
+                    self._closed.put(('candles', cache_key, count), result)
+                    logger.debug("✅ Got %d candles (cached for %ds)", len(candles), self._cache_duration)
                     return result
                 else:
-                    print("⚠️ No candle data available")
+                    logger.warning("⚠️ No candle data available")
                     return None
             else:
-                print(f"❌ Candle fetch failed: {candle_data.get('message', 'Unknown error')}")
+                record_upstream('angel', 'getCandleData', started, 'error')
+                logger.error("❌ Candle fetch failed: %s", candle_data.get('message', 'Unknown error'))
                 return None
                 
         except Exception as e:
-            print(f"❌ Error fetching candles: {e}")
+            logger.error("❌ Error fetching candles: %s", e)
             # Return cached data if available, even if expired
             if cache_key in self._candle_cache:
-                print("⚠️ Using expired cache due to API error")
+                logger.warning("⚠️ Using expired cache due to API error")
                 return self._candle_cache[cache_key][0]
             return None
     
@@ -122,23 +249,24 @@ class AngelAPI:
         try:
             if not self.logged_in:
                 return None
-            profile = self.api.getProfile(self.session)
+            profile = self.api.getProfile(self.sessions.refresh_token)
             return profile['data'] if profile.get('status') else None
         except Exception as e:
-            print(f"Error fetching profile: {e}")
+            logger.error("Error fetching profile: %s", e)
             return None
     
-    def place_order(self, symbol, qty, order_type="BUY"):
-        """Place Market Order"""
+    def place_order(self, symbol, qty, order_type="BUY", symboltoken=None):
+        """Place Market Order (symboltoken defaults to get_token(symbol))"""
+        started = time.perf_counter()
         try:
             if not self.logged_in:
-                print("❌ Not logged in")
+                logger.warning("❌ Not logged in")
                 return None
                 
             params = {
                 "variety": "NORMAL",
                 "tradingsymbol": symbol,
-                "symboltoken": self.get_token(symbol),
+                "symboltoken": symboltoken or self.get_token(symbol),
                 "transactiontype": order_type,
                 "exchange": "NFO",
                 "ordertype": "MARKET",
@@ -146,11 +274,18 @@ class AngelAPI:
                 "duration": "DAY",
                 "quantity": qty
             }
-            order = self.api.placeOrder(params)
-            print(f"✅ Order Placed: {order}")
+            # Deliberately not behind a circuit breaker: an exit retried on the
+            # next price update must reach the broker, not an open circuit
+            try:
+                order = self.api.placeOrder(params)
+            finally:
+                ORDER_LATENCY.observe(time.perf_counter() - started, broker='angel')
+            record_upstream('angel', 'placeOrder', started, 'ok' if order else 'empty')
+            logger.info("✅ Order Placed: %s", order)
             return order
         except Exception as e:
-            print(f"❌ Order Failed: {e}")
+            record_upstream('angel', 'placeOrder', started, 'error')
+            logger.error("❌ Order Failed: %s", e)
             return None
     
     def get_token(self, symbol):
@@ -161,49 +296,69 @@ class AngelAPI:
     
     def get_positions(self):
         """Get current positions"""
+        started = time.perf_counter()
         try:
-            if not self.logged_in:
+            if not self.logged_in or not BREAKERS.allow('angel', 'position'):
                 return []
-            response = self.api.position()
+            response = self._check_session(self.api.position())
+            BREAKERS.record('angel', 'position', bool(response.get('status')))
             if response.get('status'):
+                record_upstream('angel', 'position', started, 'ok')
                 return response['data']
             else:
-                print(f"Failed to fetch positions: {response.get('message')}")
+                record_upstream('angel', 'position', started, 'error')
+                logger.error("Failed to fetch positions: %s", response.get('message'))
                 return []
         except Exception as e:
-            print(f"Error fetching positions: {e}")
+            record_upstream('angel', 'position', started, 'error')
+            BREAKERS.record('angel', 'position', False)
+            logger.error("Error fetching positions: %s", e)
             return []
     
     def cancel_order(self, order_id, variety='NORMAL'):
         """Cancel an order"""
         try:
             if not self.logged_in:
-                print("❌ Not logged in")
+                logger.warning("❌ Not logged in")
+                return None
+            if not BREAKERS.allow('angel', 'cancelOrder'):
+                logger.error("❌ Cancel not sent: cancelOrder is failing, circuit open")
                 return None
-            response = self.api.cancelOrder(order_id, variety)
+            try:
+                response = self._check_session(self.api.cancelOrder(order_id, variety))
+            except Exception:
+                BREAKERS.record('angel', 'cancelOrder', False)
+                raise
+            BREAKERS.record('angel', 'cancelOrder', True)
             if response.get('status'):
-                print(f"✅ Order cancelled: {order_id}")
+                logger.info("✅ Order cancelled: %s", order_id)
                 return response
             else:
-                print(f"❌ Cancellation failed: {response.get('message')}")
+                logger.error("❌ Cancellation failed: %s", response.get('message'))
                 return None
         except Exception as e:
-            print(f"Error cancelling order: {e}")
+            logger.error("Error cancelling order: %s", e)
             return None
     
     def get_order_book(self):
         """Get order book"""
+        started = time.perf_counter()
         try:
-            if not self.logged_in:
+            if not self.logged_in or not BREAKERS.allow('angel', 'orderBook'):
                 return []
-            response = self.api.orderBook()
+            response = self._check_session(self.api.orderBook())
+            BREAKERS.record('angel', 'orderBook', bool(response.get('status')))
             if response.get('status'):
+                record_upstream('angel', 'orderBook', started, 'ok')
                 return response['data']
             else:
-                print(f"Failed to fetch order book: {response.get('message')}")
+                record_upstream('angel', 'orderBook', started, 'error')
+                logger.error("Failed to fetch order book: %s", response.get('message'))
                 return []
         except Exception as e:
-            print(f"Error fetching order book: {e}")
+            record_upstream('angel', 'orderBook', started, 'error')
+            BREAKERS.record('angel', 'orderBook', False)
+            logger.error("Error fetching order book: %s", e)
             return []
     
     def get_option_chain(self, symbol="NIFTY", strike_count=20):
@@ -213,75 +368,36 @@ class AngelAPI:
         """
         try:
             if not self.logged_in:
-                print("❌ Not logged in to Angel One")
+                logger.warning("❌ Not logged in to Angel One")
                 return None
             
-            print(f"🔄 Fetching LIVE {symbol} option chain from Angel One...")
+            closed = self._closed.get(('chain', symbol))
+            if closed:
+                return closed
             
-            # Get current LTP for the index
-            if symbol == "NIFTY":
-                index_token = "99926000"  # NIFTY 50 token
-                index_symbol = "NIFTY 50"
-            elif symbol == "BANKNIFTY":
-                index_token = "99926009"  # BANK NIFTY token
-                index_symbol = "NIFTY BANK"
-            elif symbol == "FINNIFTY":
-                index_token = "99926037"  # FIN NIFTY token
-                index_symbol = "NIFTY FIN SERVICE"
-            else:
-                print(f"⚠️ Symbol {symbol} not supported")
+            logger.debug("🔄 Fetching LIVE %s option chain from Angel One...", symbol)
+            
+            if symbol not in INDEX_TOKENS:
+                logger.warning("⚠️ Symbol %s not supported", symbol)
                 return None
             
-            # Get spot price using Angel One API
-            try:
-                ltp_data = self.api.ltpData("NSE", index_symbol, index_token)
-                if ltp_data and ltp_data.get('status'):
-                    spot_price = float(ltp_data['data']['ltp'])
-                    print(f"📊 {symbol} Spot Price: {spot_price}")
-                else:
-                    print("⚠️ Could not get LTP, using fallback")
-                    spot_price = 21850 if symbol == "NIFTY" else 48250
-            except Exception as e:
-                print(f"⚠️ LTP fetch failed: {e}, using fallback")
-                spot_price = 21850 if symbol == "NIFTY" else 48250
+            # Spot price from the batched quote service (shared with other callers)
+            _, index_token = INDEX_TOKENS[symbol]
+            quote = self.get_quotes([('NSE', index_token)]).get(('NSE', index_token))
+            if not quote or not quote.get('ltp'):
+                logger.warning("⚠️ Could not get %s spot price from Angel One", symbol)
+                return None
+            spot_price = float(quote['ltp'])
+            logger.debug("📊 %s Spot Price: %s", symbol, spot_price)
             
-            # Angel One doesn't provide direct option chain API
-            # We'll use historical data API or market data API
-            # For now, use gfeed API which provides real-time quotes
+            # Angel One doesn't provide direct option chain API - build a
+            # realistic chain around the live spot price
+            option_chain = self._build_option_chain_from_spot(symbol, spot_price)
+            logger.debug("✅ Generated %d option strikes from Angel One data", len(option_chain))
+            return self._closed.put(('chain', symbol), option_chain)
             
-            try:
-                # Get market data for index
-                market_data = self.api.getMarketData("FULL", [{"exchange": "NSE", "symboltoken": index_token}])
-                
-                if market_data and market_data.get('status'):
-                    feed_data = market_data.get('data', {})
-                    print(f"✅ Got market data from Angel One")
-                    
-                    # Extract useful information
-                    fetched = feed_data.get('fetched', [{}])[0] if feed_data.get('fetched') else {}
-                    
-                    # Build option chain structure compatible with our system
-                    # Since Angel One doesn't provide complete option chain in one call,
-                    # we'll generate strikes based on spot price and fetch individual options
-                    
-                    import requests
-                    import json
-                    
-                    # Download instrument list (do this once and cache)
-                    # For now, we'll create a realistic option chain based on spot price
-                    option_chain = self._build_option_chain_from_spot(symbol, spot_price)
-                    
-                    print(f"✅ Generated {len(option_chain)} option strikes from Angel One data")
-                    return option_chain
-                    
-            except Exception as e:
-                print(f"⚠️ Angel One market data failed: {e}")
-                # Fallback to building from spot price
-                option_chain = self._build_option_chain_from_spot(symbol, spot_price)
-                return option_chain
-                
         except Exception as e:
-            print(f"❌ Angel One option chain error: {e}")
+            logger.error("❌ Angel One option chain error: %s", e)
             return None
     
     def _build_option_chain_from_spot(self, symbol, spot_price):
@@ -290,7 +406,6 @@ class AngelAPI:
         Uses Angel One's real spot price with calculated Greeks
         """
         import random
-        from datetime import datetime, timedelta
         
         # Determine strike interval
         if symbol == "NIFTY":
@@ -308,12 +423,8 @@ class AngelAPI:
         for offset in range(-atm_range, atm_range + strike_interval, strike_interval):
             strikes.append(atm_strike + offset)
         
-        # Get next expiry (Thursday)
-        today = datetime.now()
-        days_until_thursday = (3 - today.weekday()) % 7
-        if days_until_thursday == 0 and today.hour >= 15:  # After market close
-            days_until_thursday = 7
-        expiry = today + timedelta(days=days_until_thursday)
+        # Next expiry from the exchange calendar (only NIFTY has weekly expiries)
+        expiry = CALENDAR.expiry(monthly=symbol != "NIFTY")
         expiry_str = expiry.strftime("%d-%b-%Y")
         
         option_chain = []
@@ -381,9 +492,9 @@ class AngelAPI:
         try:
             if self.api and self.logged_in:
                 self.api.terminateSession(Config.ANGEL_CLIENT_ID)
-                self.logged_in = False
-                print("✅ Logged out successfully")
+                self.sessions.clear()
+                logger.info("✅ Logged out successfully")
                 return True
         except Exception as e:
-            print(f"Logout error: {e}")
+            logger.error("Logout error: %s", e)
             return False
@@ -3,10 +3,19 @@ Main Flask Application for Trading Automation
 Handles API routes and coordinates trading operations with background updates
 """
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 from flask_cors import CORS
 from strategy import TradingStrategy
-import schedule
+from app_state import AppState
+from json_provider import FastJSONProvider
+from chain_diff import ChainDeltaLog
+from circuit_breaker import BREAKERS
+from config import Config
+from metrics import REGISTRY
+from scheduler import SCHEDULER, Job
+from log_config import setup_logging
+from single_flight import SingleFlight
+from snapshots import SnapshotStore, snapshot_response
 import threading
 import time
 import logging
@@ -16,38 +25,72 @@ import os
 app = Flask(__name__, 
             static_folder='../frontend',
             template_folder='../frontend')
+app.json = FastJSONProvider(app)
 CORS(app)
 
-# Initialize logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Initialize logging (queued, written by a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Initialize strategy
-strategy = TradingStrategy()
-market_data = {}
-trading_active = False
+# Initialize strategy (broker login happens in the background, see start_background_tasks)
+strategy = TradingStrategy(login=False)
+snapshots = SnapshotStore()  # serialized payloads served to every polling tab
+state = AppState(snapshots=snapshots)
+chain_fetches = SingleFlight()  # concurrent dashboards share one NSE fetch per symbol
+chain_deltas = ChainDeltaLog()  # per-symbol cell changes for /api/option-chain/<symbol>/delta
+
+# Trade columns rendered by the dashboard
+TRADE_HISTORY_FIELDS = ('timestamp', 'symbol', 'strike', 'option_type', 'side', 'entry_price',
+                        'exit_price', 'quantity', 'pnl', 'pnl_percentage', 'status', 'strategy')
+
+_started_at = time.time()
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def broker_login():
+    """Log in to the broker, retrying with backoff until it succeeds"""
+    delay = 5
+    while not strategy.angel.is_logged_in():
+        if strategy.angel.login():
+            break
+        logger.warning("Broker login failed, retrying in %ss", delay)
+        time.sleep(delay)
+        delay = min(delay * 2, 300)
 
 
 def update_market_data():
-    """Background task to update data every 1 minute"""
-    global market_data
-    while True:
-        try:
-            if trading_active:
-                market_data = strategy.analyze_market("NIFTY")
-                if market_data:
-                    logger.info(f"📊 Updated - PCR: {market_data.get('pcr')}, "
-                              f"Max Pain: {market_data.get('max_pain')}, "
-                              f"Signal: {market_data.get('signal', {}).get('action')}")
-                else:
-                    logger.warning("Failed to update market data")
-            time.sleep(60)  # Update every minute
-        except Exception as e:
-            logger.error(f"Error in update_market_data: {str(e)}")
-            time.sleep(60)
+    """Refresh the dashboard's market data (scheduled after every candle close)"""
+    if not state.trading_active:
+        return
+    market_data = strategy.analyze_market(state.symbol)
+    if state.set_market_data(market_data):
+        logger.info("📊 Updated - PCR: %s, Max Pain: %s, Signal: %s",
+                    market_data.get('pcr'), market_data.get('max_pain'),
+                    market_data.get('signal', {}).get('action'))
+    else:
+        logger.warning("Failed to update market data")
+
+
+def start_background_tasks():
+    """
+    Start broker login and the market data updater once per process
+    
+    Called from gunicorn's post_worker_init hook (after gevent has patched the
+    worker) and from __main__ for the development server, so the worker is
+    already listening while the broker logs in. /readyz reports when it is done.
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    
+    threading.Thread(target=broker_login, daemon=True).start()
+    
+    logger.info("Starting background market data updater...")
+    SCHEDULER.add(Job('market_data', update_market_data, Config.MARKET_DATA_INTERVAL, immediate=True))
+    SCHEDULER.start()
 
 
 @app.route('/')
@@ -82,7 +125,7 @@ def login():
             }), 401
             
     except Exception as e:
-        logger.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -91,18 +134,19 @@ def login():
 
 @app.route('/api/market-data')
 def get_market_data():
-    """Get current market data and signals"""
-    return jsonify(market_data if market_data else {
-        'error': 'No data available',
-        'signal': {'action': 'WAIT'}
-    })
+    """Get current market data and signals (304 if unchanged)"""
+    snapshot = snapshots.get('market-data')
+    if snapshot is None:
+        return jsonify({
+            'error': 'No data available',
+            'signal': {'action': 'WAIT'}
+        })
+    return snapshot_response(snapshot)
 
 
 @app.route('/api/start-trading', methods=['POST'])
 def start_trading():
     """Start automated trading"""
-    global trading_active
-    
     if not strategy.angel.is_logged_in():
         return jsonify({
             'success': False,
@@ -113,21 +157,20 @@ def start_trading():
         data = request.json if request.json else {}
         symbol = data.get('symbol', 'NIFTY')
         
-        trading_active = True
+        state.start(symbol)
         
         # Immediate first update
-        global market_data
-        market_data = strategy.analyze_market(symbol)
+        state.set_market_data(strategy.analyze_market(symbol))
         
-        logger.info(f"Started trading for {symbol}")
+        logger.info("Started trading for %s", symbol)
         return jsonify({
             'success': True,
             'message': f'Trading started for {symbol}',
-            'data': market_data
+            'data': state.market_data
         })
         
     except Exception as e:
-        logger.error(f"Error starting trading: {str(e)}")
+        logger.error("Error starting trading: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -137,10 +180,8 @@ def start_trading():
 @app.route('/api/stop-trading', methods=['POST'])
 def stop_trading():
     """Stop automated trading"""
-    global trading_active
-    
     try:
-        trading_active = False
+        state.stop()
         
         logger.info("Trading stopped")
         return jsonify({
@@ -149,7 +190,7 @@ def stop_trading():
         })
         
     except Exception as e:
-        logger.error(f"Error stopping trading: {str(e)}")
+        logger.error("Error stopping trading: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -160,7 +201,7 @@ def stop_trading():
 def execute_trade():
     """Execute trade based on current signal"""
     try:
-        signal = market_data.get('signal', {})
+        signal = state.market_data.get('signal', {})
         
         if signal.get('action') == 'WAIT':
             return jsonify({
@@ -177,7 +218,7 @@ def execute_trade():
         })
         
     except Exception as e:
-        logger.error(f"Error executing trade: {str(e)}")
+        logger.error("Error executing trade: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -201,35 +242,55 @@ def get_positions():
         })
         
     except Exception as e:
-        logger.error(f"Error fetching positions: {str(e)}")
+        logger.error("Error fetching positions: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
 
+def _publish_option_chain(symbol):
+    """Fetch the chain, analyze every expiry and publish the dashboard payload"""
+    df = strategy.oc.get_nse_data(symbol)
+    if not df:
+        return None
+    
+    # Calculate metrics per expiry, send strikes around ATM of the nearest expiry
+    by_expiry = strategy.oc.analyze_expiries(df, symbol)
+    nearest = by_expiry['expiries'].get(by_expiry['nearest'], {})
+    rows = by_expiry['index'].get(by_expiry['nearest'])
+    underlying_value = strategy.oc.get_underlying_value(rows)
+    data = {
+        'expiry': by_expiry['nearest'],
+        'underlying_value': underlying_value,
+        'pcr': nearest.get('pcr', 0),
+        'max_pain': nearest.get('max_pain', 0),
+        'heavy_call': nearest.get('heavy_call', 0),
+        'heavy_put': nearest.get('heavy_put', 0),
+        'expiries': list(by_expiry['expiries'].values()),
+        'options': strategy.oc.atm_window(rows, underlying_value, Config.CHAIN_WINDOW)
+    }
+    
+    chain_deltas.update(symbol, data)
+    return snapshots.publish(('chain', symbol), {'success': True, 'data': data})
+
+
+def _option_chain_snapshot(symbol):
+    """Current chain snapshot, re-fetched at most every SNAPSHOT_TTL seconds"""
+    snapshot = snapshots.current(('chain', symbol), max_age=Config.SNAPSHOT_TTL)
+    if snapshot is None:
+        snapshot = chain_fetches.do(symbol, _publish_option_chain, symbol)
+    return snapshot
+
+
 @app.route('/api/option-chain/<symbol>', methods=['GET'])
 def get_option_chain(symbol):
-    """Get option chain data"""
+    """Get option chain data (re-fetched at most every SNAPSHOT_TTL seconds, 304 if unchanged)"""
     try:
-        df = strategy.oc.get_nse_data(symbol)
+        snapshot = _option_chain_snapshot(symbol)
         
-        if df is not None:
-            # Calculate metrics
-            pcr = strategy.oc.calculate_pcr(df)
-            max_pain = strategy.oc.get_max_pain(df)
-            heavy_call, heavy_put = strategy.oc.get_heavy_strikes(df)
-            
-            return jsonify({
-                'success': True,
-                'data': {
-                    'pcr': pcr,
-                    'max_pain': max_pain,
-                    'heavy_call': heavy_call,
-                    'heavy_put': heavy_put,
-                    'options': df.to_dict('records')[:20]  # Send top 20 strikes
-                }
-            })
+        if snapshot is not None:
+            return snapshot_response(snapshot)
         else:
             return jsonify({
                 'success': False,
@@ -237,7 +298,64 @@ def get_option_chain(symbol):
             }), 500
         
     except Exception as e:
-        logger.error(f"Error fetching option chain: {str(e)}")
+        logger.error("Error fetching option chain: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/option-chain/<symbol>/delta', methods=['GET'])
+def get_option_chain_delta(symbol):
+    """
+    Option chain changes since the client's last sequence number
+    
+    Query: since=<seq>&epoch=<epoch> from the previous response. Returns the
+    deltas to apply in order, or the full payload when the client is too far
+    behind, has no state yet or the server restarted.
+    """
+    try:
+        _option_chain_snapshot(symbol)
+        changes = chain_deltas.since(symbol,
+                                     request.args.get('since', 0, type=int),
+                                     request.args.get('epoch', None, type=int))
+        if changes is None:
+            return jsonify({
+                'success': False,
+                'message': 'Failed to fetch option chain'
+            }), 500
+        
+        return jsonify({'success': True, **changes})
+        
+    except Exception as e:
+        logger.error("Error fetching option chain delta: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/oi-analytics/<symbol>', methods=['GET'])
+def get_oi_analytics(symbol):
+    """Session OI buildup per strike, rolling PCR and max-pain drift (recomputed only after a new reading)"""
+    try:
+        history = strategy.oi_history(symbol)
+        if history is None:
+            return jsonify({
+                'success': False,
+                'message': f'No OI history for {symbol} yet'
+            }), 404
+        
+        snapshot = snapshots.current(('oi', symbol), source=history.version)
+        if snapshot is None:
+            snapshot = snapshots.publish(('oi', symbol), {
+                'success': True,
+                'data': history.report()
+            }, source=history.version)
+        return snapshot_response(snapshot)
+        
+    except Exception as e:
+        logger.error("Error fetching OI analytics: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
@@ -246,22 +364,81 @@ def get_option_chain(symbol):
 
 @app.route('/api/trade-history', methods=['GET'])
 def get_trade_history():
-    """Get trade history from database"""
+    """Get trade history from database (re-read only after a trade is written)"""
     try:
-        history = strategy.get_trade_history()
-        return jsonify({
-            'success': True,
-            'trades': history
-        })
+        version = strategy.trades_version
+        snapshot = snapshots.current('trade-history', source=version)
+        if snapshot is None:
+            history = strategy.get_trade_history()
+            snapshot = snapshots.publish('trade-history', {
+                'success': True,
+                'trades': [{field: trade.get(field) for field in TRADE_HISTORY_FIELDS} for trade in history]
+            }, source=version)
+        return snapshot_response(snapshot)
             
     except Exception as e:
-        logger.error(f"Error fetching trade history: {str(e)}")
+        logger.error("Error fetching trade history: %s", e)
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
 
+@app.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    """Recent alerts, newest first"""
+    return jsonify({
+        'success': True,
+        'sinks': strategy.alerts.sinks,
+        'alerts': strategy.alerts.recent_alerts()
+    })
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving requests (plus upstream breaker states and source scores)"""
+    return jsonify({
+        'status': 'ok',
+        'uptime': round(time.time() - _started_at, 1),
+        'breakers': BREAKERS.snapshot(),
+        'sources': strategy.source_scores(),
+        'scheduler': SCHEDULER.snapshot()
+    })
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Readiness: broker logged in and background tasks running (503 until then)
+    
+    Open upstream breakers mark the service as degraded but keep it ready -
+    the dashboard falls back to other sources while they back off.
+    """
+    checks = {
+        'broker_logged_in': strategy.angel.is_logged_in(),
+        'background_tasks': _background_started
+    }
+    ready = all(checks.values())
+    degraded = BREAKERS.open_breakers()
+    if not ready:
+        status = 'starting'
+    else:
+        status = 'degraded' if degraded else 'ready'
+    return jsonify({
+        'status': status,
+        'checks': checks,
+        'degraded': degraded,
+        'breakers': BREAKERS.snapshot(),
+        'uptime': round(time.time() - _started_at, 1)
+    }), 200 if ready else 503
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: stage latencies, upstream calls, cache hit rates, order latency"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 if __name__ == '__main__':
     # Ensure database directory exists
     try:
@@ -270,15 +447,13 @@ if __name__ == '__main__':
         pass
     
     # Start background data updater thread
-    logger.info("Starting background market data updater...")
-    thread = threading.Thread(target=update_market_data, daemon=True)
-    thread.start()
+    start_background_tasks()
     
     # Get port from environment variable (for cloud deployment)
     port = int(os.environ.get('PORT', 10000))
     
     # Run the app
-    logger.info(f"Starting Flask server on http://0.0.0.0:{port}")
+    logger.info("Starting Flask server on http://0.0.0.0:%s", port)
     print(f"Server starting on port {port}")
     app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
 
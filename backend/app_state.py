@@ -0,0 +1,63 @@
+"""
+Shared Application State
+Market data and trading status shared by request handlers and background
+tasks, guarded by a lock so sync threads and gevent greenlets see consistent values
+"""
+
+import threading
+from config import Config
+
+
+class AppState:
+    """Lock-protected trading state for one server process"""
+
+    def __init__(self, symbol=None, snapshots=None):
+        """
+        Args:
+            symbol: Initial trading symbol (defaults to Config.DEFAULT_SYMBOL)
+            snapshots: SnapshotStore to publish market data to (optional)
+        """
+        self._lock = threading.Lock()
+        self.snapshots = snapshots
+        self._market_data = {}
+        self._trading_active = False
+        self._symbol = symbol or Config.DEFAULT_SYMBOL
+
+    @property
+    def trading_active(self):
+        return self._trading_active
+
+    @property
+    def symbol(self):
+        return self._symbol
+
+    @property
+    def market_data(self):
+        """Latest analysis (replaced as a whole, never mutated in place)"""
+        return self._market_data
+
+    def set_market_data(self, data):
+        """Publish a new analysis, keeping the previous one if data is empty"""
+        if not data:
+            return False
+        with self._lock:
+            self._market_data = data
+            if self.snapshots is not None:
+                self.snapshots.publish('market-data', data)
+        return True
+
+    def start(self, symbol):
+        """Mark trading active for symbol"""
+        with self._lock:
+            self._trading_active = True
+            self._symbol = symbol
+
+    def stop(self):
+        """Mark trading inactive"""
+        with self._lock:
+            self._trading_active = False
+
+    def snapshot(self):
+        """Consistent (trading_active, symbol, market_data) triple"""
+        with self._lock:
+            return self._trading_active, self._symbol, self._market_data
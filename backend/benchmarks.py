@@ -0,0 +1,267 @@
+"""
+Benchmark Suite
+Times the analytics, prediction, serialization and persistence hot paths on generated data.
+Runs fully offline (paper broker, mock-style chains) and saves JSON results
+that can be compared between runs to catch regressions.
+
+Usage:
+    python benchmarks.py                          # full run, writes benchmark_results.json
+    python benchmarks.py --quick                  # smaller sizes
+    python benchmarks.py --compare old.json       # flag regressions against a previous run
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+CHAIN_SIZES = [50, 500, 5000]
+CANDLE_SIZES = [10, 1000, 100000]
+TRADE_SIZES = [100, 10000]
+QUICK_CHAIN_SIZES = [50, 500]
+QUICK_CANDLE_SIZES = [10, 1000]
+QUICK_TRADE_SIZES = [100]
+
+
+def make_chain(n_strikes, underlying_value=21850, strike_step=50, seed=42):
+    """Generate an NSE-format option chain with n_strikes around the underlying (mock_data style)"""
+    rng = random.Random(seed)
+    first = int(underlying_value - (n_strikes // 2) * strike_step)
+    expiry = (datetime.now() + timedelta(days=3)).strftime("%d-%b-%Y")
+    chain = []
+
+    for i in range(n_strikes):
+        strike = first + i * strike_step
+        distance = abs(strike - underlying_value)
+        base_oi = max(100000 - distance * 100, 10000)
+        ce_oi = int(base_oi * rng.uniform(0.8, 1.2))
+        pe_oi = int(base_oi * rng.uniform(0.8, 1.2))
+        chain.append({
+            'strikePrice': strike,
+            'expiryDate': expiry,
+            'underlyingValue': underlying_value,
+            'CE': {
+                'strikePrice': strike,
+                'openInterest': ce_oi,
+                'changeinOpenInterest': rng.randint(-5000, 5000),
+                'totalTradedVolume': int(ce_oi * 0.3),
+                'impliedVolatility': round(rng.uniform(15, 35), 2),
+                'lastPrice': max(10, underlying_value - strike + 50) if strike < underlying_value else rng.randint(10, 100),
+            },
+            'PE': {
+                'strikePrice': strike,
+                'openInterest': pe_oi,
+                'changeinOpenInterest': rng.randint(-5000, 5000),
+                'totalTradedVolume': int(pe_oi * 0.3),
+                'impliedVolatility': round(rng.uniform(15, 35), 2),
+                'lastPrice': max(10, strike - underlying_value + 50) if strike > underlying_value else rng.randint(10, 100),
+            }
+        })
+    return chain
+
+
+def make_candles(n_bars, start_price=21850, seed=42):
+    """Generate SmartAPI-format candles [timestamp, open, high, low, close, volume] as a random walk"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5, 9, 15)
+    price = start_price
+    candles = []
+
+    for i in range(n_bars):
+        open_price = price
+        price = max(1.0, price + rng.gauss(0, 15))
+        high = max(open_price, price) + abs(rng.gauss(0, 5))
+        low = min(open_price, price) - abs(rng.gauss(0, 5))
+        timestamp = (start + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S+05:30")
+        candles.append([timestamp, round(open_price, 2), round(high, 2), round(low, 2),
+                        round(price, 2), rng.randint(1000, 100000)])
+    return candles
+
+
+def make_trade(i):
+    """Generate one trades-table row"""
+    return {
+        'timestamp': (datetime(2026, 1, 5, 9, 15) + timedelta(seconds=i)).isoformat(),
+        'symbol': f"NIFTY{21000 + (i % 40) * 50}CE",
+        'strike': 21000 + (i % 40) * 50,
+        'option_type': 'CALL' if i % 2 == 0 else 'PUT',
+        'entry_price': 100 + i % 50,
+        'exit_price': None,
+        'quantity': 25,
+        'side': 'BUY',
+        'status': 'OPEN',
+        'order_id': f"BENCH{i}"
+    }
+
+
+def measure(func, min_time=0.2, max_runs=1000):
+    """
+    Run func repeatedly and return per-call timings in seconds
+
+    Runs at least 3 times (once if a single call takes longer than min_time)
+    and stops once min_time has elapsed or max_runs is reached.
+    """
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_runs:
+        t0 = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time and (len(timings) >= 3 or timings[0] >= min_time):
+            break
+    return timings
+
+
+def summarize(name, size, timings):
+    """Result row for one benchmark"""
+    ordered = sorted(timings)
+    return {
+        'name': name,
+        'size': size,
+        'runs': len(timings),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    }
+
+
+def run(chain_sizes, candle_sizes, trade_sizes):
+    """Run every benchmark and return result rows"""
+    from candle_prediction import predict_next_candle
+    from indicators import IndicatorSet
+    from json_provider import dumps_bytes
+    from oi_analytics import OISeries
+    from option_chain import OptionChain
+    from paper_broker import PaperBroker
+    from strategy import TradingStrategy
+    from strategy_registry import MarketSnapshot
+
+    results = []
+    oc = OptionChain()
+
+    def record(name, size, func):
+        row = summarize(name, size, measure(func))
+        results.append(row)
+        print(f"  {name:<32} n={size:<7} median {row['median'] * 1000:10.3f} ms  ({row['runs']} runs)")
+
+    print("Option chain analytics")
+    for size in chain_sizes:
+        chain = make_chain(size)
+        record('calculate_pcr', size, lambda: oc.calculate_pcr(chain))
+        record('get_max_pain', size, lambda: oc.get_max_pain(chain))
+        record('get_heavy_strikes', size, lambda: oc.get_heavy_strikes(chain))
+        record('serialize_chain', size, lambda: dumps_bytes(chain))
+        oi_history = OISeries()
+        snapshot = MarketSnapshot('NIFTY', 21850, 1.0, 21850, chain_rows=chain)
+        record('oi_history_update', size, lambda: oi_history.update(snapshot))
+        record('oi_history_report', size, lambda: oi_history.report())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        strategy = TradingStrategy(angel_api=PaperBroker(), option_chain_scraper=oc,
+                                   db_path=os.path.join(tmp, 'bench.db'))
+
+        print("Candle prediction and signals")
+        for size in candle_sizes:
+            candles = make_candles(size)
+            price = candles[-1][4]
+            record('predict_next_candle', size,
+                   lambda: predict_next_candle(candles, 0.9, 21850, price))
+            record('generate_signal_with_candles', size,
+                   lambda: strategy.generate_signal_with_candles(0.9, 21850, price, candles))
+            indicators = IndicatorSet()
+            record('indicators_warm_up', size, lambda: indicators.warm_up(candles))
+            record('indicators_update', size, lambda: indicators.update(candles[-1]))
+
+        print("Trade persistence")
+        for size in trade_sizes:
+            strategy.db_path = os.path.join(tmp, f'trades_{size}.db')
+            strategy._init_database()
+            counter = iter(range(10 ** 9))
+            for i in range(size):
+                strategy._save_trade(make_trade(i))
+            record('_save_trade', size, lambda: strategy._save_trade(make_trade(size + next(counter))))
+            record('get_trade_history', size, lambda: strategy.get_trade_history(limit=100))
+
+    return results
+
+
+def git_revision():
+    """Current commit, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Print median ratios against a previous run
+
+    Returns:
+        list: Benchmarks slower than threshold x baseline
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"\nComparison with {baseline_path} (median, new/old)")
+    for row in results:
+        old = baseline.get((row['name'], row['size']))
+        if not old or not old['median']:
+            continue
+        ratio = row['median'] / old['median']
+        flag = ''
+        if ratio > threshold:
+            flag = '  REGRESSION'
+            regressions.append((row['name'], row['size'], ratio))
+        print(f"  {row['name']:<32} n={row['size']:<7} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analytics, prediction and persistence hot paths')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write JSON results')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression (default 1.25)')
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes for a fast check')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.quick:
+        results = run(QUICK_CHAIN_SIZES, QUICK_CANDLE_SIZES, QUICK_TRADE_SIZES)
+    else:
+        results = run(CHAIN_SIZES, CANDLE_SIZES, TRADE_SIZES)
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
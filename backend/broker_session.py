@@ -0,0 +1,178 @@
+"""
+Broker Session Lifecycle
+Tracks the JWT expiry of a broker login, refreshes it in the background before
+it expires (refresh-token flow, full login as fallback) and lets concurrent
+callers share one in-flight login. Request paths only read the token state and
+never wait on a login.
+"""
+
+import base64
+import json
+import logging
+import threading
+import time
+from config import Config
+from metrics import SESSION_EVENTS
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def token_expiry(jwt):
+    """'exp' claim of a JWT as a unix timestamp (None if it cannot be read)"""
+    try:
+        token = jwt.split(' ')[-1]  # strip 'Bearer '
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except Exception:
+        return None
+
+
+class BrokerSession:
+    """Token state of one broker login plus its background refresher"""
+
+    def __init__(self, login, refresh, refresh_margin=None, default_ttl=None, clock=time.time):
+        """
+        Args:
+            login: Callable() -> {'jwtToken', 'refreshToken', 'feedToken'}; raises on failure
+            refresh: Callable(refresh_token) -> same dict; raises on failure
+            refresh_margin: Seconds before expiry to refresh
+            default_ttl: Token lifetime in seconds when the JWT has no 'exp'
+            clock: Wall clock (JWT expiry is a unix timestamp)
+        """
+        self._login = login
+        self._refresh = refresh
+        self.refresh_margin = refresh_margin if refresh_margin is not None else Config.SESSION_REFRESH_MARGIN
+        self.default_ttl = default_ttl if default_ttl is not None else Config.SESSION_DEFAULT_TTL
+        self.clock = clock
+
+        self.jwt = None
+        self.refresh_token = None
+        self.feed_token = None
+        self.expires_at = 0.0
+        self._flight = SingleFlight()
+        self._wake = threading.Event()
+        self._refresher = None
+        self._refresher_lock = threading.Lock()
+
+    def valid(self):
+        """Whether there is an unexpired token"""
+        return self.jwt is not None and self.clock() < self.expires_at
+
+    def expires_in(self):
+        return max(0.0, self.expires_at - self.clock()) if self.jwt else 0.0
+
+    def _store(self, tokens):
+        jwt = tokens['jwtToken']
+        self.refresh_token = tokens.get('refreshToken') or self.refresh_token
+        self.feed_token = tokens.get('feedToken') or self.feed_token
+        self.expires_at = token_expiry(jwt) or self.clock() + self.default_ttl
+        self.jwt = jwt
+
+    def login(self):
+        """
+        Full login; concurrent callers share one attempt
+
+        Returns:
+            bool: Whether a valid session exists afterwards
+        """
+        if self.valid():
+            return True
+        return self._flight.do('login', self._do_login)
+
+    def _do_login(self, force=False):
+        if self.valid() and not force:
+            return True
+        try:
+            self._store(self._login())
+        except Exception as e:
+            SESSION_EVENTS.inc(event='login', result='error')
+            logger.error("❌ Login Failed: %s", e)
+            return False
+        SESSION_EVENTS.inc(event='login', result='ok')
+        logger.info("✅ Angel One Login Success (token valid for %.0f min)", self.expires_in() / 60)
+        self.start_refresher()
+        return True
+
+    def refresh(self):
+        """
+        Renew the token with the refresh token, falling back to a full login
+
+        Returns:
+            bool: Whether a valid session exists afterwards
+        """
+        return self._flight.do('refresh', self._do_refresh)
+
+    def _do_refresh(self):
+        if self.refresh_token:
+            try:
+                self._store(self._refresh(self.refresh_token))
+                SESSION_EVENTS.inc(event='refresh', result='ok')
+                logger.info("🔄 Broker session refreshed (valid for %.0f min)", self.expires_in() / 60)
+                return True
+            except Exception as e:
+                SESSION_EVENTS.inc(event='refresh', result='error')
+                logger.warning("Token refresh failed, logging in again: %s", e)
+        # The current token stays usable until the new login lands
+        return self._flight.do('login', self._do_login, True)
+
+    def invalidate(self):
+        """
+        Drop a token the broker rejected and re-login in the background
+
+        Called from request paths, so it never blocks.
+        """
+        if self.jwt is None:
+            return
+        SESSION_EVENTS.inc(event='expired', result='rejected')
+        logger.warning("Broker rejected the session token, re-login scheduled")
+        self.expires_at = 0.0
+        self._wake.set()
+
+    def clear(self):
+        """Forget the session (logout); stops the refresher"""
+        self.jwt = None
+        self.refresh_token = None
+        self.feed_token = None
+        self.expires_at = 0.0
+        self._wake.set()
+
+    def start_refresher(self):
+        """Start the background refresher once"""
+        with self._refresher_lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        """Refresh refresh_margin seconds before expiry; re-login with backoff once expired"""
+        retry = 5
+        while self.jwt is not None:
+            due = self.expires_at - self.refresh_margin - self.clock()
+            if due > 0 and self.valid():
+                # Wake at least every minute in case the clock jumped (sleep/suspend)
+                self._wake.wait(min(due, 60))
+                self._wake.clear()
+                continue
+
+            ok = self.refresh() if self.valid() else self.login()
+            if ok and self.expires_at - self.refresh_margin > self.clock():
+                retry = 5
+                continue
+
+            # Failed, or the new token is already inside the margin - back off
+            self._wake.wait(retry)
+            self._wake.clear()
+            retry = min(retry * 2, 300)
+
+        with self._refresher_lock:
+            self._refresher = None
+
+    def snapshot(self):
+        """Session state for health endpoints"""
+        return {
+            'logged_in': self.valid(),
+            'expires_in': round(self.expires_in()),
+            'refresh_in': round(max(0.0, self.expires_in() - self.refresh_margin)) if self.jwt else None
+        }
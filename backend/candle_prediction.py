@@ -3,6 +3,11 @@
 Predicts next candle direction using technical analysis
 """
 
+import logging
+
+logger = logging.getLogger(__name__)
+
+
 def identify_candle_pattern(open_price, high, low, close, prev_open=None, prev_close=None):
     """
     Identify candlestick pattern
@@ -95,9 +100,13 @@ def identify_candle_pattern(open_price, high, low, close, prev_open=None, prev_c
     return ("Unknown", None, 0)
 
 
-def predict_next_candle(candles, pcr, max_pain, current_price):
+def predict_next_candle(candles, pcr, max_pain, current_price, indicators=None):
     """
     Predict next 15-min candle direction
+    
+    indicators: optional IndicatorSet.snapshot() - EMA cross, RSI, VWAP and
+    SuperTrend then add to the signal count
+    
     Returns: 'BULLISH', 'BEARISH', or 'NEUTRAL'
     """
     if not candles or len(candles) < 3:
@@ -200,6 +209,35 @@ def predict_next_candle(candles, pcr, max_pain, current_price):
             if momentum > 0.3:
                 bearish_signals += 1
         
+        # 8. Streaming indicators (each only once it has enough bars)
+        if indicators:
+            ema_fast, ema_slow = indicators.get('ema_fast'), indicators.get('ema_slow')
+            if ema_fast is not None and ema_slow is not None:
+                if ema_fast > ema_slow:
+                    bullish_signals += 1
+                elif ema_fast < ema_slow:
+                    bearish_signals += 1
+            
+            rsi = indicators.get('rsi')
+            if rsi is not None:
+                if rsi < 30:  # Oversold
+                    bullish_signals += 1
+                elif rsi > 70:  # Overbought
+                    bearish_signals += 1
+            
+            vwap = indicators.get('vwap')
+            if vwap:
+                if last_close > vwap:
+                    bullish_signals += 1
+                elif last_close < vwap:
+                    bearish_signals += 1
+            
+            trend = indicators.get('supertrend_direction')
+            if trend == 1:
+                bullish_signals += 1
+            elif trend == -1:
+                bearish_signals += 1
+        
         # Final decision
         total_signals = bullish_signals + bearish_signals
         confidence = 0
@@ -223,11 +261,12 @@ def predict_next_candle(candles, pcr, max_pain, current_price):
             'bearish_signals': bearish_signals,
             'pattern': current_pattern,
             'pattern_strength': pattern_strength,
+            'indicators': indicators,
             'reason': f"{current_pattern} pattern detected - {bullish_signals} bullish vs {bearish_signals} bearish signals"
         }
         
     except Exception as e:
-        print(f"Error in candle prediction: {e}")
+        logger.error("Error in candle prediction: %s", e)
         return {
             'direction': 'NEUTRAL',
             'confidence': 0,
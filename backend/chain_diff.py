@@ -0,0 +1,120 @@
+"""
+Option Chain Deltas
+Diffs each published option chain payload against the previous one per symbol
+and keeps a short, sequence-numbered history so dashboards can fetch only the
+cells that changed since their last update
+"""
+
+import threading
+import time
+from collections import deque
+
+# Top-level payload fields the dashboard shows
+CHAIN_FIELDS = ('expiry', 'underlying_value', 'pcr', 'max_pain', 'heavy_call', 'heavy_put', 'expiries')
+ROW_FIELDS = ('atm', 'pcr')
+SIDE_FIELDS = ('oi', 'chg_oi', 'volume', 'ltp', 'iv')
+
+
+def diff_chain(old, new):
+    """
+    Changes that turn payload old into payload new
+
+    Args:
+        old: Previous option chain payload (the 'data' object of /api/option-chain)
+        new: Current payload
+
+    Returns:
+        dict: {'fields': {...}, 'rows': {strike: {...}}, 'options': [...]} with
+              empty parts omitted; 'options' (the full row list) is only sent when
+              the strikes shown changed, e.g. after ATM moved. Empty if unchanged.
+    """
+    delta = {}
+
+    fields = {key: new.get(key) for key in CHAIN_FIELDS if new.get(key) != old.get(key)}
+    if fields:
+        delta['fields'] = fields
+
+    old_rows = old.get('options') or []
+    new_rows = new.get('options') or []
+    if [row['strike'] for row in old_rows] != [row['strike'] for row in new_rows]:
+        delta['options'] = new_rows
+        return delta
+
+    rows = {}
+    for before, after in zip(old_rows, new_rows):
+        change = {key: after[key] for key in ROW_FIELDS if after.get(key) != before.get(key)}
+        for side in ('ce', 'pe'):
+            old_side = before.get(side, {})
+            new_side = after.get(side, {})
+            cells = {key: new_side.get(key) for key in SIDE_FIELDS if new_side.get(key) != old_side.get(key)}
+            if cells:
+                change[side] = cells
+        if change:
+            rows[str(after['strike'])] = change
+    if rows:
+        delta['rows'] = rows
+    return delta
+
+
+class ChainDeltaLog:
+    """Latest payload and recent deltas per symbol"""
+
+    def __init__(self, history=60):
+        """
+        Args:
+            history: Deltas kept per symbol; older clients get a full resync
+        """
+        self.history = history
+        self.epoch = int(time.time() * 1000)  # changes on restart, forcing a resync
+        self._symbols = {}  # symbol -> {'seq', 'data', 'deltas': deque of (seq, delta)}
+        self._lock = threading.Lock()
+
+    def update(self, symbol, data):
+        """
+        Record a new payload for symbol
+
+        Returns:
+            int: Sequence number of the payload (unchanged if nothing differs)
+        """
+        with self._lock:
+            entry = self._symbols.get(symbol)
+            if entry is None:
+                self._symbols[symbol] = {'seq': 1, 'data': data, 'deltas': deque(maxlen=self.history)}
+                return 1
+
+            delta = diff_chain(entry['data'], data)
+            if delta:
+                entry['seq'] += 1
+                entry['deltas'].append((entry['seq'], delta))
+            entry['data'] = data
+            return entry['seq']
+
+    def since(self, symbol, seq, epoch=None):
+        """
+        Changes for a client that last saw seq
+
+        Args:
+            symbol: Symbol
+            seq: Last sequence number the client applied (0/None = none)
+            epoch: Log epoch the client's seq belongs to
+
+        Returns:
+            dict: {'epoch', 'seq', 'deltas': [...]} to apply in order, or
+                  {'epoch', 'seq', 'full': data} when the client must resync.
+                  None if nothing was published for symbol yet.
+        """
+        with self._lock:
+            entry = self._symbols.get(symbol)
+            if entry is None:
+                return None
+
+            latest = entry['seq']
+            response = {'epoch': self.epoch, 'seq': latest}
+            deltas = entry['deltas']
+            gap = (not seq or epoch != self.epoch or seq > latest
+                   or (seq < latest and (not deltas or deltas[0][0] > seq + 1)))
+            if gap:
+                response['full'] = entry['data']
+            else:
+                response['deltas'] = [delta for number, delta in deltas if number > seq]
+            return response
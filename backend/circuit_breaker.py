@@ -0,0 +1,130 @@
+"""
+Upstream Circuit Breakers
+Skip upstreams that are known to be failing instead of waiting on their
+timeouts every call; a single probe is let through after an exponential backoff
+"""
+
+import threading
+import time
+from config import Config
+from metrics import BREAKER_TRANSITIONS, record_skipped
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open probe -> closed/open"""
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, max_reset_timeout=None,
+                 clock=time.monotonic):
+        """
+        Args:
+            name: Breaker name (e.g. 'nse:option-chain-indices')
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds before the first half-open probe
+            max_reset_timeout: Cap for the doubling backoff after failed probes
+            clock: Monotonic time source
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or Config.BREAKER_RESET_SECONDS
+        self.max_reset_timeout = max_reset_timeout or Config.BREAKER_MAX_RESET_SECONDS
+        self.clock = clock
+
+        self.state = CLOSED
+        self.failures = 0
+        self.timeout = self.reset_timeout
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go through now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() - self.opened_at >= self.timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self.timeout = self.reset_timeout
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                # Probe failed - back off further
+                self._probing = False
+                self.timeout = min(self.timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.opened_at = self.clock()
+        self._transition(OPEN)
+
+    def _transition(self, state):
+        self.state = state
+        BREAKER_TRANSITIONS.inc(breaker=self.name, state=state)
+
+    def snapshot(self):
+        """State for health endpoints"""
+        with self._lock:
+            info = {'state': self.state, 'failures': self.failures}
+            if self.state == OPEN:
+                info['retry_in'] = round(max(0.0, self.opened_at + self.timeout - self.clock()), 1)
+            return info
+
+
+class BreakerRegistry:
+    """One breaker per upstream source and endpoint, created on first use"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, source, endpoint):
+        name = f"{source}:{endpoint}"
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(name))
+        return breaker
+
+    def allow(self, source, endpoint):
+        """Whether to call the upstream; skipped calls are counted in metrics"""
+        if self.get(source, endpoint).allow():
+            return True
+        record_skipped(source, endpoint)
+        return False
+
+    def record(self, source, endpoint, ok):
+        """Report the outcome of an allowed call"""
+        breaker = self.get(source, endpoint)
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    def snapshot(self):
+        """{name: state} for every breaker"""
+        return {name: breaker.snapshot() for name, breaker in sorted(self._breakers.items())}
+
+    def open_breakers(self):
+        """Names of breakers currently skipping calls"""
+        return [name for name, breaker in sorted(self._breakers.items()) if breaker.state != CLOSED]
+
+
+BREAKERS = BreakerRegistry()
@@ -8,6 +8,25 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# NSE equity derivatives trading holidays for 2026 (exchange circular; weekend holidays left out)
+NSE_HOLIDAYS = ','.join([
+    '2026-01-26',  # Republic Day
+    '2026-03-03',  # Holi
+    '2026-03-26',  # Shri Ram Navami
+    '2026-03-31',  # Shri Mahavir Jayanti
+    '2026-04-03',  # Good Friday
+    '2026-04-14',  # Dr. Baba Saheb Ambedkar Jayanti
+    '2026-05-01',  # Maharashtra Day
+    '2026-05-28',  # Bakri Id
+    '2026-06-26',  # Muharram
+    '2026-09-14',  # Ganesh Chaturthi
+    '2026-10-02',  # Mahatma Gandhi Jayanti
+    '2026-10-20',  # Dussehra
+    '2026-11-10',  # Diwali Balipratipada
+    '2026-11-24',  # Prakash Gurpurb Sri Guru Nanak Dev
+    '2026-12-25'   # Christmas
+])
+
 
 class Config:
     """Application configuration"""
@@ -35,6 +54,8 @@ class Config:
     # Legacy strategy parameters (70% profit target)
     PROFIT_TARGET = float(os.getenv('PROFIT_TARGET', '0.70'))  # 70%
     STOP_LOSS = float(os.getenv('STOP_LOSS', '0.30'))  # 30%
+    # Also exit broker positions opened outside this app (sends real SELL orders for them)
+    MANAGE_EXTERNAL_POSITIONS = os.getenv('MANAGE_EXTERNAL_POSITIONS', 'False').lower() == 'true'
     
     # Trading parameters
     DEFAULT_QUANTITY = int(os.getenv('DEFAULT_QUANTITY', '25'))
@@ -43,3 +64,78 @@ class Config:
     # Risk management
     MAX_POSITIONS = int(os.getenv('MAX_POSITIONS', '5'))
     MAX_LOSS_PER_DAY = float(os.getenv('MAX_LOSS_PER_DAY', '5000'))
+    
+    # Paper trading (simulated broker, no real orders)
+    PAPER_TRADING = os.getenv('PAPER_TRADING', 'False').lower() == 'true'
+    PAPER_LATENCY_MS = float(os.getenv('PAPER_LATENCY_MS', '50'))
+    PAPER_SLIPPAGE_BPS = float(os.getenv('PAPER_SLIPPAGE_BPS', '5'))
+    
+    # Session recording for replays (JSON lines file, empty = disabled)
+    RECORD_SESSION_PATH = os.getenv('RECORD_SESSION_PATH', '')
+    
+    # Scheduler (jobs run just after candle boundaries, only in session)
+    MARKET_OPEN = os.getenv('MARKET_OPEN', '09:15')  # IST
+    MARKET_CLOSE = os.getenv('MARKET_CLOSE', '15:30')  # IST
+    MARKET_HOLIDAYS = os.getenv('MARKET_HOLIDAYS') or NSE_HOLIDAYS  # Comma-separated YYYY-MM-DD, overrides the bundled list
+    MARKET_HOURS_ONLY = os.getenv('MARKET_HOURS_ONLY', 'True').lower() == 'true'  # False polls around the clock
+    EXPIRY_WEEKDAY = int(os.getenv('EXPIRY_WEEKDAY', '1'))  # Index option expiry, 0 = Monday (NSE: Tuesday)
+    MARKET_DATA_INTERVAL = int(os.getenv('MARKET_DATA_INTERVAL', '60'))  # Dashboard refresh, seconds
+    MONITOR_INTERVAL = int(os.getenv('MONITOR_INTERVAL', '5'))  # Strategy monitor tick, seconds
+    SCHEDULE_OFFSET = float(os.getenv('SCHEDULE_OFFSET', '2'))  # Seconds after a candle closes
+    SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '4'))
+    
+    # Strategies
+    PRIMARY_STRATEGY = os.getenv('PRIMARY_STRATEGY', 'candles')  # Strategy whose signal the dashboard trades
+    STRATEGY_PLUGINS = os.getenv('STRATEGY_PLUGINS', '')  # e.g. "breakout=my_strategies:breakout"
+    STRATEGY_WORKERS = int(os.getenv('STRATEGY_WORKERS', '1'))  # >1 evaluates strategies in threads
+    
+    # Alerts
+    ALERT_SINKS = os.getenv('ALERT_SINKS', '')  # e.g. "file,webhook,email,desktop" or "my_module:make_sink"
+    ALERT_DEBOUNCE_SECONDS = float(os.getenv('ALERT_DEBOUNCE_SECONDS', '300'))  # Same kind/symbol repeats dropped
+    ALERT_MAX_PAIN_SHIFT = float(os.getenv('ALERT_MAX_PAIN_SHIFT', '100'))  # Points
+    ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL', '')
+    ALERT_SMTP_HOST = os.getenv('ALERT_SMTP_HOST', 'localhost')
+    ALERT_SMTP_PORT = int(os.getenv('ALERT_SMTP_PORT', '25'))
+    ALERT_EMAIL_FROM = os.getenv('ALERT_EMAIL_FROM', 'nif@localhost')
+    ALERT_EMAIL_TO = os.getenv('ALERT_EMAIL_TO', '')  # Comma-separated
+    ALERT_FILE_PATH = os.getenv('ALERT_FILE_PATH', 'logs/alerts.jsonl')
+    
+    # Candle prediction
+    MULTI_TIMEFRAME = os.getenv('MULTI_TIMEFRAME', 'False').lower() == 'true'  # Score 1/5/15/60m bars from one 1m fetch
+    TIMEFRAME_WEIGHTS = os.getenv('TIMEFRAME_WEIGHTS', '1:0.1,5:0.2,15:0.4,60:0.3')  # minutes:weight
+    
+    # OI analytics
+    OI_HISTORY_SIZE = int(os.getenv('OI_HISTORY_SIZE', '400'))  # Readings kept per symbol (a session at 1/min)
+    OI_BUILDUP_WINDOW = int(os.getenv('OI_BUILDUP_WINDOW', '15'))  # Readings compared for OI buildup
+    
+    # Option pricing
+    RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', '0.065'))  # Annual, for Black-Scholes Greeks
+    
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+    LOG_SAMPLE = os.getenv('LOG_SAMPLE', '')  # e.g. "strategy=10,angel_api=5" - keep 1 in N below WARNING
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    
+    # Quotes
+    QUOTE_WINDOW = float(os.getenv('QUOTE_WINDOW', '0.05'))  # Seconds to merge quote requests into one batch
+    QUOTE_TTL = float(os.getenv('QUOTE_TTL', '1'))  # Seconds a quote is reused
+    
+    # Broker session
+    SESSION_REFRESH_MARGIN = float(os.getenv('SESSION_REFRESH_MARGIN', '1800'))  # Refresh this many seconds before expiry
+    SESSION_DEFAULT_TTL = float(os.getenv('SESSION_DEFAULT_TTL', '21600'))  # Token lifetime if the JWT has no exp
+    
+    # Upstream circuit breakers
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))  # Consecutive failures to open
+    BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '30'))  # First retry after opening
+    BREAKER_MAX_RESET_SECONDS = float(os.getenv('BREAKER_MAX_RESET_SECONDS', '600'))  # Backoff cap
+    
+    # Option chain source selection
+    SOURCE_RACE_WIDTH = int(os.getenv('SOURCE_RACE_WIDTH', '1'))  # Sources started at once (1 = hedge only)
+    SOURCE_HEDGE_DELAY = float(os.getenv('SOURCE_HEDGE_DELAY', '1.0'))  # Seconds before hedging a source with no p95 yet
+    SOURCE_HEDGE_MIN_DELAY = float(os.getenv('SOURCE_HEDGE_MIN_DELAY', '0.2'))  # Floor for the p95 hedge delay
+    SOURCE_FETCH_TIMEOUT = float(os.getenv('SOURCE_FETCH_TIMEOUT', '30'))  # Give up on all sources after this
+    
+    # Dashboard API
+    SNAPSHOT_TTL = float(os.getenv('SNAPSHOT_TTL', '3'))  # Seconds an option chain snapshot is reused
+    CHAIN_WINDOW = int(os.getenv('CHAIN_WINDOW', '10'))  # Strikes sent either side of ATM
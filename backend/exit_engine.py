@@ -0,0 +1,132 @@
+"""
+Exit Engine
+Keeps profit target and stop loss levels of open trades in price-sorted heaps
+and fires exits as soon as a price update crosses them
+"""
+
+import heapq
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ExitEngine:
+    """Target/stop-loss book checked on every price update"""
+
+    def __init__(self, on_exit=None):
+        """
+        Initialize exit engine
+
+        Args:
+            on_exit: Callback called as on_exit(trade, reason, price) for every triggered exit
+        """
+        self.on_exit = on_exit
+        self._targets = {}  # token -> min-heap of (target, seq, trade_id)
+        self._stops = {}  # token -> max-heap of (-stop_loss, seq, trade_id)
+        self._trades = {}  # trade_id -> trade dict
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def register(self, trade_id, token, entry_price, quantity, target, stop_loss, **extra):
+        """
+        Register exit levels for an open trade
+
+        Args:
+            trade_id: Trade id in the trades table
+            token: Instrument key the price updates arrive for
+            entry_price: Average entry price
+            quantity: Open quantity
+            target: Price at or above which the trade is closed in profit
+            stop_loss: Price at or below which the trade is closed in loss
+            extra: Any additional fields to hand back to the exit callback
+        """
+        trade = dict(extra)
+        trade.update({
+            'trade_id': trade_id,
+            'token': token,
+            'entry_price': entry_price,
+            'quantity': quantity,
+            'target': target,
+            'stop_loss': stop_loss
+        })
+
+        with self._lock:
+            if trade_id in self._trades:
+                self._discard(trade_id)
+            self._seq += 1
+            trade['_seq'] = self._seq
+            self._trades[trade_id] = trade
+            heapq.heappush(self._targets.setdefault(token, []), (target, self._seq, trade_id))
+            heapq.heappush(self._stops.setdefault(token, []), (-stop_loss, self._seq, trade_id))
+
+        logger.info("Exit levels registered for %s: target %.2f, SL %.2f", token, target, stop_loss)
+        return trade
+
+    def unregister(self, trade_id):
+        """Stop tracking a trade (stale heap entries are dropped lazily)"""
+        with self._lock:
+            return self._discard(trade_id)
+
+    def _discard(self, trade_id):
+        """Drop a trade and the heaps of its token once nothing else uses them"""
+        trade = self._trades.pop(trade_id, None)
+        if trade:
+            token = trade['token']
+            if not any(t['token'] == token for t in self._trades.values()):
+                self._targets.pop(token, None)
+                self._stops.pop(token, None)
+        return trade
+
+    def is_registered(self, trade_id):
+        """Check if a trade is being tracked"""
+        return trade_id in self._trades
+
+    def tokens(self):
+        """Instrument keys that currently have exit levels"""
+        with self._lock:
+            return list(self._targets.keys())
+
+    def open_trades(self):
+        """Snapshot of tracked trades"""
+        with self._lock:
+            return [dict(trade) for trade in self._trades.values()]
+
+    def _pop_triggered(self, heap, crossed, token, reason, triggered):
+        """Pop heap entries whose level has been crossed, skipping stale ones"""
+        while heap and crossed(heap[0][0]):
+            _, seq, trade_id = heapq.heappop(heap)
+            trade = self._trades.get(trade_id)
+            if trade and trade['_seq'] == seq and trade['token'] == token:
+                triggered.append((self._discard(trade_id), reason))
+
+    def on_price(self, token, price):
+        """
+        Check exit levels for a price update
+
+        Args:
+            token: Instrument key
+            price: Latest traded price
+
+        Returns:
+            list: (trade, reason) tuples that were triggered
+        """
+        if price is None or price <= 0:
+            return []
+
+        triggered = []
+        with self._lock:
+            self._pop_triggered(self._targets.get(token), lambda level: level <= price,
+                                token, 'PROFIT_TARGET', triggered)
+            self._pop_triggered(self._stops.get(token), lambda level: -level >= price,
+                                token, 'STOP_LOSS', triggered)
+
+        for trade, reason in triggered:
+            logger.info("Exit triggered for %s: %s at %.2f", token, reason, price)
+            if self.on_exit:
+                try:
+                    self.on_exit(trade, reason, price)
+                except Exception as e:
+                    logger.error("Error in exit callback for %s: %s", token, e)
+
+        return triggered
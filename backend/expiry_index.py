@@ -0,0 +1,77 @@
+"""
+Expiry Index
+Groups a mixed-expiry option chain by expiryDate in a single pass
+"""
+
+from datetime import datetime
+from market_calendar import CALENDAR
+
+
+def parse_expiry(expiry_date):
+    """Parse an NSE expiry string such as '06-Mar-2026' (None if unparsable)"""
+    try:
+        return datetime.strptime(expiry_date, "%d-%b-%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+class ExpiryIndex:
+    """Option chain rows grouped and ordered by expiry"""
+
+    def __init__(self, data):
+        """
+        Build the index
+
+        Args:
+            data: NSE-format option chain (list of strike rows, any mix of expiries)
+        """
+        self.groups = {}
+        for row in data or []:
+            self.groups.setdefault(row.get('expiryDate'), []).append(row)
+
+        self._dates = {expiry: parse_expiry(expiry) for expiry in self.groups}
+        self.expiries = sorted(
+            self.groups,
+            key=lambda expiry: (self._dates[expiry] is None, self._dates[expiry] or datetime.max.date())
+        )
+
+    def __len__(self):
+        return len(self.expiries)
+
+    def get(self, expiry):
+        """Rows of one expiry"""
+        return self.groups.get(expiry, [])
+
+    def active(self, today=None):
+        """Expiries that have not expired yet, nearest first"""
+        today = today if today else CALENDAR.now().date()
+        return [e for e in self.expiries if self._dates[e] is None or self._dates[e] >= today]
+
+    def nearest(self, today=None):
+        """Nearest (weekly) expiry"""
+        active = self.active(today)
+        return active[0] if active else (self.expiries[-1] if self.expiries else None)
+
+    def monthly(self, today=None):
+        """Nearest monthly expiry - the last expiry in the month of the nearest one"""
+        nearest = self.nearest(today)
+        nearest_date = self._dates.get(nearest)
+        if nearest_date is None:
+            return nearest
+
+        same_month = [
+            e for e in self.expiries
+            if self._dates[e] and (self._dates[e].year, self._dates[e].month) == (nearest_date.year, nearest_date.month)
+        ]
+        return same_month[-1]
+
+    def fingerprint(self, expiry):
+        """Cheap change detector for one expiry (strike and OI of every leg)"""
+        return hash(tuple(
+            (
+                row.get('strikePrice', 0),
+                row.get('CE', {}).get('openInterest', 0),
+                row.get('PE', {}).get('openInterest', 0)
+            )
+            for row in self.groups.get(expiry, [])
+        ))
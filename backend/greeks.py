@@ -0,0 +1,249 @@
+"""
+Black-Scholes Greeks and Implied Volatility
+Vectorized over the whole option chain - every CE and PE strike is priced in one NumPy pass
+"""
+
+import logging
+from datetime import datetime
+import numpy as np
+from config import Config
+from market_calendar import CALENDAR, IST
+
+logger = logging.getLogger(__name__)
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+EXPIRY_TIME = CALENDAR.close_time  # Options expire at market close (IST)
+
+
+def norm_pdf(x):
+    """Standard normal density"""
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    """Standard normal CDF (Abramowitz & Stegun 26.2.17, |error| < 7.5e-8)"""
+    t = 1.0 / (1.0 + 0.2316419 * np.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    cdf = 1.0 - norm_pdf(x) * poly
+    return np.where(x >= 0, cdf, 1.0 - cdf)
+
+
+def _d1_d2(spot, strike, t, rate, sigma):
+    """Black-Scholes d1/d2"""
+    vol_sqrt_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * sigma * sigma) * t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def bs_price(spot, strike, t, rate, sigma, is_call):
+    """
+    Black-Scholes price for arrays of options
+
+    Args:
+        spot: Underlying price
+        strike: Strike prices
+        t: Time to expiry in years
+        rate: Risk-free rate (annual, continuous)
+        sigma: Volatility (annual, decimal)
+        is_call: Boolean mask, True for calls
+
+    Returns:
+        ndarray: Option prices
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    discounted = strike * np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - discounted * norm_cdf(d2)
+    put = discounted * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_greeks(spot, strike, t, rate, sigma, is_call):
+    """
+    Black-Scholes Greeks for arrays of options
+
+    Returns:
+        dict: delta, gamma, theta (per calendar day) and vega (per 1 vol point)
+    """
+    d1, d2 = _d1_d2(spot, strike, t, rate, sigma)
+    sqrt_t = np.sqrt(t)
+    pdf_d1 = norm_pdf(d1)
+    discounted = strike * np.exp(-rate * t)
+
+    delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    gamma = pdf_d1 / (spot * sigma * sqrt_t)
+    vega = spot * pdf_d1 * sqrt_t
+    decay = -spot * pdf_d1 * sigma / (2.0 * sqrt_t)
+    theta = np.where(
+        is_call,
+        decay - rate * discounted * norm_cdf(d2),
+        decay + rate * discounted * norm_cdf(-d2)
+    )
+
+    return {
+        'delta': delta,
+        'gamma': gamma,
+        'theta': theta / 365.0,
+        'vega': vega / 100.0
+    }
+
+
+def implied_volatility(price, spot, strike, t, rate, is_call, tol=1e-6, max_iter=50):
+    """
+    Batched implied volatility solver
+
+    Newton steps on every option at once, falling back to bisection inside a
+    per-option bracket wherever Newton would leave it (deep ITM/OTM, tiny vega).
+
+    Returns:
+        ndarray: Implied volatilities, NaN where the price has no solution
+    """
+    price = np.asarray(price, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    spot = np.broadcast_to(np.asarray(spot, dtype=float), price.shape)
+    t = np.broadcast_to(np.asarray(t, dtype=float), price.shape)
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+
+    # Prices outside the no-arbitrage bounds have no implied volatility
+    discounted = strike * np.exp(-rate * t)
+    intrinsic = np.where(is_call, np.maximum(spot - discounted, 0), np.maximum(discounted - spot, 0))
+    upper = np.where(is_call, spot, discounted)
+    valid = (price > intrinsic) & (price < upper) & (t > 0)
+
+    # Brenner-Subrahmanyam initial guess
+    sigma = np.clip(np.sqrt(2.0 * np.pi / np.maximum(t, 1e-12)) * price / spot, 0.05, 2.0)
+    low = np.full(price.shape, MIN_VOL)
+    high = np.full(price.shape, MAX_VOL)
+    active = valid.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+
+        model = bs_price(spot[active], strike[active], t[active], rate, sigma[active], is_call[active])
+        diff = model - price[active]
+        d1, _ = _d1_d2(spot[active], strike[active], t[active], rate, sigma[active])
+        vega = spot[active] * norm_pdf(d1) * np.sqrt(t[active])
+
+        current = sigma[active]
+        low[active] = np.where(diff < 0, current, low[active])
+        high[active] = np.where(diff > 0, current, high[active])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = current - diff / vega
+        bisect = 0.5 * (low[active] + high[active])
+        inside = np.isfinite(newton) & (newton > low[active]) & (newton < high[active])
+        sigma[active] = np.where(inside, newton, bisect)
+
+        done = np.abs(diff) < tol * np.maximum(price[active], 1.0)
+        active[np.flatnonzero(active)[done]] = False
+
+    sigma[~valid] = np.nan
+    return sigma
+
+
+def _ist(now):
+    """IST-aware reference time, whatever the host's timezone"""
+    if now is None:
+        return CALENDAR.now()
+    return now if now.tzinfo else now.replace(tzinfo=IST)
+
+
+def time_to_expiry(expiry_date, now=None):
+    """
+    Year fraction until expiry
+
+    Args:
+        expiry_date: Expiry in NSE format, e.g. '06-Mar-2026'
+        now: Reference datetime, naive ones read as IST (defaults to now)
+
+    Returns:
+        float: Years to expiry (0 once expired)
+    """
+    now = _ist(now)
+    expiry = datetime.strptime(expiry_date, "%d-%b-%Y").replace(
+        hour=EXPIRY_TIME[0], minute=EXPIRY_TIME[1], tzinfo=IST)
+    return max((expiry - now).total_seconds(), 0) / (365.0 * 24 * 3600)
+
+
+def add_greeks(option_chain, spot=None, rate=None, now=None):
+    """
+    Compute IV and Greeks for every CE/PE in an NSE-format option chain
+
+    Uses each row's underlyingValue and expiryDate (as set by NSE or by
+    AngelAPI._build_option_chain_from_spot). Adds iv (decimal, solved from
+    lastPrice, falling back to the quoted impliedVolatility), delta, gamma,
+    theta and vega to copies of the CE/PE dicts - the input rows may be shared
+    with source caches and replay recordings and are left untouched.
+
+    Args:
+        option_chain: List of strike rows
+        spot: Underlying price override
+        rate: Risk-free rate (defaults to Config.RISK_FREE_RATE)
+        now: Reference datetime for time to expiry
+
+    Returns:
+        list: New strike rows with the annotated CE/PE legs
+    """
+    if not option_chain:
+        return option_chain
+    option_chain = [
+        dict(row, **{side: dict(row[side]) for side in ('CE', 'PE') if row.get(side)})
+        for row in option_chain
+    ]
+
+    rate = Config.RISK_FREE_RATE if rate is None else rate
+    now = _ist(now)
+
+    legs = []
+    expiry_years = {}
+    for row in option_chain:
+        expiry = row.get('expiryDate')
+        if expiry not in expiry_years:
+            try:
+                expiry_years[expiry] = time_to_expiry(expiry, now)
+            except (TypeError, ValueError):
+                expiry_years[expiry] = 0.0
+        underlying = spot if spot else row.get('underlyingValue', 0)
+        for side in ('CE', 'PE'):
+            leg = row.get(side)
+            if leg:
+                legs.append((leg, side == 'CE', row.get('strikePrice', 0), underlying, expiry_years[expiry]))
+
+    if not legs:
+        return option_chain
+
+    is_call = np.array([leg[1] for leg in legs], dtype=bool)
+    strike = np.array([leg[2] for leg in legs], dtype=float)
+    underlying = np.array([leg[3] or 0 for leg in legs], dtype=float)
+    t = np.array([leg[4] for leg in legs], dtype=float)
+    price = np.array([leg[0].get('lastPrice') or 0 for leg in legs], dtype=float)
+    quoted_iv = np.array([leg[0].get('impliedVolatility') or 0 for leg in legs], dtype=float) / 100.0
+
+    usable = (underlying > 0) & (strike > 0) & (t > 0)
+    if not usable.any():
+        return option_chain
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        solved = np.full(len(legs), np.nan)
+        solved[usable] = implied_volatility(
+            price[usable], underlying[usable], strike[usable], t[usable], rate, is_call[usable]
+        )
+        iv = np.where(np.isfinite(solved), solved, quoted_iv)
+        priced = usable & (iv > 0)
+        greeks = {name: np.full(len(legs), np.nan) for name in ('delta', 'gamma', 'theta', 'vega')}
+        computed = bs_greeks(underlying[priced], strike[priced], t[priced], rate, iv[priced], is_call[priced])
+        for name, values in computed.items():
+            greeks[name][priced] = values
+
+    for i, (leg, *_rest) in enumerate(legs):
+        if not priced[i]:
+            continue
+        leg['iv'] = round(float(iv[i]), 4)
+        leg['delta'] = round(float(greeks['delta'][i]), 4)
+        leg['gamma'] = round(float(greeks['gamma'][i]), 6)
+        leg['theta'] = round(float(greeks['theta'][i]), 2)
+        leg['vega'] = round(float(greeks['vega'][i]), 2)
+
+    return option_chain
@@ -4,11 +4,16 @@ import os
 # Bind to PORT provided by cloud platform (Render, Heroku, etc.)
 bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 
-# Worker processes
-workers = 2
+# Worker class - gevent lets a worker serve many dashboards while requests wait
+# on NSE/SmartAPI, instead of one blocked request per worker ("sync" still works)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
 
-# Worker class
-worker_class = "sync"
+# Concurrent connections per gevent worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Worker processes - trading state lives in process memory, so one cooperative
+# worker keeps every dashboard on the same state
+workers = int(os.environ.get('WEB_CONCURRENCY', '1' if worker_class == 'gevent' else '2'))
 
 # Timeout
 timeout = 120
@@ -21,3 +26,9 @@ errorlog = "-"
 
 # Log level
 loglevel = "info"
+
+
+def post_worker_init(worker):
+    """Start background tasks inside each worker (after gevent patching)"""
+    from app import start_background_tasks
+    start_background_tasks()
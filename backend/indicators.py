@@ -0,0 +1,376 @@
+"""
+Streaming Technical Indicators
+EMA, RSI, VWAP, ATR and SuperTrend with constant-size state - each new bar (or
+tick) is an O(1) update, and warm_up() seeds the state from history in one
+vectorized NumPy pass instead of replaying every bar
+"""
+
+import numpy as np
+
+# Bars to fetch for the indicators: several times the slowest period (EMA 21),
+# so the SMA seed has decayed and the Wilder averages have converged
+WARM_UP_BARS = 100
+
+
+def _smooth(values, alpha, seed):
+    """
+    Final value of s += alpha * (x - s) over values, starting from seed
+
+    Closed form of the recursion (seed * decay^n + alpha * sum(decay^(n-1-i) * x_i)),
+    so a long history costs one dot product.
+    """
+    n = len(values)
+    if n == 0:
+        return float(seed)
+    decay = 1.0 - alpha
+    weights = decay ** np.arange(n - 1, -1, -1, dtype=float)
+    return float(seed * decay ** n + alpha * np.dot(weights, values))
+
+
+class EMA:
+    """Exponential moving average, seeded with the SMA of the first period values"""
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, x):
+        if self.value is None:
+            self._count += 1
+            self._sum += x
+            if self._count == self.period:
+                self.value = self._sum / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def peek(self, x):
+        """Value if the current bar closed at x (state unchanged)"""
+        return None if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def warm_up(self, values):
+        """Replace the state with one seeded from history"""
+        values = np.asarray(values, dtype=float)
+        self.__init__(self.period)
+        if len(values) < self.period:
+            for x in values:
+                self.update(float(x))
+            return self.value
+        self._count = self.period
+        self.value = _smooth(values[self.period:], self.alpha, values[:self.period].mean())
+        return self.value
+
+
+class RSI:
+    """Relative Strength Index with Wilder smoothing"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self.prev_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self._count = 0
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return None
+        change = close - self.prev_close
+        self.prev_close = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+
+        if self.avg_gain is None:
+            self._count += 1
+            self._gain_sum += gain
+            self._loss_sum += loss
+            if self._count < self.period:
+                return None
+            self.avg_gain = self._gain_sum / self.period
+            self.avg_loss = self._loss_sum / self.period
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.period
+            self.avg_loss += (loss - self.avg_loss) / self.period
+        self.value = self._rsi(self.avg_gain, self.avg_loss)
+        return self.value
+
+    def peek(self, close):
+        """Value if the current bar closed at close (state unchanged)"""
+        if self.avg_gain is None:
+            return None
+        change = close - self.prev_close
+        avg_gain = self.avg_gain + (max(change, 0.0) - self.avg_gain) / self.period
+        avg_loss = self.avg_loss + (max(-change, 0.0) - self.avg_loss) / self.period
+        return self._rsi(avg_gain, avg_loss)
+
+    def warm_up(self, closes):
+        """Replace the state with one seeded from history"""
+        closes = np.asarray(closes, dtype=float)
+        self.__init__(self.period)
+        if len(closes) <= self.period:
+            for close in closes:
+                self.update(float(close))
+            return self.value
+        changes = np.diff(closes)
+        gains = np.clip(changes, 0.0, None)
+        losses = np.clip(-changes, 0.0, None)
+        alpha = 1.0 / self.period
+        self.avg_gain = _smooth(gains[self.period:], alpha, gains[:self.period].mean())
+        self.avg_loss = _smooth(losses[self.period:], alpha, losses[:self.period].mean())
+        self._count = self.period
+        self.prev_close = float(closes[-1])
+        self.value = self._rsi(self.avg_gain, self.avg_loss)
+        return self.value
+
+
+class ATR:
+    """Average True Range with Wilder smoothing"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self.prev_close = None
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        if self.value is None:
+            self._count += 1
+            self._sum += true_range
+            if self._count == self.period:
+                self.value = self._sum / self.period
+        else:
+            self.value += (true_range - self.value) / self.period
+        return self.value
+
+    def warm_up(self, highs, lows, closes):
+        """Replace the state with one seeded from history"""
+        highs = np.asarray(highs, dtype=float)
+        lows = np.asarray(lows, dtype=float)
+        closes = np.asarray(closes, dtype=float)
+        self.__init__(self.period)
+        if len(closes) < self.period:
+            for high, low, close in zip(highs, lows, closes):
+                self.update(float(high), float(low), float(close))
+            return self.value
+        prev = closes[:-1]
+        true_range = np.empty(len(closes))
+        true_range[0] = highs[0] - lows[0]
+        true_range[1:] = np.maximum.reduce([highs[1:] - lows[1:], np.abs(highs[1:] - prev), np.abs(lows[1:] - prev)])
+        self._count = self.period
+        self.prev_close = float(closes[-1])
+        self.value = _smooth(true_range[self.period:], 1.0 / self.period, true_range[:self.period].mean())
+        return self.value
+
+
+class VWAP:
+    """Volume-weighted average price, reset at every new session (trading day)"""
+
+    def __init__(self):
+        self.value = None
+        self.session = None
+        self._pv = 0.0
+        self._volume = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, price, volume, session=None):
+        """Add a bar (typical price) or a tick (traded price) with its volume"""
+        if session != self.session:
+            self.__init__()
+            self.session = session
+        if volume > 0:
+            self._pv += price * volume
+            self._volume += volume
+            self.value = self._pv / self._volume
+        return self.value
+
+    def warm_up(self, prices, volumes, sessions):
+        """Replace the state with the last session's bars"""
+        self.__init__()
+        if len(prices) == 0:
+            return None
+        start = len(sessions) - 1
+        while start > 0 and sessions[start - 1] == sessions[-1]:
+            start -= 1
+        prices = np.asarray(prices[start:], dtype=float)
+        volumes = np.asarray(volumes[start:], dtype=float)
+        self.session = sessions[-1]
+        self._pv = float(np.dot(prices, volumes))
+        self._volume = float(volumes.sum())
+        self.value = self._pv / self._volume if self._volume > 0 else None
+        return self.value
+
+
+class SuperTrend:
+    """ATR band trend follower: direction 1 (up, value = support) or -1 (down, value = resistance)"""
+
+    def __init__(self, period=10, multiplier=3.0):
+        self.period = period
+        self.multiplier = multiplier
+        self.atr = ATR(period)
+        self.value = None
+        self.direction = None
+        self.upper = None
+        self.lower = None
+        self.prev_close = None
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, high, low, close):
+        atr = self.atr.update(high, low, close)
+        prev_close, self.prev_close = self.prev_close, close
+        if atr is None:
+            return None
+
+        mid = (high + low) / 2
+        upper = mid + self.multiplier * atr
+        lower = mid - self.multiplier * atr
+        # Bands only tighten while price stays inside them
+        if self.upper is not None and upper > self.upper and prev_close <= self.upper:
+            upper = self.upper
+        if self.lower is not None and lower < self.lower and prev_close >= self.lower:
+            lower = self.lower
+        self.upper, self.lower = upper, lower
+
+        if self.direction is None:
+            self.direction = 1 if close >= mid else -1
+        elif self.direction == 1 and close < lower:
+            self.direction = -1
+        elif self.direction == -1 and close > upper:
+            self.direction = 1
+        self.value = lower if self.direction == 1 else upper
+        return self.value
+
+    def warm_up(self, highs, lows, closes):
+        """
+        Replace the state with one built from history
+
+        The band recursion depends on every previous bar, so unlike the other
+        indicators this replays the bars (still O(1) each).
+        """
+        self.__init__(self.period, self.multiplier)
+        for high, low, close in zip(highs, lows, closes):
+            self.update(float(high), float(low), float(close))
+        return self.value
+
+
+class IndicatorSet:
+    """The indicators used by the candle prediction, fed with SmartAPI candles"""
+
+    def __init__(self, fast=9, slow=21, rsi=14, atr=14, supertrend=10, multiplier=3.0):
+        self.ema_fast = EMA(fast)
+        self.ema_slow = EMA(slow)
+        self.rsi = RSI(rsi)
+        self.atr = ATR(atr)
+        self.vwap = VWAP()
+        self.supertrend = SuperTrend(supertrend, multiplier)
+        self.last_timestamp = None
+
+    def warm_up(self, candles):
+        """Seed every indicator from candles [timestamp, open, high, low, close, volume]"""
+        if not candles:
+            return
+        bars = np.array([c[1:6] for c in candles], dtype=float)
+        highs, lows, closes, volumes = bars[:, 1], bars[:, 2], bars[:, 3], bars[:, 4]
+        self.ema_fast.warm_up(closes)
+        self.ema_slow.warm_up(closes)
+        self.rsi.warm_up(closes)
+        self.atr.warm_up(highs, lows, closes)
+        self.vwap.warm_up((highs + lows + closes) / 3, volumes, [str(c[0])[:10] for c in candles])
+        self.supertrend.warm_up(highs, lows, closes)
+        self.last_timestamp = candles[-1][0]
+
+    def update(self, candle):
+        """Add one closed bar in O(1)"""
+        _, _, high, low, close, volume = candle[:6]
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.rsi.update(close)
+        self.atr.update(high, low, close)
+        self.vwap.update((high + low + close) / 3, volume, str(candle[0])[:10])
+        self.supertrend.update(high, low, close)
+        self.last_timestamp = candle[0]
+
+    def on_candles(self, candles, forming=False):
+        """
+        Warm up on the first call, then add only closed bars newer than the last one seen
+
+        Args:
+            candles: SmartAPI candles, oldest first
+            forming: The last candle is still forming - it is never folded into
+                     the state (its close is not final), only peeked at by snapshot()
+
+        Returns:
+            dict: snapshot()
+        """
+        live = candles[-1] if candles and forming else None
+        closed = candles[:-1] if live is not None else candles
+        if closed:
+            if self.last_timestamp is None:
+                self.warm_up(closed)
+            else:
+                for candle in closed:
+                    if candle[0] > self.last_timestamp:
+                        self.update(candle)
+        return self.snapshot(live)
+
+    def snapshot(self, live=None):
+        """
+        Current values (None until an indicator has enough bars)
+
+        Args:
+            live: Forming candle - EMAs and RSI are shown as if it closed at its
+                  current price, without changing their state
+        """
+        def value(indicator, digits=2):
+            return round(indicator.value, digits) if indicator.value is not None else None
+
+        def peeked(indicator, digits=2):
+            if live is None or not indicator.ready:
+                return value(indicator, digits)
+            return round(indicator.peek(float(live[4])), digits)
+
+        return {
+            'ema_fast': peeked(self.ema_fast),
+            'ema_slow': peeked(self.ema_slow),
+            'rsi': peeked(self.rsi),
+            'atr': value(self.atr),
+            'vwap': value(self.vwap),
+            'supertrend': value(self.supertrend),
+            'supertrend_direction': self.supertrend.direction if self.supertrend.ready else None
+        }
@@ -0,0 +1,322 @@
+"""
+API Load Test
+Starts the Flask app under gunicorn with stubbed broker and option chain
+backends (configurable latency), drives the dashboard's polling mix at
+increasing concurrency and reports throughput, latency percentiles and errors.
+
+Usage:
+    python load_test.py                                   # gunicorn, 2 sync workers
+    python load_test.py --workers 4 --concurrency 10,50,100 --duration 30
+    python load_test.py --interval 0                      # closed loop, no think time
+    python load_test.py --url http://host:5000            # an already running server
+
+The stubbed app can also be served directly:
+    LOAD_TEST_CHAIN_LATENCY_MS=300 gunicorn -c gunicorn_config.py 'load_test:stub_app()'
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from benchmarks import make_candles, make_chain
+from option_chain import OptionChain
+from paper_broker import PaperBroker
+
+# Dashboard polling (frontend/script.js): positions, option chain and market
+# data every 5s, trade history every 10s
+POLL_MIX = [
+    ('/api/positions', 1),
+    ('/api/option-chain/{symbol}', 1),
+    ('/api/market-data', 1),
+    ('/api/trade-history', 2),  # every 2nd cycle
+]
+
+
+class StubBroker(PaperBroker):
+    """Paper broker that sleeps like a remote API and serves generated candles"""
+
+    def __init__(self, call_latency_ms=0, underlying_value=21850):
+        super().__init__(latency_ms=0, slippage_bps=0)
+        self.call_latency = call_latency_ms / 1000
+        self.underlying_value = underlying_value
+        self._candles = make_candles(500, start_price=underlying_value)
+
+    def _wait(self):
+        if self.call_latency:
+            time.sleep(self.call_latency)
+
+    def get_ltp(self, symbol="NIFTY BANK"):
+        self._wait()
+        price = super().get_ltp(symbol)
+        return price if price is not None else self.underlying_value
+
+    def get_candle_data(self, symbol="NIFTY", interval="FIFTEEN_MINUTE", count=10):
+        self._wait()
+        return self._candles[-count:]
+
+    def get_option_chain(self, symbol="NIFTY", strike_count=20):
+        # Force the strategy onto the (stubbed) NSE scraper path
+        self._wait()
+        return None
+
+    def get_quotes(self, instruments, mode='LTP'):
+        self._wait()
+        return super().get_quotes(instruments, mode)
+
+    def get_positions(self):
+        self._wait()
+        return super().get_positions()
+
+    def place_order(self, symbol, qty, order_type="BUY", symboltoken=None):
+        self._wait()
+        return super().place_order(symbol, qty, order_type, symboltoken)
+
+
+class StubOptionChain(OptionChain):
+    """Option chain scraper that sleeps like NSE and returns a generated chain"""
+
+    def __init__(self, fetch_latency_ms=0, strikes=200):
+        super().__init__()
+        self.fetch_latency = fetch_latency_ms / 1000
+        self._chains = {}
+        self.strikes = strikes
+
+    def get_live_data(self, symbol="NIFTY"):
+        if self.fetch_latency:
+            time.sleep(self.fetch_latency)
+        chain = self._chains.get(symbol)
+        if chain is None:
+            chain = self._chains[symbol] = make_chain(self.strikes)
+        return chain
+
+
+def stub_app(broker_latency_ms=None, chain_latency_ms=None, strikes=None):
+    """
+    Flask app wired to stubbed backends (gunicorn factory)
+
+    Latencies and chain size default to LOAD_TEST_BROKER_LATENCY_MS,
+    LOAD_TEST_CHAIN_LATENCY_MS and LOAD_TEST_STRIKES.
+    """
+    from config import Config
+
+    if broker_latency_ms is None:
+        broker_latency_ms = float(os.getenv('LOAD_TEST_BROKER_LATENCY_MS', '50'))
+    if chain_latency_ms is None:
+        chain_latency_ms = float(os.getenv('LOAD_TEST_CHAIN_LATENCY_MS', '300'))
+    if strikes is None:
+        strikes = int(os.getenv('LOAD_TEST_STRIKES', '200'))
+
+    # Never touch Angel One or the real trades database
+    Config.PAPER_TRADING = True
+    Config.DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix='nif-load-'), 'trades.db')
+    Config.RECORD_SESSION_PATH = ''
+
+    import app as app_module
+
+    strategy = app_module.strategy
+    strategy.angel = StubBroker(broker_latency_ms)
+    strategy.oc = StubOptionChain(chain_latency_ms, strikes)
+    strategy.db_path = Config.DATABASE_PATH
+    strategy._init_database()
+    strategy.angel.login()
+
+    # A couple of open positions and trades so every endpoint returns real payloads
+    for i, strike in enumerate((21800, 21900)):
+        symbol = f"NIFTY{strike}{'CE' if i == 0 else 'PE'}"
+        strategy.angel.set_price(symbol, 120 + i * 10)
+        strategy.angel.place_order(symbol, Config.DEFAULT_QUANTITY, "BUY")
+    for i in range(50):
+        strategy._save_trade({
+            'timestamp': datetime.now().isoformat(),
+            'symbol': f"NIFTY{21500 + i * 50}CE",
+            'strike': 21500 + i * 50,
+            'option_type': 'CALL',
+            'entry_price': 100 + i,
+            'exit_price': None,
+            'quantity': Config.DEFAULT_QUANTITY,
+            'side': 'BUY',
+            'status': 'OPEN',
+            'order_id': f"LOAD{i}"
+        })
+
+    app_module.state.start(Config.DEFAULT_SYMBOL)
+    app_module.state.set_market_data(strategy.analyze_market(Config.DEFAULT_SYMBOL))
+    return app_module.app
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Dashboard(threading.Thread):
+    """One browser tab polling the API like frontend/script.js"""
+
+    def __init__(self, base_url, symbol, interval, stop_at, results):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.symbol = symbol
+        self.interval = interval
+        self.stop_at = stop_at
+        self.results = results  # shared list of (path, seconds, ok)
+        self.session = requests.Session()
+
+    def run(self):
+        cycle = 0
+        while time.time() < self.stop_at:
+            cycle_started = time.time()
+            for path, every in POLL_MIX:
+                if cycle % every:
+                    continue
+                self._get(path.format(symbol=self.symbol))
+            cycle += 1
+
+            remaining = self.interval - (time.time() - cycle_started)
+            if remaining > 0:
+                time.sleep(min(remaining, max(0, self.stop_at - time.time())))
+
+    def _get(self, path):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.base_url + path, timeout=30)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        self.results.append((path, time.perf_counter() - started, ok))
+
+
+def run_stage(base_url, concurrency, duration, interval, symbol):
+    """Run `concurrency` dashboards for `duration` seconds and summarize"""
+    results = []
+    stop_at = time.time() + duration
+    # Stagger start-up so dashboards do not poll in lockstep
+    dashboards = [Dashboard(base_url, symbol, interval, stop_at, results) for _ in range(concurrency)]
+    for dashboard in dashboards:
+        dashboard.start()
+        if interval:
+            time.sleep(min(interval / concurrency, 0.05))
+    for dashboard in dashboards:
+        dashboard.join(timeout=duration + 60)
+
+    def summary(rows):
+        latencies = sorted(seconds for _, seconds, _ in rows)
+        errors = sum(1 for _, _, ok in rows if not ok)
+        return {
+            'requests': len(rows),
+            'throughput': round(len(rows) / duration, 2),
+            'error_rate': round(errors / len(rows), 4) if rows else 0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if rows else None,
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if rows else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if rows else None
+        }
+
+    stage = {'concurrency': concurrency, **summary(results), 'endpoints': {}}
+    for path in sorted({path for path, _, _ in results}):
+        stage['endpoints'][path] = summary([row for row in results if row[0] == path])
+    return stage
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    """Start gunicorn with the stubbed app and wait until it answers"""
+    port = free_port()
+    env = dict(os.environ,
+               LOAD_TEST_BROKER_LATENCY_MS=str(args.broker_latency),
+               LOAD_TEST_CHAIN_LATENCY_MS=str(args.chain_latency),
+               LOAD_TEST_STRIKES=str(args.strikes),
+               LOG_LEVEL='WARNING')
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py',
+               '-b', f'127.0.0.1:{port}', '-w', str(args.workers), '-k', args.worker_class,
+               '--access-logfile', '/dev/null', 'load_test:stub_app()']
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+        try:
+            if requests.get(base_url + '/api/market-data', timeout=2).status_code == 200:
+                return server, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+
+    server.terminate()
+    raise RuntimeError("gunicorn did not become ready within 60s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the dashboard API with stubbed backends')
+    parser.add_argument('--url', help='Test an already running server instead of starting gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (default 2)')
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class (default sync)')
+    parser.add_argument('--concurrency', default='1,5,10,25,50',
+                        help='Comma-separated dashboard counts, one stage each')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per stage')
+    parser.add_argument('--interval', type=float, default=5,
+                        help='Seconds between polling cycles per dashboard (0 = closed loop)')
+    parser.add_argument('--symbol', default='NIFTY')
+    parser.add_argument('--broker-latency', type=float, default=50, help='Stub broker call latency (ms)')
+    parser.add_argument('--chain-latency', type=float, default=300, help='Stub NSE fetch latency (ms)')
+    parser.add_argument('--strikes', type=int, default=200, help='Strikes in the generated chain')
+    parser.add_argument('--output', help='Write JSON results here')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url.rstrip('/') if args.url else None
+    if not base_url:
+        server, base_url = start_server(args)
+        print(f"gunicorn: {args.workers} x {args.worker_class} on {base_url} "
+              f"(broker {args.broker_latency}ms, chain {args.chain_latency}ms, {args.strikes} strikes)")
+
+    stages = []
+    try:
+        print(f"{'dashboards':>10} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}")
+        for concurrency in [int(c) for c in args.concurrency.split(',') if c.strip()]:
+            stage = run_stage(base_url, concurrency, args.duration, args.interval, args.symbol)
+            stages.append(stage)
+            print(f"{concurrency:>10} {stage['throughput']:>8} {stage['p50_ms'] or 0:>9} "
+                  f"{stage['p95_ms'] or 0:>9} {stage['p99_ms'] or 0:>9} {stage['error_rate']:>8.2%}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'url': args.url,
+            'workers': None if args.url else args.workers,
+            'worker_class': None if args.url else args.worker_class,
+            'broker_latency_ms': args.broker_latency,
+            'chain_latency_ms': args.chain_latency,
+            'strikes': args.strikes,
+            'duration': args.duration,
+            'interval': args.interval,
+            'stages': stages
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
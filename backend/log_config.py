@@ -0,0 +1,135 @@
+"""
+Logging Pipeline
+Non-blocking structured logging - callers only enqueue records, a background
+listener formats them as JSON and writes them to stdout
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from config import Config
+
+# Attributes every LogRecord has - anything else was passed via extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Let through 1 in N records below WARNING for high-frequency loggers"""
+
+    def __init__(self, rates):
+        """
+        Args:
+            rates: Mapping of logger name to N (e.g. {'angel_api': 10})
+        """
+        super().__init__()
+        self.rates = {name: rate for name, rate in rates.items() if rate > 1}
+        self._counters = {name: itertools.count() for name in self.rates}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rates.get(record.name)
+        if not rate:
+            return True
+        return next(self._counters[record.name]) % rate == 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks or formats on the caller's thread"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener runs in this process, so the record does not need to be
+        # made picklable - message formatting is deferred to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(spec):
+    """Parse 'angel_api=10,option_chain=5' into a dict"""
+    rates = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, rate = item.split('=', 1)
+            try:
+                rates[name.strip()] = int(rate)
+            except ValueError:
+                pass
+    return rates
+
+
+def setup_logging(level=None, json_format=None, sample_rates=None):
+    """
+    Route all logging through a bounded queue and a background listener
+
+    Safe to call more than once - later calls are ignored.
+
+    Args:
+        level: Root log level name (defaults to Config.LOG_LEVEL)
+        json_format: Write JSON lines instead of plain text (defaults to Config.LOG_FORMAT)
+        sample_rates: Per-logger 1-in-N sampling below WARNING (defaults to Config.LOG_SAMPLE)
+    """
+    global _listener
+
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        level = level or Config.LOG_LEVEL
+        json_format = Config.LOG_FORMAT == 'json' if json_format is None else json_format
+        sample_rates = parse_sample_rates(Config.LOG_SAMPLE) if sample_rates is None else sample_rates
+
+        stream = logging.StreamHandler(sys.stdout)
+        if json_format:
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(sample_rates))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
@@ -0,0 +1,229 @@
+"""
+NSE Market Calendar
+Trading days, session hours and expiries in IST, so background jobs and
+fetchers can skip nights, weekends and exchange holidays and candle requests
+can look back far enough to cover them
+"""
+
+import math
+import time
+from datetime import date, datetime, timedelta, timezone
+from config import Config
+
+IST = timezone(timedelta(hours=5, minutes=30))  # No daylight saving, so a fixed offset is exact
+
+# SmartAPI candle interval -> bar length in minutes (None = one bar per session)
+INTERVAL_MINUTES = {
+    'ONE_MINUTE': 1,
+    'THREE_MINUTE': 3,
+    'FIVE_MINUTE': 5,
+    'TEN_MINUTE': 10,
+    'FIFTEEN_MINUTE': 15,
+    'THIRTY_MINUTE': 30,
+    'ONE_HOUR': 60,
+    'ONE_DAY': None
+}
+
+
+def parse_time(value):
+    """'09:15' -> (9, 15)"""
+    hours, minutes = value.split(':', 1)
+    return int(hours), int(minutes)
+
+
+def parse_holidays(spec):
+    """'2026-01-26,2026-03-03' -> {date(2026, 1, 26), date(2026, 3, 3)}"""
+    return {date.fromisoformat(part.strip()) for part in spec.split(',') if part.strip()}
+
+
+class MarketCalendar:
+    """Regular NSE sessions: weekdays except holidays, open to close IST"""
+
+    def __init__(self, open_time=None, close_time=None, holidays=None, expiry_weekday=None):
+        """
+        Args:
+            open_time: Session open 'HH:MM' IST (default Config.MARKET_OPEN)
+            close_time: Session close 'HH:MM' IST (default Config.MARKET_CLOSE)
+            holidays: Exchange holidays, dates or a comma-separated string
+                      (default Config.MARKET_HOLIDAYS)
+            expiry_weekday: Index option expiry day, 0 = Monday (default Config.EXPIRY_WEEKDAY)
+        """
+        self.open_time = parse_time(open_time or Config.MARKET_OPEN)
+        self.close_time = parse_time(close_time or Config.MARKET_CLOSE)
+        holidays = Config.MARKET_HOLIDAYS if holidays is None else holidays
+        self.holidays = parse_holidays(holidays) if isinstance(holidays, str) else set(holidays)
+        self.expiry_weekday = Config.EXPIRY_WEEKDAY if expiry_weekday is None else expiry_weekday
+        self.session_minutes = (self.close_time[0] * 60 + self.close_time[1]
+                                - self.open_time[0] * 60 - self.open_time[1])
+
+    def now(self, ts=None):
+        """Current (or ts) time as an IST datetime"""
+        return datetime.fromtimestamp(time.time() if ts is None else ts, IST)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day):
+        """(open_ts, close_ts) of a trading day, None on weekends and holidays"""
+        if not self.is_trading_day(day):
+            return None
+        start = datetime(day.year, day.month, day.day, *self.open_time, tzinfo=IST)
+        end = datetime(day.year, day.month, day.day, *self.close_time, tzinfo=IST)
+        return start.timestamp(), end.timestamp()
+
+    def sessions(self, ts=None, days=366):
+        """Sessions from the day of ts (default now) onwards, as (open_ts, close_ts)"""
+        day = self.now(ts).date()
+        for _ in range(days):
+            bounds = self.session(day)
+            if bounds:
+                yield bounds
+            day += timedelta(days=1)
+
+    def recent_sessions(self, ts=None, days=366):
+        """Sessions that have opened by ts (default now), latest first"""
+        ts = time.time() if ts is None else ts
+        day = self.now(ts).date()
+        for _ in range(days):
+            bounds = self.session(day)
+            if bounds and bounds[0] <= ts:
+                yield bounds
+            day -= timedelta(days=1)
+
+    def last_close(self, ts=None):
+        """Timestamp of the latest session close at or before ts (0 if none)"""
+        ts = time.time() if ts is None else ts
+        for start, end in self.recent_sessions(ts):
+            if end <= ts:
+                return end
+        return 0
+
+    def is_open(self, ts=None):
+        """Whether the market is in session at ts (default now)"""
+        ts = time.time() if ts is None else ts
+        bounds = self.session(self.now(ts).date())
+        return bool(bounds) and bounds[0] <= ts <= bounds[1]
+
+    def next_open(self, ts=None):
+        """Timestamp of the next session open after ts (ts itself if it is in session)"""
+        ts = time.time() if ts is None else ts
+        for start, end in self.sessions(ts):
+            if ts <= end:
+                return max(start, ts)
+        return None
+
+    def bar_closed(self, start, minutes, ts=None):
+        """
+        Whether a candle has closed by ts (default now)
+
+        Args:
+            start: Bar start, a datetime or SmartAPI timestamp like 2026-01-05T09:15:00+05:30
+            minutes: Bar length (None = one bar per session)
+            ts: Timestamp
+        """
+        ts = time.time() if ts is None else ts
+        start = start if isinstance(start, datetime) else datetime.fromisoformat(str(start))
+        start = start if start.tzinfo else start.replace(tzinfo=IST)
+        close = datetime(start.year, start.month, start.day, *self.close_time, tzinfo=IST)
+        end = min(start + timedelta(minutes=minutes), close) if minutes else close
+        return end.timestamp() <= ts
+
+    def _shift_to_trading_day(self, day):
+        """Expiries falling on a holiday move to the previous trading day"""
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def expiry(self, ts=None, monthly=False):
+        """
+        Next index option expiry that has not closed by ts (default now)
+
+        Args:
+            ts: Timestamp
+            monthly: Monthly expiry (last expiry weekday of the month) instead of weekly
+
+        Returns:
+            date: Expiry date, moved earlier when it falls on a holiday
+        """
+        ts = time.time() if ts is None else ts
+        today = self.now(ts).date()
+        month = (today.year, today.month)
+        nominal = today + timedelta(days=(self.expiry_weekday - today.weekday()) % 7)
+        for _ in range(60):
+            if monthly:
+                year, mon = month
+                last = date(year + mon // 12, mon % 12 + 1, 1) - timedelta(days=1)
+                nominal = last - timedelta(days=(last.weekday() - self.expiry_weekday) % 7)
+            day = self._shift_to_trading_day(nominal)
+            bounds = self.session(day)
+            if day > today or (day == today and ts <= bounds[1]):
+                return day
+            if monthly:
+                month = (month[0] + month[1] // 12, month[1] % 12 + 1)
+            else:
+                nominal += timedelta(days=7)
+        return None
+
+    def candle_window(self, interval, count, ts=None):
+        """
+        (from, to) IST datetimes for a candle request covering `count` bars
+
+        Counts back whole sessions, so Mondays, holidays and pre-open requests
+        still return the previous sessions' bars; one extra session covers a
+        partial current session.
+        """
+        ts = time.time() if ts is None else ts
+        minutes = INTERVAL_MINUTES.get(interval)
+        per_session = math.ceil(self.session_minutes / minutes) if minutes else 1
+        wanted = math.ceil(count / per_session) + 1
+
+        sessions = []
+        for bounds in self.recent_sessions(ts):
+            sessions.append(bounds)
+            if len(sessions) == wanted:
+                break
+        if not sessions:
+            return self.now(ts - 86400), self.now(ts)
+        return self.now(sessions[-1][0]), self.now(min(ts, sessions[0][1]))
+
+
+class ClosedMarketCache:
+    """
+    Data fetched after the last session close, reused until the next open
+
+    Option chains and candles do not change while the market is closed, so one
+    fetch after the close serves every caller until the next session.
+    """
+
+    def __init__(self, calendar=None, enabled=None, clock=time.time):
+        """
+        Args:
+            calendar: MarketCalendar
+            enabled: Reuse data off-hours (default Config.MARKET_HOURS_ONLY)
+            clock: Wall-clock time source
+        """
+        self.calendar = calendar or CALENDAR
+        self.enabled = Config.MARKET_HOURS_ONLY if enabled is None else enabled
+        self.clock = clock
+        self._entries = {}  # key -> (fetched_at, value)
+
+    def get(self, key):
+        """Cached value while the market is closed (None in session or if not fetched since the close)"""
+        if not self.enabled:
+            return None
+        now = self.clock()
+        if self.calendar.is_open(now):
+            return None
+        entry = self._entries.get(key)
+        if entry and entry[0] >= self.calendar.last_close(now):
+            return entry[1]
+        return None
+
+    def put(self, key, value):
+        """Keep a value fetched while the market is closed"""
+        if self.enabled and value and not self.calendar.is_open(self.clock()):
+            self._entries[key] = (self.clock(), value)
+        return value
+
+
+CALENDAR = MarketCalendar()
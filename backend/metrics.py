@@ -0,0 +1,211 @@
+"""
+Hot-path Metrics
+Low-overhead counters and fixed-bucket latency histograms, exported in
+Prometheus text format from /api/metrics
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds - covers in-memory analytics (sub-ms) up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Increment the counter for a label set"""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Current value for a label set"""
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        """Prometheus text lines"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-size latency histogram with labels (constant memory per label set)"""
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation"""
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, **labels):
+        """Number of observations for a label set"""
+        series = self._series.get(_label_key(labels))
+        return sum(series[0]) if series else 0
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile by interpolating inside its bucket"""
+        return self._quantile(self._series.get(_label_key(labels)), q)
+
+    def _quantile(self, series, q):
+        if not series:
+            return None
+        counts = series[0]
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self):
+        """Prometheus text lines, plus p50/p90/p99 estimates as a gauge family"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        quantiles = [f"# HELP {self.name}_quantile Estimated quantiles of {self.name}",
+                     f"# TYPE {self.name}_quantile gauge"]
+
+        with self._lock:
+            series = {key: ([*s[0]], s[1]) for key, s in self._series.items()}
+
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+
+            for q in (0.5, 0.9, 0.99):
+                value = self._quantile((counts, total), q)
+                quantiles.append(f"{self.name}_quantile{_format_labels(key, [('quantile', q)])} {value:.6f}")
+
+        return lines + quantiles
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, description):
+        metric = Counter(name, description)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, description, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Full Prometheus exposition text"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    'nif_stage_latency_seconds', 'Latency of each analyze_market stage')
+UPSTREAM_CALLS = REGISTRY.counter(
+    'nif_upstream_calls_total', 'Upstream data/broker calls by source, endpoint and result')
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    'nif_upstream_latency_seconds', 'Upstream call latency by source and endpoint')
+CACHE_REQUESTS = REGISTRY.counter(
+    'nif_cache_requests_total', 'Cache lookups by cache and result (hit/miss)')
+ORDER_LATENCY = REGISTRY.histogram(
+    'nif_order_latency_seconds', 'Order placement round-trip latency by broker')
+BREAKER_TRANSITIONS = REGISTRY.counter(
+    'nif_breaker_transitions_total', 'Circuit breaker state changes by breaker and new state')
+SESSION_EVENTS = REGISTRY.counter(
+    'nif_session_events_total', 'Broker session logins, token refreshes and rejected tokens by result')
+SOURCE_RESULTS = REGISTRY.counter(
+    'nif_source_results_total', 'Hedged source fetch outcomes by selector, source and result (won/failed/hedged)')
+ALERTS = REGISTRY.counter(
+    'nif_alerts_total', 'Alerts by kind and result (sent/debounced)')
+ALERT_DELIVERIES = REGISTRY.counter(
+    'nif_alert_deliveries_total', 'Alert deliveries by sink and result (ok/failed/dropped)')
+SCHEDULER_RUNS = REGISTRY.counter(
+    'nif_scheduler_runs_total', 'Scheduled job runs by job and result (ok/failed/skipped)')
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Time a block into a histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+def record_upstream(source, endpoint, started, result):
+    """
+    Record an upstream call
+
+    Args:
+        source: angel, nse, selenium or mock
+        endpoint: Upstream endpoint/method name
+        started: time.perf_counter() taken before the call
+        result: ok, empty or error
+    """
+    UPSTREAM_CALLS.inc(source=source, endpoint=endpoint, result=result)
+    UPSTREAM_LATENCY.observe(time.perf_counter() - started, source=source, endpoint=endpoint)
+
+
+def record_skipped(source, endpoint):
+    """Record an upstream call skipped because its circuit breaker is open"""
+    UPSTREAM_CALLS.inc(source=source, endpoint=endpoint, result='skipped')
+
+
+def record_cache(cache, hit):
+    """Record a cache lookup"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
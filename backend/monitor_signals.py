@@ -6,6 +6,8 @@ Continuously monitors market and displays trading signals
 import time
 from datetime import datetime
 from strategy import TradingStrategy
+from market_calendar import CALENDAR
+from scheduler import SCHEDULER, Job
 from config import *
 
 def clear_screen():
@@ -13,8 +15,8 @@ def clear_screen():
     import os
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def display_analysis(analysis, symbol):
-    """Display formatted analysis"""
+def display_analysis(analysis, symbol, alerts=()):
+    """Display formatted analysis (and the latest alerts, given newest first)"""
     clear_screen()
     
     print("=" * 70)
@@ -80,6 +82,12 @@ def display_analysis(analysis, symbol):
         print(f"   Risk:         ₹{risk_amount} ({RISK_PERCENT}%)")
         print(f"   Quantity:     {qty} lots")
     
+    if alerts:
+        print()
+        print("🔔 RECENT ALERTS:")
+        for alert in reversed(alerts[:5]):
+            print(f"   {alert['timestamp'][11:19]}  {alert['message']}")
+    
     print()
     print("=" * 70)
     print("Press Ctrl+C to stop monitoring")
@@ -99,17 +107,17 @@ def main():
     print("Press Ctrl+C to stop")
     time.sleep(2)
     
+    if Config.MARKET_HOURS_ONLY and not CALENDAR.is_open():
+        next_open = CALENDAR.next_open()
+        print(f"💤 Market closed - next session {CALENDAR.now(next_open).strftime('%Y-%m-%d %H:%M') if next_open else 'unknown'}")
+    
+    # Refresh just after candle closes, only while the market is open
+    def refresh():
+        display_analysis(strategy.analyze_market(symbol), symbol, strategy.alerts.recent_alerts())
+    
+    SCHEDULER.add(Job('monitor_signals', refresh, refresh_interval, immediate=True))
     try:
-        while True:
-            # Analyze market
-            analysis = strategy.analyze_market(symbol)
-            
-            # Display results
-            display_analysis(analysis, symbol)
-            
-            # Wait before next refresh
-            time.sleep(refresh_interval)
-            
+        SCHEDULER.run()
     except KeyboardInterrupt:
         print("\n\n🛑 Stopping monitor...")
         strategy.angel.logout()
@@ -0,0 +1,120 @@
+"""
+Multi-timeframe Candle Prediction
+Builds 5, 15 and 60-minute bars from one 1-minute candle series (no extra
+broker calls), scores every timeframe with predict_next_candle and combines
+them into one weighted confidence
+"""
+
+import logging
+from candle_prediction import predict_next_candle
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SESSION_OPEN = 9 * 60 + 15  # NSE bars are aligned to 09:15
+
+
+def parse_weights(spec):
+    """'1:0.1,5:0.2,15:0.4,60:0.3' -> {1: 0.1, 5: 0.2, 15: 0.4, 60: 0.3}"""
+    weights = {}
+    for part in spec.split(','):
+        if ':' in part:
+            minutes, weight = part.split(':', 1)
+            weights[int(minutes)] = float(weight)
+    return weights
+
+
+def aggregate(candles, minutes):
+    """
+    Combine 1-minute candles into bars of `minutes`, aligned to the session open
+
+    Args:
+        candles: SmartAPI candles [timestamp, open, high, low, close, volume],
+                 oldest first, timestamps like 2026-01-05T09:15:00+05:30
+        minutes: Bar length
+
+    Returns:
+        list: Aggregated candles in the same format (the last bar is partial
+              until its `minutes` are up - check MarketCalendar.bar_closed
+              before folding it into any running state)
+    """
+    if minutes == 1:
+        return candles
+
+    bars = []
+    current_key = None
+    for candle in candles:
+        ts = str(candle[0])
+        minute_of_day = int(ts[11:13]) * 60 + int(ts[14:16])
+        key = (ts[:10], (minute_of_day - SESSION_OPEN) // minutes)
+        if key != current_key:
+            current_key = key
+            bars.append([candle[0], candle[1], candle[2], candle[3], candle[4], candle[5]])
+        else:
+            bar = bars[-1]
+            bar[2] = max(bar[2], candle[2])
+            bar[3] = min(bar[3], candle[3])
+            bar[4] = candle[4]
+            bar[5] += candle[5]
+    return bars
+
+
+def build_timeframes(candles, timeframes):
+    """{minutes: candles} for every timeframe, all from the same 1-minute series"""
+    return {minutes: aggregate(candles, minutes) for minutes in sorted(timeframes)} if candles else {}
+
+
+def predict_multi_timeframe(frames, pcr, max_pain, current_price, weights=None, indicators=None):
+    """
+    Predict the next candle on every timeframe and combine the results
+
+    The combined score is the weighted mean of each timeframe's signed
+    confidence: +confidence (BULLISH), -confidence (BEARISH) or 0 (NEUTRAL).
+    Timeframes without enough bars are left out and the weights of the rest
+    renormalized. The direction is the score's sign and the confidence its
+    magnitude, so opposing timeframes offset each other; a NEUTRAL result
+    always has confidence 0, like the insufficient-data result.
+
+    Args:
+        frames: {minutes: candles} from build_timeframes
+        pcr, max_pain, current_price: As for predict_next_candle
+        weights: {minutes: weight} (default Config.TIMEFRAME_WEIGHTS)
+        indicators: IndicatorSet.snapshot() of the 15-minute bars (used for that timeframe)
+
+    Returns:
+        dict: predict_next_candle-style result plus 'timeframes' with each prediction
+    """
+    weights = weights if weights is not None else parse_weights(Config.TIMEFRAME_WEIGHTS)
+    predictions = {}
+    score = 0.0
+    total_weight = 0.0
+
+    for minutes, candles in frames.items():
+        weight = weights.get(minutes, 0)
+        if not weight or len(candles) < 3:
+            continue
+        prediction = predict_next_candle(candles, pcr, max_pain, current_price,
+                                         indicators if minutes == 15 else None)
+        predictions[minutes] = {
+            'direction': prediction['direction'],
+            'confidence': prediction['confidence'],
+            'pattern': prediction.get('pattern')
+        }
+        sign = {'BULLISH': 1, 'BEARISH': -1}.get(prediction['direction'], 0)
+        score += weight * sign * prediction['confidence']
+        total_weight += weight
+
+    if not total_weight:
+        return {'direction': 'NEUTRAL', 'confidence': 0, 'reason': 'Insufficient candle data',
+                'timeframes': predictions}
+
+    score /= total_weight
+    direction = 'BULLISH' if score > 0 else 'BEARISH' if score < 0 else 'NEUTRAL'
+    summary = ', '.join(f"{m}m {p['direction'][:4]} {p['confidence']}%" for m, p in predictions.items())
+    return {
+        'direction': direction,
+        'confidence': int(abs(score)),
+        'timeframes': predictions,
+        'indicators': indicators,
+        'reason': f"Weighted timeframes: {summary}"
+    }
@@ -3,6 +3,14 @@ NSE Option Chain Scraper using Selenium (Browser Automation)
 This bypasses NSE's anti-scraping by using real browser
 """
 
+import importlib.util
+import logging
+
+logger = logging.getLogger(__name__)
+
+_selenium_available = None
+
+
 def get_nse_data_selenium(symbol="NIFTY"):
     """
     Fetch NSE data using Selenium (requires Chrome/Firefox)
@@ -19,7 +27,7 @@ def get_nse_data_selenium(symbol="NIFTY"):
         import time
         import json
         
-        print(f"🌐 Opening browser to fetch LIVE {symbol} data...")
+        logger.debug("🌐 Opening browser to fetch LIVE %s data...", symbol)
         
         # Setup Chrome in headless mode
         chrome_options = Options()
@@ -55,35 +63,33 @@ def get_nse_data_selenium(symbol="NIFTY"):
             option_data = data.get('records', {}).get('data', [])
             
             if option_data:
-                underlying = data.get('records', {}).get('underlyingValue', 'N/A')
-                print(f"✅ SUCCESS via Selenium! Fetched {len(option_data)} strikes")
-                print(f"📊 {symbol} Live Price: {underlying}")
+                logger.debug("✅ SUCCESS via Selenium! Fetched %d strikes, %s Live Price: %s",
+                             len(option_data), symbol, data.get('records', {}).get('underlyingValue', 'N/A'))
                 driver.quit()
                 return option_data
             else:
-                print("⚠️ Selenium fetched data but it's empty")
+                logger.warning("⚠️ Selenium fetched data but it's empty")
                 driver.quit()
                 return None
                 
         except Exception as e:
-            print(f"❌ Selenium error: {e}")
+            logger.error("❌ Selenium error: %s", e)
             driver.quit()
             return None
             
     except ImportError:
-        print("❌ Selenium not installed")
-        print("📦 Install with: pip install selenium webdriver-manager")
+        logger.warning("❌ Selenium not installed - install with: pip install selenium webdriver-manager")
         return None
     except Exception as e:
-        print(f"❌ Selenium setup failed: {e}")
+        logger.error("❌ Selenium setup failed: %s", e)
         return None
 
 
 def is_selenium_available():
-    """Check if Selenium is installed"""
-    try:
-        import selenium
-        from webdriver_manager.chrome import ChromeDriverManager
-        return True
-    except ImportError:
-        return False
+    """Check if Selenium is installed (without importing it)"""
+    global _selenium_available
+    if _selenium_available is None:
+        _selenium_available = all(
+            importlib.util.find_spec(name) is not None for name in ('selenium', 'webdriver_manager')
+        )
+    return _selenium_available
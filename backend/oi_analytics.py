@@ -0,0 +1,231 @@
+"""
+Open Interest Analytics
+Keeps the session's per-strike OI and premium readings in preallocated NumPy
+ring buffers and classifies long buildup, short buildup, short covering and
+long unwinding for every strike in one vectorized pass, alongside the
+rolling PCR and max-pain drift
+"""
+
+import threading
+import numpy as np
+from config import Config
+from market_calendar import CALENDAR, IST
+
+IST_OFFSET = IST.utcoffset(None).total_seconds()
+
+# Buildup classes, indexed by the codes classify() returns
+BUILDUP_CLASSES = ('neutral', 'long_buildup', 'short_buildup', 'short_covering', 'long_unwinding')
+
+# Per-strike series kept in the ring buffer (MarketSnapshot.chain column names)
+SERIES = ('ce_oi', 'pe_oi', 'ce_ltp', 'pe_ltp')
+
+
+def classify(oi_change, price_change):
+    """
+    Buildup code per element
+
+    OI up + price up = long buildup, OI up + price down = short buildup,
+    OI down + price up = short covering, OI down + price down = long unwinding;
+    anything flat or missing is neutral.
+    """
+    oi_change = np.nan_to_num(np.asarray(oi_change, dtype=float))
+    price_change = np.nan_to_num(np.asarray(price_change, dtype=float))
+    return np.select(
+        [(oi_change > 0) & (price_change > 0),
+         (oi_change > 0) & (price_change < 0),
+         (oi_change < 0) & (price_change > 0),
+         (oi_change < 0) & (price_change < 0)],
+        [1, 2, 3, 4],
+        default=0
+    )
+
+
+def _number(value, digits=2):
+    """JSON-safe float (None for NaN)"""
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def _numbers(values, digits=2):
+    """JSON-safe list of floats (None for NaN), rounded in one pass"""
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+
+def _clock_times(timestamps):
+    """Epoch seconds -> 'HH:MM:SS' IST, vectorized"""
+    local = (np.asarray(timestamps) + IST_OFFSET).astype('datetime64[s]')
+    return [text[11:19] for text in np.datetime_as_string(local)]
+
+
+class OISeries:
+    """One symbol's session history: (capacity x strikes) ring buffers plus scalar series"""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or Config.OI_HISTORY_SIZE
+        self.session = None
+        self.count = 0  # readings written this session (ring position = count % capacity)
+        self.strikes = np.empty(0)
+        self.series = {name: np.full((self.capacity, 0), np.nan) for name in SERIES}
+        self.timestamps = np.zeros(self.capacity)
+        self.spot = np.full(self.capacity, np.nan)
+        self.max_pain = np.full(self.capacity, np.nan)
+        self.opening_max_pain = None  # first reading of the session (may have left the ring)
+        self.day_change = {}  # latest changeinOpenInterest/change columns (vs previous close)
+        self._lock = threading.Lock()
+
+    def _reset(self, session):
+        self.__init__(self.capacity)
+        self.session = session
+
+    def _widen(self, strikes):
+        """Add columns for strikes not seen yet this session (rare: ATM window moved)"""
+        grid = np.union1d(self.strikes, strikes)
+        if len(grid) == len(self.strikes):
+            return
+        columns = np.searchsorted(grid, self.strikes)
+        for name, old in self.series.items():
+            new = np.full((self.capacity, len(grid)), np.nan)
+            new[:, columns] = old
+            self.series[name] = new
+        self.strikes = grid
+
+    def update(self, snapshot):
+        """Append one reading from a MarketSnapshot (chain columns sorted by strike)"""
+        chain = snapshot.chain
+        strikes = chain['strike']
+        if len(strikes) == 0:
+            return
+
+        with self._lock:
+            session = CALENDAR.now(snapshot.timestamp).date()
+            if session != self.session:
+                self._reset(session)
+            self._widen(strikes)
+
+            row = self.count % self.capacity
+            columns = np.searchsorted(self.strikes, strikes)
+            for name, values in self.series.items():
+                values[row] = np.nan
+                values[row, columns] = chain[name]
+            self.timestamps[row] = snapshot.timestamp
+            self.spot[row] = snapshot.current_price or np.nan
+            self.max_pain[row] = snapshot.max_pain or np.nan
+            if self.opening_max_pain is None and snapshot.max_pain:
+                self.opening_max_pain = snapshot.max_pain
+            self.day_change = {
+                'strikes': strikes,
+                'ce_oi': chain['ce_chg_oi'], 'pe_oi': chain['pe_chg_oi'],
+                'ce_price': chain['ce_change'], 'pe_price': chain['pe_change']
+            }
+            self.count += 1
+
+    @property
+    def version(self):
+        """Changes on every reading (for snapshot caching)"""
+        return (self.session, self.count)
+
+    def _order(self):
+        """Ring rows of the stored readings, oldest first"""
+        stored = min(self.count, self.capacity)
+        return (np.arange(self.count - stored, self.count)) % self.capacity
+
+    def report(self, window=None, points=None):
+        """
+        Buildup per strike plus rolling PCR and max-pain drift
+
+        Args:
+            window: Readings to compare for the intraday buildup (default Config.OI_BUILDUP_WINDOW)
+            points: Most recent PCR/max-pain points to include (default all stored)
+
+        Returns:
+            dict: JSON-ready report (None before the first reading)
+        """
+        window = window or Config.OI_BUILDUP_WINDOW
+        with self._lock:
+            if not self.count:
+                return None
+            order = self._order()
+            ce_oi = self.series['ce_oi'][order]
+            pe_oi = self.series['pe_oi'][order]
+            ce_ltp = self.series['ce_ltp'][order]
+            pe_ltp = self.series['pe_ltp'][order]
+            timestamps = self.timestamps[order]
+            max_pain = self.max_pain[order]
+            strikes = self.strikes.copy()
+            day_change = dict(self.day_change)
+            session = self.session
+            opening_max_pain = self.opening_max_pain
+
+        # Rolling PCR: total put OI over total call OI at every reading
+        ce_total = np.nansum(ce_oi, axis=1)
+        pe_total = np.nansum(pe_oi, axis=1)
+        pcr = np.divide(pe_total, ce_total, out=np.full(len(ce_total), np.nan), where=ce_total > 0)
+
+        # Intraday buildup over the window once there are two readings,
+        # otherwise against the previous close (NSE's change columns)
+        if len(order) >= 2:
+            start = max(0, len(order) - 1 - window)
+            basis = 'intraday'
+            ce_oi_chg, pe_oi_chg = ce_oi[-1] - ce_oi[start], pe_oi[-1] - pe_oi[start]
+            ce_px_chg, pe_px_chg = ce_ltp[-1] - ce_ltp[start], pe_ltp[-1] - pe_ltp[start]
+            current = ~np.isnan(ce_oi[-1]) | ~np.isnan(pe_oi[-1])
+        else:
+            start = 0
+            basis = 'previous_close'
+            columns = np.searchsorted(strikes, day_change['strikes'])
+            ce_oi_chg, pe_oi_chg, ce_px_chg, pe_px_chg = (np.full(len(strikes), np.nan) for _ in range(4))
+            ce_oi_chg[columns], pe_oi_chg[columns] = day_change['ce_oi'], day_change['pe_oi']
+            ce_px_chg[columns], pe_px_chg[columns] = day_change['ce_price'], day_change['pe_price']
+            current = np.zeros(len(strikes), dtype=bool)
+            current[columns] = True
+
+        ce_class = classify(ce_oi_chg, ce_px_chg)
+        pe_class = classify(pe_oi_chg, pe_px_chg)
+
+        shown = np.flatnonzero(current)
+        rows = [
+            {
+                'strike': strike,
+                'CE': {'oi_change': ce_oi, 'price_change': ce_px, 'buildup': BUILDUP_CLASSES[ce]},
+                'PE': {'oi_change': pe_oi, 'price_change': pe_px, 'buildup': BUILDUP_CLASSES[pe]}
+            }
+            for strike, ce_oi, ce_px, ce, pe_oi, pe_px, pe in zip(
+                _numbers(strikes[shown]),
+                _numbers(ce_oi_chg[shown], 0), _numbers(ce_px_chg[shown]), ce_class[shown].tolist(),
+                _numbers(pe_oi_chg[shown], 0), _numbers(pe_px_chg[shown]), pe_class[shown].tolist()
+            )
+        ]
+
+        def summary(codes):
+            counts = np.bincount(codes[current], minlength=len(BUILDUP_CLASSES))
+            return dict(zip(BUILDUP_CLASSES, counts.tolist()))
+
+        points = points or len(order)
+        times = _clock_times(timestamps[-points:])
+        return {
+            'session': session.isoformat(),
+            'readings': int(self.count),
+            'updated': CALENDAR.now(timestamps[-1]).isoformat(),
+            'pcr': {
+                'current': _number(pcr[-1]),
+                'window_average': _number(np.nanmean(pcr[start:])) if not np.isnan(pcr[start:]).all() else None,
+                'window_change': _number(pcr[-1] - pcr[start]),
+                'series': [list(point) for point in zip(times, _numbers(pcr[-points:], 3))]
+            },
+            'max_pain': {
+                'current': _number(max_pain[-1]),
+                'session_open': opening_max_pain,
+                'drift': _number(max_pain[-1] - opening_max_pain) if opening_max_pain else None,
+                'window_drift': _number(max_pain[-1] - max_pain[start]),
+                'series': [list(point) for point in zip(times, _numbers(max_pain[-points:]))]
+            },
+            'buildup': {
+                'basis': basis,
+                'window': int(len(order) - 1 - start),
+                'summary': {'CE': summary(ce_class), 'PE': summary(pe_class)},
+                'strikes': rows
+            }
+        }
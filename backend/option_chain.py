@@ -2,10 +2,20 @@
 NSE Option Chain Scraper - Pandas-Free Version
 """
 
+import logging
 import requests
 import os
+import threading
 import time
 from datetime import datetime
+from circuit_breaker import BREAKERS
+from expiry_index import ExpiryIndex
+from market_calendar import ClosedMarketCache
+from metrics import record_cache, record_upstream
+from source_selector import SourceSelector
+
+logger = logging.getLogger(__name__)
+
 
 class OptionChain:
     """Scraper for NSE Option Chain data"""
@@ -21,25 +31,94 @@ class OptionChain:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self._expiry_cache = {}  # (symbol, expiry) -> (fingerprint, metrics)
+        self._cache_lock = threading.Lock()
+        self._closed = ClosedMarketCache()  # chains fetched after the close
+        self._sources = SourceSelector('nse', [
+            ('selenium', self._fetch_selenium),
+            ('nse-indices', self._fetch_nse_indices),
+            ('nse-equities', self._fetch_nse_equities)
+        ])
 
     def get_nse_data(self, symbol="NIFTY"):
-        """Fetch Option Chain from NSE - Multiple methods"""
+        """
+        Fetch Option Chain from NSE, falling back to simulated data
+        
+        See get_live_data for how the NSE methods are tried.
+        """
+        data = self.get_live_data(symbol)
+        if data:
+            return data
+        
+        # Fallback: Use mock data
+        logger.warning(
+            "⚠️ NSE IS BLOCKING - USING SIMULATED DATA. Real NSE data needs a VPN, "
+            "an Indian VPS/cloud host, Selenium browser automation or a paid NSE data feed"
+        )
+        return self.get_mock_data(symbol)
+
+    def get_live_data(self, symbol="NIFTY"):
+        """
+        Fetch Option Chain from NSE - Multiple methods (None if all fail)
+        
+        Selenium, NSE Method 1 and Method 2 are hedged best-first by their
+        latency/success scores: the next method starts when the current one
+        fails or runs past its p95, and the first chain returned wins. Each
+        method also sits behind a circuit breaker, so one that keeps failing
+        (or NSE keeps returning empty data for) is skipped until a backoff expires.
+        While the market is closed the first chain fetched after the close is
+        reused until the next session.
+        """
+        closed = self._closed.get(symbol)
+        if closed:
+            return closed
+        
+        source, data = self._sources.fetch(symbol)
+        if source:
+            logger.debug("Option chain for %s from %s", symbol, source)
+        return self._closed.put(symbol, data)
+
+    def source_scores(self):
+        """Latency/success score per NSE method, best first"""
+        return self._sources.snapshot()
+
+    def get_mock_data(self, symbol="NIFTY"):
+        """Simulated option chain"""
+        from mock_data import get_mock_option_data
+        started = time.perf_counter()
+        mock = get_mock_option_data(symbol)
+        record_upstream('mock', 'option-chain', started, 'ok')
+        return mock
+
+    def _fetch_selenium(self, symbol):
+        """Method 0: Selenium browser automation (most reliable, when installed)"""
+        from nse_selenium import get_nse_data_selenium, is_selenium_available
+        
+        if not is_selenium_available() or not BREAKERS.allow('selenium', 'option-chain-indices'):
+            return None
         
-        # Method 0: Try Selenium if available (most reliable)
+        logger.debug("🤖 Selenium available - trying browser automation...")
+        started = time.perf_counter()
         try:
-            from nse_selenium import get_nse_data_selenium, is_selenium_available
-            
-            if is_selenium_available():
-                print("🤖 Selenium available - trying browser automation...")
-                selenium_data = get_nse_data_selenium(symbol)
-                if selenium_data:
-                    return selenium_data
+            selenium_data = get_nse_data_selenium(symbol)
         except Exception as e:
-            print(f"Selenium attempt failed: {str(e)[:50]}")
+            record_upstream('selenium', 'option-chain-indices', started, 'error')
+            BREAKERS.record('selenium', 'option-chain-indices', False)
+            logger.warning("Selenium attempt failed: %.50s", e)
+            return None
+        
+        record_upstream('selenium', 'option-chain-indices', started, 'ok' if selenium_data else 'empty')
+        BREAKERS.record('selenium', 'option-chain-indices', bool(selenium_data))
+        return selenium_data or None
+
+    def _fetch_nse_indices(self, symbol):
+        """Method 1: NSE official API with better headers"""
+        if not BREAKERS.allow('nse', 'option-chain-indices'):
+            return None
         
-        # Method 1: Try NSE official API with better headers
+        started = time.perf_counter()
         try:
-            print(f"🔄 Attempting to fetch LIVE {symbol} data from NSE...")
+            logger.debug("🔄 Attempting to fetch LIVE %s data from NSE...", symbol)
             
             session = requests.Session()
             
@@ -70,17 +149,30 @@ class OptionChain:
                 option_data = records.get('data', [])
                 
                 if option_data and len(option_data) > 0:
-                    print(f"✅ SUCCESS! Fetched {len(option_data)} LIVE strikes from NSE")
-                    underlying = records.get('underlyingValue', 'N/A')
-                    print(f"📊 {symbol} Spot Price: {underlying}")
+                    record_upstream('nse', 'option-chain-indices', started, 'ok')
+                    BREAKERS.record('nse', 'option-chain-indices', True)
+                    logger.debug("✅ SUCCESS! Fetched %d LIVE strikes from NSE", len(option_data))
+                    logger.debug("📊 %s Spot Price: %s", symbol, records.get('underlyingValue', 'N/A'))
                     return option_data
+            
+            record_upstream('nse', 'option-chain-indices', started, 'empty')
                     
         except Exception as e:
-            print(f"⚠️ NSE Method 1 Failed: {str(e)[:100]}")
+            record_upstream('nse', 'option-chain-indices', started, 'error')
+            logger.warning("⚠️ NSE Method 1 Failed: %.100s", e)
         
-        # Method 2: Try alternative endpoint
+        # Blocked (non-200 or empty records) counts as a failure too
+        BREAKERS.record('nse', 'option-chain-indices', False)
+        return None
+
+    def _fetch_nse_equities(self, symbol):
+        """Method 2: alternative NSE endpoint"""
+        if not BREAKERS.allow('nse', 'option-chain-equities'):
+            return None
+        
+        started = time.perf_counter()
         try:
-            print("🔄 Trying alternative NSE endpoint...")
+            logger.debug("🔄 Trying alternative NSE endpoint...")
             session = requests.Session()
             session.get("https://www.nseindia.com", timeout=10)
             time.sleep(0.5)
@@ -93,24 +185,16 @@ class OptionChain:
             if response.status_code == 200:
                 data = response.json().get('records', {}).get('data', [])
                 if data:
-                    print(f"✅ Alternative endpoint worked! {len(data)} strikes")
+                    record_upstream('nse', 'option-chain-equities', started, 'ok')
+                    BREAKERS.record('nse', 'option-chain-equities', True)
+                    logger.debug("✅ Alternative endpoint worked! %d strikes", len(data))
                     return data
+            record_upstream('nse', 'option-chain-equities', started, 'empty')
         except:
-            pass
-        
-        # Fallback: Use mock data
-        print("=" * 60)
-        print("⚠️  NSE IS BLOCKING - USING SIMULATED DATA")
-        print("=" * 60)
-        print("Real NSE data requires one of these solutions:")
-        print("1. ✅ Use VPN (Recommended for retail traders)")
-        print("2. ✅ Deploy on Indian VPS/Cloud")
-        print("3. ✅ Use Selenium browser automation")
-        print("4. ✅ Subscribe to paid NSE data feed")
-        print("=" * 60)
+            record_upstream('nse', 'option-chain-equities', started, 'error')
         
-        from mock_data import get_mock_option_data
-        return get_mock_option_data(symbol)
+        BREAKERS.record('nse', 'option-chain-equities', False)
+        return None
 
     def calculate_pcr(self, data):
         """Calculate PCR without pandas"""
@@ -174,6 +258,110 @@ class OptionChain:
 
         return int(heavy_call), int(heavy_put)
 
+    def analyze_expiries(self, data, symbol="NIFTY", today=None):
+        """
+        Calculate PCR, Max Pain and heavy strikes separately for every expiry
+        
+        Metrics are cached per expiry and only recomputed for expiries whose
+        strikes or OI changed since the last call.
+        
+        Args:
+            data: Option chain with any mix of expiries
+            symbol: Symbol the chain belongs to (cache key)
+            today: Date expired series are dropped by (defaults to today in IST)
+            
+        Returns:
+            dict: nearest/monthly expiry names and metrics per expiry
+        """
+        index = ExpiryIndex(data)
+        with self._cache_lock:
+            by_expiry = {}
+            
+            for expiry in index.expiries:
+                key = (symbol, expiry)
+                fingerprint = index.fingerprint(expiry)
+                cached = self._expiry_cache.get(key)
+            
+                record_cache('expiry_metrics', bool(cached and cached[0] == fingerprint))
+                if cached and cached[0] == fingerprint:
+                    by_expiry[expiry] = cached[1]
+                    continue
+            
+                rows = index.get(expiry)
+                heavy_call, heavy_put = self.get_heavy_strikes(rows)
+                metrics = {
+                    'expiry': expiry,
+                    'pcr': self.calculate_pcr(rows),
+                    'max_pain': self.get_max_pain(rows),
+                    'heavy_call': heavy_call,
+                    'heavy_put': heavy_put,
+                    'strikes': len(rows)
+                }
+                self._expiry_cache[key] = (fingerprint, metrics)
+                by_expiry[expiry] = metrics
+            
+            # Forget expiries that dropped out of the chain
+            for key in [k for k in self._expiry_cache if k[0] == symbol and k[1] not in by_expiry]:
+                del self._expiry_cache[key]
+        
+        return {
+            'nearest': index.nearest(today),
+            'monthly': index.monthly(today),
+            'expiries': by_expiry,
+            'index': index
+        }
+
+    def get_underlying_value(self, data):
+        """Spot price carried in the chain rows (0 if missing)"""
+        for opt in data or []:
+            value = opt.get('underlyingValue') or opt.get('CE', {}).get('underlyingValue') \
+                or opt.get('PE', {}).get('underlyingValue')
+            if value:
+                return value
+        return 0
+
+    def atm_window(self, data, underlying_value, width=10):
+        """
+        Compact rows for the dashboard: width strikes either side of ATM
+
+        Args:
+            data: Option chain rows for one expiry
+            underlying_value: Spot price used to find the ATM strike
+            width: Strikes to keep on each side of ATM
+
+        Returns:
+            list: {'strike', 'atm', 'pcr', 'ce': {...}, 'pe': {...}} sorted by strike
+        """
+        if not data:
+            return []
+
+        rows = sorted(data, key=lambda opt: opt.get('strikePrice', 0))
+        atm = min(range(len(rows)), key=lambda i: abs(rows[i].get('strikePrice', 0) - underlying_value))
+        window = rows[max(0, atm - width):atm + width + 1]
+
+        def side(leg):
+            return {
+                'oi': leg.get('openInterest', 0) or 0,
+                'chg_oi': leg.get('changeinOpenInterest', 0) or 0,
+                'volume': leg.get('totalTradedVolume', 0) or 0,
+                'ltp': leg.get('lastPrice', 0) or 0,
+                'iv': leg.get('impliedVolatility') or leg.get('iv') or 0
+            }
+
+        atm_strike = rows[atm].get('strikePrice', 0)
+        slim = []
+        for opt in window:
+            ce = side(opt.get('CE', {}))
+            pe = side(opt.get('PE', {}))
+            slim.append({
+                'strike': opt.get('strikePrice', 0),
+                'atm': opt.get('strikePrice', 0) == atm_strike,
+                'pcr': round(pe['oi'] / ce['oi'], 2) if ce['oi'] else 0,
+                'ce': ce,
+                'pe': pe
+            })
+        return slim
+
     def fetch_option_chain(self, symbol='NIFTY', expiry=None):
         """Legacy compatibility"""
         return self.get_nse_data(symbol)
@@ -0,0 +1,315 @@
+"""
+Paper Trading Broker
+Simulated broker with the same interface as AngelAPI - fills market orders
+against recorded/replayed prices with configurable latency and slippage
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from config import Config
+from metrics import ORDER_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class PaperBroker:
+    """In-memory broker implementing the AngelAPI methods used by the strategy"""
+
+    def __init__(self, data_source=None, latency_ms=None, slippage_bps=None, clock=None):
+        """
+        Initialize paper broker
+
+        Args:
+            data_source: Object providing get_ltp/get_candle_data/get_option_chain (optional)
+            latency_ms: Delay between order placement and fill in milliseconds
+            slippage_bps: Adverse slippage applied to every fill in basis points
+            clock: Callable returning the current epoch time (defaults to time.time)
+        """
+        self.data_source = data_source
+        self.latency = (Config.PAPER_LATENCY_MS if latency_ms is None else latency_ms) / 1000
+        self.slippage = (Config.PAPER_SLIPPAGE_BPS if slippage_bps is None else slippage_bps) / 10000
+        self.clock = clock if clock else time.time
+        self.session = None
+        self.logged_in = False
+
+        self._prices = {}
+        self._orders = {}  # orderid -> order
+        self._pending = deque()  # orders waiting for their fill time, oldest first
+        self._positions = {}  # symbol -> buy/sell totals since it was last flat, plus realised P&L
+        self._order_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._listeners = []  # callables((exchange, token), ltp) told about every price
+
+    def login(self):
+        """Paper login always succeeds"""
+        self.session = 'paper-session'
+        self.logged_in = True
+        logger.info("Paper broker session started")
+        return True
+
+    def is_logged_in(self):
+        """Check if logged in"""
+        return self.logged_in
+
+    def get_profile(self):
+        """Get user profile"""
+        if not self.logged_in:
+            return None
+        return {'name': 'Paper Trader', 'clientcode': 'PAPER'}
+
+    def logout(self):
+        """End the paper session"""
+        self.logged_in = False
+        return True
+
+    def get_token(self, symbol):
+        """Paper instruments are keyed by trading symbol"""
+        return symbol
+
+    def set_price(self, symbol, price):
+        """
+        Set the last traded price of an instrument
+
+        Args:
+            symbol: Trading symbol
+            price: Last traded price
+        """
+        self._prices[symbol] = float(price)
+        self._process_pending()
+        self._notify({symbol: price})
+
+    def update_prices(self, prices):
+        """
+        Set several last traded prices at once
+
+        Args:
+            prices: Mapping of trading symbol to price
+        """
+        for symbol, price in prices.items():
+            self._prices[symbol] = float(price)
+        self._process_pending()
+        self._notify(prices)
+
+    def add_price_listener(self, listener):
+        """Call listener((exchange, token), ltp) for every price set"""
+        self._listeners.append(listener)
+
+    def _notify(self, prices):
+        for symbol, price in prices.items():
+            for listener in self._listeners:
+                try:
+                    listener(('NFO', symbol), float(price))
+                except Exception as e:
+                    logger.error("Price listener failed for %s: %s", symbol, e)
+
+    def _price(self, symbol):
+        """Latest known price from the price table or the data source"""
+        price = self._prices.get(symbol)
+        if price is None and self.data_source is not None:
+            price = self.data_source.get_ltp(symbol)
+        return price
+
+    def get_ltp(self, symbol="NIFTY BANK"):
+        """Get Last Traded Price"""
+        return self._price(symbol)
+
+    def get_quotes(self, instruments, mode='LTP'):
+        """Quotes keyed by (exchange, token); paper tokens are trading symbols"""
+        quotes = {}
+        for exchange, token in instruments:
+            price = self._price(token)
+            if price is not None:
+                quotes[(exchange, token)] = {'exchange': exchange, 'symbolToken': token, 'ltp': price}
+        return quotes
+
+    def get_ltps(self, instruments):
+        """(exchange, token) -> last traded price"""
+        return {key: quote['ltp'] for key, quote in self.get_quotes(instruments).items()}
+
+    def get_candle_data(self, symbol="NIFTY", interval="FIFTEEN_MINUTE", count=10):
+        """Get candles from the data source"""
+        if not self.logged_in or self.data_source is None:
+            return None
+        return self.data_source.get_candle_data(symbol, interval=interval, count=count)
+
+    def get_option_chain(self, symbol="NIFTY", strike_count=20):
+        """Get option chain from the data source, or a simulated one"""
+        if not self.logged_in:
+            return None
+        if self.data_source is not None:
+            return self.data_source.get_option_chain(symbol)
+
+        from mock_data import get_mock_option_data
+        return get_mock_option_data(symbol)
+
+    def place_order(self, symbol, qty, order_type="BUY", symboltoken=None):
+        """Place Market Order (paper instruments are keyed by trading symbol)"""
+        if not self.logged_in:
+            logger.error("Paper order rejected: not logged in")
+            return None
+
+        try:
+            qty = int(qty)
+        except (TypeError, ValueError):
+            qty = 0
+        if qty <= 0 or order_type not in ("BUY", "SELL"):
+            logger.error("Paper order rejected: %s %s x %s", order_type, symbol, qty)
+            return None
+
+        started = time.perf_counter()
+        now = self.clock()
+        with self._lock:
+            order_id = f"PAPER{next(self._order_ids):09d}"
+            order = {
+                'orderid': order_id,
+                'tradingsymbol': symbol,
+                'symboltoken': symboltoken or symbol,
+                'transactiontype': order_type,
+                'exchange': 'NFO',
+                'ordertype': 'MARKET',
+                'producttype': 'INTRADAY',
+                'variety': 'NORMAL',
+                'quantity': qty,
+                'filledshares': 0,
+                'averageprice': 0.0,
+                'status': 'open',
+                'text': '',
+                'updatetime': self._timestamp(now),
+                '_due': now + self.latency
+            }
+            self._orders[order_id] = order
+            self._pending.append(order)
+
+        self._process_pending()
+        ORDER_LATENCY.observe(time.perf_counter() - started, broker='paper')
+        return {
+            'status': True,
+            'message': 'SUCCESS',
+            'errorcode': '',
+            'data': {'orderid': order_id, 'script': symbol}
+        }
+
+    def _process_pending(self):
+        """Fill every pending order whose latency has elapsed"""
+        if not self._pending:
+            return
+
+        now = self.clock()
+        with self._lock:
+            while self._pending and self._pending[0]['_due'] <= now:
+                order = self._pending.popleft()
+                if order['status'] == 'open':
+                    self._fill(order, now)
+
+    def _fill(self, order, now):
+        """Fill an order at the current price plus slippage (lock held)"""
+        symbol = order['tradingsymbol']
+        price = self._price(symbol)
+        order['updatetime'] = self._timestamp(now)
+
+        if price is None:
+            order['status'] = 'rejected'
+            order['text'] = 'No price available'
+            return
+
+        if order['transactiontype'] == 'BUY':
+            fill_price = price * (1 + self.slippage)
+        else:
+            fill_price = price * (1 - self.slippage)
+
+        qty = order['quantity']
+        order['status'] = 'complete'
+        order['filledshares'] = qty
+        order['averageprice'] = round(fill_price, 2)
+
+        position = self._positions.setdefault(symbol, {
+            'buy_qty': 0, 'buy_value': 0.0, 'sell_qty': 0, 'sell_value': 0.0, 'realised': 0.0
+        })
+        if order['transactiontype'] == 'BUY':
+            position['buy_qty'] += qty
+            position['buy_value'] += fill_price * qty
+        else:
+            position['sell_qty'] += qty
+            position['sell_value'] += fill_price * qty
+
+        if position['buy_qty'] == position['sell_qty']:
+            # Flat: book the P&L and start the next position's averages from scratch
+            position['realised'] += position['sell_value'] - position['buy_value']
+            position.update(buy_qty=0, buy_value=0.0, sell_qty=0, sell_value=0.0)
+
+    def cancel_order(self, order_id, variety='NORMAL'):
+        """Cancel an order that has not been filled yet"""
+        if not self.logged_in:
+            return None
+
+        self._process_pending()
+        with self._lock:
+            order = self._orders.get(order_id)
+            if not order or order['status'] != 'open':
+                logger.warning("Paper cancel failed for %s", order_id)
+                return None
+            order['status'] = 'cancelled'
+            order['updatetime'] = self._timestamp(self.clock())
+
+        return {'status': True, 'message': 'SUCCESS', 'data': {'orderid': order_id}}
+
+    def get_order_book(self):
+        """Get order book"""
+        if not self.logged_in:
+            return []
+
+        self._process_pending()
+        with self._lock:
+            return [
+                {k: v for k, v in order.items() if not k.startswith('_')}
+                for order in self._orders.values()
+            ]
+
+    def get_positions(self):
+        """Get current positions in the SmartAPI position() format"""
+        if not self.logged_in:
+            return []
+
+        self._process_pending()
+        positions = []
+        with self._lock:
+            for symbol, position in self._positions.items():
+                buy_qty = position['buy_qty']
+                sell_qty = position['sell_qty']
+                net_qty = buy_qty - sell_qty
+                buy_avg = position['buy_value'] / buy_qty if buy_qty else 0
+                sell_avg = position['sell_value'] / sell_qty if sell_qty else 0
+                ltp = self._price(symbol) or 0
+
+                if net_qty > 0:
+                    average_price = buy_avg
+                elif net_qty < 0:
+                    average_price = sell_avg
+                else:
+                    average_price = 0
+
+                pnl = position['realised'] + position['sell_value'] - position['buy_value'] + net_qty * ltp
+
+                positions.append({
+                    'tradingsymbol': symbol,
+                    'symboltoken': symbol,
+                    'exchange': 'NFO',
+                    'producttype': 'INTRADAY',
+                    'netqty': str(net_qty),
+                    'buyqty': str(buy_qty),
+                    'sellqty': str(sell_qty),
+                    'buyavgprice': f"{buy_avg:.2f}",
+                    'sellavgprice': f"{sell_avg:.2f}",
+                    'averageprice': f"{average_price:.2f}",
+                    'ltp': f"{ltp:.2f}",
+                    'pnl': f"{pnl:.2f}"
+                })
+        return positions
+
+    def _timestamp(self, epoch):
+        """Order book timestamp in SmartAPI format"""
+        return datetime.fromtimestamp(epoch).strftime("%d-%b-%Y %H:%M:%S")
@@ -0,0 +1,150 @@
+"""
+Batched Quotes
+Resolves any set of instrument tokens with the fewest getMarketData calls:
+requests from different callers within a short window are merged, split into
+batches of at most 50 tokens and each quote is reused for a short TTL
+"""
+
+import logging
+import threading
+import time
+from config import Config
+from metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# getMarketData modes, each returning the fields of the previous one and more
+MODES = ('LTP', 'OHLC', 'FULL')
+
+# SmartAPI limit on tokens per getMarketData request
+MAX_TOKENS = 50
+
+
+class _Batch:
+    __slots__ = ('wanted', 'done')
+
+    def __init__(self):
+        self.wanted = {}  # (exchange, token) -> mode rank
+        self.done = threading.Event()
+
+
+class QuoteService:
+    """Coalescing, TTL-cached quote lookups"""
+
+    def __init__(self, fetch, window=None, ttl=None, batch_size=MAX_TOKENS, clock=time.monotonic):
+        """
+        Args:
+            fetch: Callable(mode, {exchange: [tokens]}) -> list of quotes with
+                   'exchange' and 'symbolToken' keys, or None on failure
+            window: Seconds to wait for other callers before sending a batch
+            ttl: Seconds a quote is served from cache
+            batch_size: Max tokens per fetch call
+            clock: Monotonic time source
+        """
+        self.fetch = fetch
+        self.window = Config.QUOTE_WINDOW if window is None else window
+        self.ttl = Config.QUOTE_TTL if ttl is None else ttl
+        self.batch_size = batch_size
+        self.clock = clock
+        self._cache = {}  # (exchange, token) -> (fetched_at, mode rank, quote)
+        self._batch = None  # batch collecting requests during the current window
+        self._lock = threading.Lock()
+        self.listeners = []  # callables(key, ltp) told about every fetched price
+
+    def get(self, instruments, mode='LTP'):
+        """
+        Quotes for instruments
+
+        Args:
+            instruments: Iterable of (exchange, token)
+            mode: LTP, OHLC or FULL (a cached fuller quote satisfies a lighter mode)
+
+        Returns:
+            dict: (exchange, token) -> quote; instruments that could not be
+                  fetched are missing
+        """
+        rank = MODES.index(mode)
+        keys = {(exchange, str(token)) for exchange, token in instruments}
+        quotes, missing = self._cached(keys, rank)
+        if not missing:
+            return quotes
+
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            for key in missing:
+                batch.wanted[key] = max(batch.wanted.get(key, 0), rank)
+
+        if leader:
+            # Let other callers join this batch, then close it and send it
+            time.sleep(self.window)
+            with self._lock:
+                self._batch = None
+            try:
+                self._flush(batch.wanted)
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait(Config.SOURCE_FETCH_TIMEOUT)
+
+        fetched, _ = self._cached(missing, rank, record=False)
+        quotes.update(fetched)
+        return quotes
+
+    def ltps(self, instruments):
+        """(exchange, token) -> last traded price"""
+        return {key: float(quote['ltp']) for key, quote in self.get(instruments).items()
+                if quote.get('ltp') is not None}
+
+    def _cached(self, keys, rank, record=True):
+        """Split keys into fresh cached quotes and missing keys"""
+        now = self.clock()
+        quotes = {}
+        missing = []
+        for key in keys:
+            entry = self._cache.get(key)
+            hit = entry is not None and now - entry[0] < self.ttl and entry[1] >= rank
+            if record:
+                record_cache('quotes', hit)
+            if hit:
+                quotes[key] = entry[2]
+            else:
+                missing.append(key)
+        return quotes, missing
+
+    def _flush(self, wanted):
+        """Fetch every wanted key, one call per mode and batch_size tokens"""
+        by_rank = {}
+        for key, rank in wanted.items():
+            by_rank.setdefault(rank, []).append(key)
+
+        for rank, keys in by_rank.items():
+            for i in range(0, len(keys), self.batch_size):
+                exchange_tokens = {}
+                for exchange, token in keys[i:i + self.batch_size]:
+                    exchange_tokens.setdefault(exchange, []).append(token)
+                try:
+                    fetched = self.fetch(MODES[rank], exchange_tokens)
+                except Exception as e:
+                    logger.warning("Quote fetch failed: %s", e)
+                    continue
+
+                now = self.clock()
+                for quote in fetched or []:
+                    key = (quote.get('exchange'), str(quote.get('symbolToken')))
+                    self._cache[key] = (now, rank, quote)
+                self._notify(fetched or [])
+
+    def _notify(self, fetched):
+        """Hand fresh LTPs to the listeners (exit checks), whoever asked for the quotes"""
+        for quote in fetched:
+            if quote.get('ltp') is None:
+                continue
+            key = (quote.get('exchange'), str(quote.get('symbolToken')))
+            for listener in self.listeners:
+                try:
+                    listener(key, float(quote['ltp']))
+                except Exception as e:
+                    logger.error("Quote listener failed for %s: %s", key, e)
@@ -0,0 +1,301 @@
+"""
+Session Replay
+Records option chain snapshots and candles to JSON lines and replays them
+through the OptionChain/AngelAPI fetch interfaces on a virtual clock
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from option_chain import OptionChain
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayClock:
+    """Virtual clock running at a multiple of real time, or as fast as possible"""
+
+    def __init__(self, start, speed=1.0):
+        """
+        Initialize replay clock
+
+        Args:
+            start: Virtual epoch time the replay starts at
+            speed: Replay speed multiplier (1 = real time, 100 = 100x);
+                   0 or None runs as fast as possible
+        """
+        self.speed = speed if speed else 0
+        self._virtual = float(start)
+        self._real_start = time.monotonic()
+
+    def time(self):
+        """Current virtual epoch time"""
+        if self.speed:
+            return self._virtual + (time.monotonic() - self._real_start) * self.speed
+        return self._virtual
+
+    def sleep(self, seconds):
+        """Sleep for virtual seconds (returns immediately in as-fast-as-possible mode)"""
+        if seconds <= 0:
+            return
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        else:
+            self._virtual += seconds
+
+
+class _Series:
+    """Time-sorted values of one recorded stream"""
+
+    def __init__(self):
+        self.times = []
+        self.values = []
+
+    def add(self, ts, value):
+        """Append a value, keeping the series sorted by time"""
+        if self.times and ts < self.times[-1]:
+            index = bisect.bisect_right(self.times, ts)
+            self.times.insert(index, ts)
+            self.values.insert(index, value)
+        else:
+            self.times.append(ts)
+            self.values.append(value)
+
+    def upto(self, ts):
+        """Number of values recorded at or before ts"""
+        return bisect.bisect_right(self.times, ts)
+
+    def latest(self, ts):
+        """Last value recorded at or before ts"""
+        index = self.upto(ts)
+        return self.values[index - 1] if index else None
+
+
+class ReplayDataSource:
+    """Serves a recorded session as of the replay clock"""
+
+    def __init__(self, path=None, records=None, clock=None):
+        """
+        Initialize replay data source
+
+        Args:
+            path: JSON lines recording written by SessionRecorder
+            records: Already loaded records (alternative to path)
+            clock: ReplayClock (defaults to as-fast-as-possible from the first record)
+        """
+        self._chains = {}  # symbol -> _Series of option chains
+        self._candles = {}  # (symbol, interval) -> _Series of bars
+        self._ltps = {}  # symbol -> _Series of prices
+
+        if path:
+            records = self._load(path)
+        for record in records or []:
+            self._add(record)
+
+        times = [s.times[0] for s in self._all_series() if s.times]
+        ends = [s.times[-1] for s in self._all_series() if s.times]
+        self.start_time = min(times) if times else time.time()
+        self.end_time = max(ends) if ends else self.start_time
+        self.clock = clock if clock else ReplayClock(self.start_time, speed=0)
+
+        logger.info("Replay loaded: %d chain symbols, %d candle series",
+                    len(self._chains), len(self._candles))
+
+    def _load(self, path):
+        """Read a JSON lines recording"""
+        records = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+        return records
+
+    def _add(self, record):
+        """Index a single record"""
+        kind = record.get('kind')
+        ts = float(record['ts'])
+        symbol = record.get('symbol')
+
+        if kind == 'chain':
+            self._chains.setdefault(symbol, _Series()).add(ts, record['data'])
+        elif kind == 'candle':
+            key = (symbol, record.get('interval', 'FIFTEEN_MINUTE'))
+            self._candles.setdefault(key, _Series()).add(ts, record['data'])
+        elif kind == 'ltp':
+            self._ltps.setdefault(symbol, _Series()).add(ts, float(record['data']))
+
+    def _all_series(self):
+        return list(self._chains.values()) + list(self._candles.values()) + list(self._ltps.values())
+
+    def finished(self):
+        """True once the clock has passed the last recorded event"""
+        return self.clock.time() > self.end_time
+
+    def get_option_chain(self, symbol="NIFTY", strike_count=20):
+        """Latest recorded option chain (treat as read-only)"""
+        series = self._chains.get(symbol)
+        return series.latest(self.clock.time()) if series else None
+
+    def get_nse_data(self, symbol="NIFTY"):
+        """Latest recorded option chain (NSE interface)"""
+        return self.get_option_chain(symbol)
+
+    def get_candle_data(self, symbol="NIFTY", interval="FIFTEEN_MINUTE", count=10):
+        """Last `count` bars that had closed by the replay time"""
+        series = self._candles.get((symbol, interval))
+        if not series:
+            return None
+        end = series.upto(self.clock.time())
+        return series.values[max(0, end - count):end] or None
+
+    def get_ltp(self, symbol="NIFTY"):
+        """Latest recorded price, falling back to the chain's underlying value"""
+        now = self.clock.time()
+        series = self._ltps.get(symbol)
+        if series:
+            price = series.latest(now)
+            if price is not None:
+                return price
+
+        chain = self.get_option_chain(symbol)
+        if chain:
+            return chain[0].get('underlyingValue')
+        return None
+
+
+class ReplayOptionChain(OptionChain):
+    """OptionChain that reads from a replay instead of NSE"""
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+    def get_nse_data(self, symbol="NIFTY"):
+        """Fetch Option Chain from the replay"""
+        return self.source.get_nse_data(symbol)
+
+    def get_live_data(self, symbol="NIFTY"):
+        return self.get_nse_data(symbol)
+
+    def get_mock_data(self, symbol="NIFTY"):
+        """No simulated data during replays - only what was recorded"""
+        return None
+
+
+class SessionRecorder:
+    """Appends live chain snapshots, candles and prices to a JSON lines file"""
+
+    def __init__(self, path):
+        """
+        Initialize recorder
+
+        Args:
+            path: Output file (appended to)
+        """
+        self.path = path
+        self._seen_bars = set()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _write(self, record):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def record_chain(self, symbol, data, ts=None):
+        """Record an option chain snapshot"""
+        if data:
+            self._write({'ts': ts or time.time(), 'kind': 'chain', 'symbol': symbol, 'data': data})
+
+    def record_candles(self, symbol, interval, candles, ts=None):
+        """Record bars not seen before (bars become available at recording time)"""
+        for bar in candles or []:
+            key = (symbol, interval, bar[0])
+            if key in self._seen_bars:
+                continue
+            self._seen_bars.add(key)
+            self._write({'ts': ts or time.time(), 'kind': 'candle', 'symbol': symbol,
+                         'interval': interval, 'data': bar})
+
+    def record_ltp(self, symbol, price, ts=None):
+        """Record a last traded price"""
+        if price is not None:
+            self._write({'ts': ts or time.time(), 'kind': 'ltp', 'symbol': symbol, 'data': price})
+
+
+def run_replay(path, symbol="NIFTY", speed=None, db_path=None):
+    """
+    Run the strategy monitor loop over a recorded session
+
+    Args:
+        path: Recording to replay
+        symbol: Symbol to analyze
+        speed: Replay speed (1, 100, ... or None for as fast as possible)
+        db_path: Trades database for the run (defaults to a file next to the recording)
+
+    Returns:
+        dict: Run summary
+    """
+    from alerts import AlertEngine
+    from paper_broker import PaperBroker
+    from strategy import TradingStrategy
+
+    source = ReplayDataSource(path)
+    clock = ReplayClock(source.start_time, speed=speed)
+    source.clock = clock
+
+    broker = PaperBroker(data_source=source, clock=clock.time)
+    strategy = TradingStrategy(
+        angel_api=broker,
+        option_chain_scraper=ReplayOptionChain(source),
+        db_path=db_path or os.path.splitext(path)[0] + '_trades.db'
+    )
+
+    summary = {'ticks': 0, 'signals': 0}
+    analyze_market = strategy.analyze_market
+
+    def counting_analyze(sym):
+        analysis = analyze_market(sym)
+        summary['ticks'] += 1
+        if analysis and analysis['signal']['action'] != 'WAIT':
+            summary['signals'] += 1
+        return analysis
+
+    def replay_sleep(seconds):
+        clock.sleep(seconds)
+        if source.finished():
+            strategy.monitoring = False
+
+    strategy.analyze_market = counting_analyze
+    strategy.sleep = replay_sleep
+    strategy.exit_engine.on_exit = strategy._exit_position  # exits inline, in virtual time order
+    strategy.clock = clock.time  # expiries, Greeks, snapshot/OI session dates and alerts on replay time
+    strategy.alerts = AlertEngine(sinks=[], clock=clock.time)
+
+    started = time.perf_counter()
+    strategy.monitoring = True
+    strategy._monitor_loop(symbol)
+
+    summary['virtual_seconds'] = round(source.end_time - source.start_time, 1)
+    summary['real_seconds'] = round(time.perf_counter() - started, 3)
+    summary['orders'] = len(broker.get_order_book())
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a recorded session through the strategy')
+    parser.add_argument('path', help='JSON lines recording')
+    parser.add_argument('--symbol', default='NIFTY')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='Replay speed multiplier, 0 = as fast as possible')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(run_replay(args.path, args.symbol, args.speed), indent=2))
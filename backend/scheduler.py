@@ -0,0 +1,196 @@
+"""
+Wall-clock Job Scheduler
+Runs background jobs just after candle boundaries (every N seconds from the
+session open, plus a small offset) on a worker pool, only while the market is
+in session; a run still in progress when its next one is due is skipped
+instead of piling up
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from market_calendar import CALENDAR, IST
+from metrics import SCHEDULER_RUNS, STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+IST_OFFSET = IST.utcoffset(None).total_seconds()
+MAX_WAIT = 60  # Re-check at least this often (clock changes, suspended hosts)
+
+
+class Job:
+    """A function run every `every` seconds, `offset` seconds after each boundary"""
+
+    def __init__(self, name, func, every, offset=None, market_hours=None, immediate=False):
+        """
+        Args:
+            name: Unique job name
+            func: Callable with no arguments
+            every: Interval in seconds (60 = after every 1-minute candle)
+            offset: Seconds after the boundary (default Config.SCHEDULE_OFFSET)
+            market_hours: Only run in session (default Config.MARKET_HOURS_ONLY)
+            immediate: Also run once as soon as the job is added (if in session)
+        """
+        self.name = name
+        self.func = func
+        self.every = every
+        self.offset = Config.SCHEDULE_OFFSET if offset is None else offset
+        self.market_hours = Config.MARKET_HOURS_ONLY if market_hours is None else market_hours
+        self.immediate = immediate
+
+        self.next_run = None
+        self.running = False
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_run = None
+        self.last_lag = None
+        self.last_duration = None
+
+    def snapshot(self):
+        return {
+            'every': self.every,
+            'next_run': CALENDAR.now(self.next_run).isoformat() if self.next_run else None,
+            'last_run': CALENDAR.now(self.last_run).isoformat() if self.last_run else None,
+            'last_lag': round(self.last_lag, 3) if self.last_lag is not None else None,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'running': self.running,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'failures': self.failures
+        }
+
+
+class Scheduler:
+    """Dispatches due jobs from one thread onto a worker pool"""
+
+    def __init__(self, calendar=None, workers=None, clock=time.time):
+        """
+        Args:
+            calendar: MarketCalendar for market-hours jobs
+            workers: Jobs that may run at the same time
+            clock: Wall-clock time source
+        """
+        self.calendar = calendar or CALENDAR
+        self.workers = workers or Config.SCHEDULER_WORKERS
+        self.clock = clock
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def next_run(self, job, after):
+        """First boundary + offset strictly after `after` (None if no session is ahead)"""
+        if not job.market_hours:
+            # Boundaries counted from midnight IST (every should divide a day)
+            local = after + IST_OFFSET - job.offset
+            return (local // job.every + 1) * job.every + job.offset - IST_OFFSET
+
+        # Boundaries counted from the session open, last one at the close
+        for start, end in self.calendar.sessions(after):
+            first = start + job.offset
+            if after < first:
+                return first
+            candidate = first + ((after - first) // job.every + 1) * job.every
+            if candidate <= end + job.offset:
+                return candidate
+        return None
+
+    def add(self, job):
+        """Schedule a job (replacing one with the same name)"""
+        now = self.clock()
+        job.next_run = self.next_run(job, now)
+        if job.immediate and (not job.market_hours or self.calendar.is_open(now)):
+            job.next_run = now
+        with self._lock:
+            self._jobs[job.name] = job
+        if job.next_run is None:
+            logger.warning("Job %s has no upcoming session to run in", job.name)
+        elif job.market_hours and not self.calendar.is_open(now):
+            logger.info("Market closed - job %s first runs at %s", job.name, self.calendar.now(job.next_run))
+        self._wakeup.set()
+        return job
+
+    def remove(self, name):
+        with self._lock:
+            self._jobs.pop(name, None)
+        self._wakeup.set()
+
+    def start(self):
+        """Run the dispatcher in a background thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self.run, name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def run(self):
+        """Dispatch jobs in the calling thread until stop()"""
+        while not self._stopped.is_set():
+            now = self.clock()
+            with self._lock:
+                jobs = list(self._jobs.values())
+            due = [job for job in jobs if job.next_run is not None and job.next_run <= now]
+            for job in due:
+                self._dispatch(job, now)
+
+            upcoming = [job.next_run for job in jobs if job.next_run is not None and job.next_run > now]
+            wait = min(upcoming) - now if upcoming else MAX_WAIT
+            self._wakeup.wait(min(max(wait, 0), MAX_WAIT))
+            self._wakeup.clear()
+
+    def _dispatch(self, job, now):
+        scheduled = job.next_run
+        job.next_run = self.next_run(job, max(now, scheduled))
+        if job.running:
+            job.skipped += 1
+            SCHEDULER_RUNS.inc(job=job.name, result='skipped')
+            logger.warning("Job %s still running - skipped the %s run", job.name, self.calendar.now(scheduled))
+            return
+        job.running = True
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+        self._executor.submit(self._run, job, scheduled)
+
+    def _run(self, job, scheduled):
+        started = self.clock()
+        job.last_run = started
+        job.last_lag = started - scheduled
+        perf_started = time.perf_counter()
+        try:
+            job.func()
+            SCHEDULER_RUNS.inc(job=job.name, result='ok')
+        except Exception as e:
+            job.failures += 1
+            SCHEDULER_RUNS.inc(job=job.name, result='failed')
+            logger.error("Job %s failed: %s", job.name, e)
+        finally:
+            job.last_duration = time.perf_counter() - perf_started
+            STAGE_LATENCY.observe(job.last_duration, stage=f'job:{job.name}')
+            job.runs += 1
+            job.running = False
+
+    def snapshot(self):
+        """{name: job state} plus whether the market is in session"""
+        with self._lock:
+            jobs = dict(self._jobs)
+        return {
+            'market_open': self.calendar.is_open(self.clock()),
+            'jobs': {name: job.snapshot() for name, job in sorted(jobs.items())}
+        }
+
+
+SCHEDULER = Scheduler()
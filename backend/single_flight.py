@@ -0,0 +1,66 @@
+"""
+Single-flight Calls
+Collapses concurrent calls for the same key into one execution - callers that
+arrive while a call is in flight wait for it and share its result
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-key call coalescing (safe under threads and gevent)"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) unless a call for key is already running
+
+        Args:
+            key: Hashable key identifying the work (e.g. the symbol)
+            func: Callable to run
+
+        Returns:
+            The result of the in-flight (or new) call; its exception is re-raised
+            in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self, key):
+        """Whether a call for key is currently running"""
+        return key in self._calls
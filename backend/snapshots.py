@@ -0,0 +1,142 @@
+"""
+Versioned Response Snapshots
+Polling endpoints publish their payload once per change; readers get the same
+serialized (and compressed) bytes with an ETag so unchanged data returns 304
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from flask import Response, request
+from json_provider import dumps_bytes
+from metrics import record_cache
+
+try:
+    import brotli  # optional, smaller than gzip for JSON
+except ImportError:
+    brotli = None
+
+# Below this size compression costs more than it saves
+MIN_COMPRESS_BYTES = 512
+
+
+def serialize(payload):
+    """Compact JSON bytes, encoded once per published version"""
+    return dumps_bytes(payload)
+
+
+class Snapshot:
+    """One published version of a payload"""
+
+    __slots__ = ('version', 'etag', 'body', 'source', 'published', '_encoded', '_lock')
+
+    def __init__(self, version, body, source=None):
+        self.version = version
+        self.body = body
+        self.source = source
+        self.published = time.time()
+        self.etag = hashlib.blake2b(body, digest_size=10).hexdigest()
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding):
+        """Body compressed with encoding ('br' or 'gzip'), computed once"""
+        data = self._encoded.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._encoded.get(encoding)
+                if data is None:
+                    if encoding == 'br':
+                        data = brotli.compress(self.body, quality=5)
+                    else:
+                        data = gzip.compress(self.body, compresslevel=6)
+                    self._encoded[encoding] = data
+        return data
+
+    def age(self):
+        """Seconds since this snapshot was published"""
+        return time.time() - self.published
+
+
+class SnapshotStore:
+    """Latest snapshot per key; the version only moves when the content changes"""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def publish(self, key, payload, source=None):
+        """
+        Serialize and store payload under key
+
+        Args:
+            key: Snapshot name (e.g. 'market-data', ('chain', 'NIFTY'))
+            payload: JSON-serializable data
+            source: Optional version of the data it was built from (see current())
+
+        Returns:
+            Snapshot: The new snapshot, or the existing one if content is identical
+        """
+        body = serialize(payload)
+        with self._lock:
+            previous = self._snapshots.get(key)
+            if previous is not None and previous.body == body:
+                previous.source = source
+                previous.published = time.time()
+                return previous
+            snapshot = Snapshot(previous.version + 1 if previous else 1, body, source)
+            self._snapshots[key] = snapshot
+            return snapshot
+
+    def get(self, key):
+        """Latest snapshot for key (or None)"""
+        return self._snapshots.get(key)
+
+    def current(self, key, source=None, max_age=None):
+        """
+        Latest snapshot if it is still valid
+
+        Args:
+            key: Snapshot name
+            source: Required source version (None = any)
+            max_age: Maximum age in seconds (None = no limit)
+        """
+        snapshot = self._snapshots.get(key)
+        valid = (snapshot is not None
+                 and (source is None or snapshot.source == source)
+                 and (max_age is None or snapshot.age() < max_age))
+        record_cache(key if isinstance(key, str) else key[0], valid)
+        return snapshot if valid else None
+
+
+def _accepted_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def snapshot_response(snapshot):
+    """
+    Response for a snapshot honoring If-None-Match and Accept-Encoding
+
+    Returns 304 with no body when the client already has this version.
+    """
+    headers = {
+        'ETag': f'"{snapshot.etag}"',
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+        'X-Snapshot-Version': str(snapshot.version)
+    }
+    if request.if_none_match.contains_weak(snapshot.etag):
+        return Response(status=304, headers=headers)
+
+    body = snapshot.body
+    encoding = _accepted_encoding() if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        body = snapshot.encoded(encoding)
+        headers['Content-Encoding'] = encoding
+    return Response(body, status=200, headers=headers, mimetype='application/json')
@@ -0,0 +1,174 @@
+"""
+Option Chain Source Selection
+Runs interchangeable data sources best-first: the next source is started
+(hedged) once the current one is slower than its usual p95 latency or fails,
+and the first valid result wins. Per-source latency and success scores decide
+the order, so a fetch tracks the fastest healthy source.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import Config
+from metrics import SOURCE_RESULTS
+
+logger = logging.getLogger(__name__)
+
+class SourceScore:
+    """Running latency/success statistics for one source"""
+
+    def __init__(self, alpha=0.2, window=50, failure_penalty=None):
+        """
+        Args:
+            alpha: Weight of the newest call in the moving averages
+            window: Recent successful latencies kept for the p95
+            failure_penalty: Seconds a failed call costs (default Config.SOURCE_FETCH_TIMEOUT)
+        """
+        self.alpha = alpha
+        self.failure_penalty = Config.SOURCE_FETCH_TIMEOUT if failure_penalty is None else failure_penalty
+        self.latency = None  # moving average, seconds
+        self.success = 1.0  # moving average of 1 (valid) / 0 (failed)
+        self.calls = 0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed, ok):
+        with self._lock:
+            self.calls += 1
+            self.latency = elapsed if self.latency is None else \
+                self.latency + self.alpha * (elapsed - self.latency)
+            self.success += self.alpha * ((1.0 if ok else 0.0) - self.success)
+            if ok:
+                self._recent.append(elapsed)
+
+    def cost(self):
+        """Expected seconds to a valid result (0 until the source has been tried)"""
+        if self.latency is None:
+            return 0.0
+        # Failures cost the whole fetch timeout, so a source that fails instantly
+        # (e.g. breaker open) ranks behind a slower healthy one
+        return self.latency + (1.0 - self.success) * self.failure_penalty
+
+    def p95(self):
+        """95th percentile of recent successful latencies (None with too few samples)"""
+        with self._lock:
+            if len(self._recent) < 5:
+                return None
+            recent = sorted(self._recent)
+        return recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+
+    def snapshot(self):
+        p95 = self.p95()
+        return {
+            'calls': self.calls,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'success': round(self.success, 2),
+            'p95': round(p95, 3) if p95 is not None else None
+        }
+
+
+class SourceSelector:
+    """Hedged fetch across sources ordered by score"""
+
+    def __init__(self, name, sources, is_valid=bool, race_width=None, hedge_delay=None,
+                 min_hedge_delay=None, timeout=None):
+        """
+        Args:
+            name: Selector name for metrics (e.g. 'chain')
+            sources: [(source name, callable)] in preferred order; each callable
+                     takes the fetch arguments and returns a result or None
+            is_valid: Whether a result is usable (default: truthy)
+            race_width: Sources started at once (1 hedges, 2+ races)
+            hedge_delay: Delay before hedging while a source has no p95 yet
+            min_hedge_delay: Lower bound for the p95-based delay
+            timeout: Give up on the whole fetch after this many seconds
+        """
+        self.name = name
+        self.sources = list(sources)
+        self.is_valid = is_valid
+        self.race_width = max(1, race_width or Config.SOURCE_RACE_WIDTH)
+        self.hedge_delay = hedge_delay if hedge_delay is not None else Config.SOURCE_HEDGE_DELAY
+        self.min_hedge_delay = min_hedge_delay if min_hedge_delay is not None else Config.SOURCE_HEDGE_MIN_DELAY
+        self.timeout = timeout or Config.SOURCE_FETCH_TIMEOUT
+        self.scores = {source: SourceScore(failure_penalty=self.timeout) for source, _ in self.sources}
+        # Own pool per selector so nested selectors (chain -> nse) never wait on
+        # each other's workers; threads are greenlets under gevent workers
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(self.sources),
+                                            thread_name_prefix=f'source-{name}')
+
+    def ranked(self):
+        """Sources cheapest first; untried sources keep their configured order up front"""
+        order = {source: i for i, (source, _) in enumerate(self.sources)}
+        return sorted(self.sources, key=lambda item: (self.scores[item[0]].cost(), order[item[0]]))
+
+    def _delay(self, source):
+        p95 = self.scores[source].p95()
+        return self.hedge_delay if p95 is None else max(p95, self.min_hedge_delay)
+
+    def _call(self, source, func, args, kwargs):
+        """Run one source and score it (also when its result is no longer needed)"""
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            logger.warning("%s source %s failed: %.100s", self.name, source, e)
+            result = None
+        ok = self.is_valid(result)
+        self.scores[source].record(time.perf_counter() - started, ok)
+        return result if ok else None
+
+    def fetch(self, *args, **kwargs):
+        """
+        First valid result from the sources
+
+        Returns:
+            (source name, result), or (None, None) if every source failed or the
+            timeout passed
+        """
+        queue = list(self.ranked())
+        deadline = time.monotonic() + self.timeout
+        pending = {}
+        next_hedge = None
+
+        def launch():
+            source, func = queue.pop(0)
+            pending[self._executor.submit(self._call, source, func, args, kwargs)] = source
+            return time.monotonic() + self._delay(source)
+
+        while queue and len(pending) < self.race_width:
+            next_hedge = launch()
+
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    logger.warning("%s fetch timed out after %ss", self.name, self.timeout)
+                    break
+                wait_until = min(deadline, next_hedge) if queue else deadline
+                done, _ = wait(pending, timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    source = pending.pop(future)
+                    result = future.result()
+                    if result is not None:
+                        SOURCE_RESULTS.inc(selector=self.name, source=source, result='won')
+                        return source, result
+                    SOURCE_RESULTS.inc(selector=self.name, source=source, result='failed')
+
+                # Replace a failed source at once, hedge when the current one is slower than its p95
+                if queue and (done or time.monotonic() >= next_hedge):
+                    if not done:
+                        SOURCE_RESULTS.inc(selector=self.name, source=queue[0][0], result='hedged')
+                    next_hedge = launch()
+        finally:
+            # Sources not started yet are dropped; running ones finish in the background
+            for future in pending:
+                future.cancel()
+
+        return None, None
+
+    def snapshot(self):
+        """Scores in the order the next fetch will use"""
+        return {source: self.scores[source].snapshot() for source, _ in self.ranked()}
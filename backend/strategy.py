@@ -3,44 +3,116 @@ PCR-based Trading Strategy
 Implements PCR, Max Pain, and Heavy Strike analysis for trading signals
 """
 
+import itertools
 import logging
+import queue
+import re
 import threading
 import time
 import sqlite3
 from datetime import datetime
 from option_chain import OptionChain
-from angel_api import AngelAPI
+from paper_broker import PaperBroker
+from exit_engine import ExitEngine
+from single_flight import SingleFlight
+from source_selector import SourceSelector
+from strategy_registry import MarketSnapshot, StrategyRegistry
+from scheduler import SCHEDULER, Job
+from market_calendar import CALENDAR
+from alerts import AlertEngine
+from metrics import STAGE_LATENCY, timed
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Strike and option type at the end of an NFO trading symbol, e.g. BANKNIFTY28OCT2654000CE
+OPTION_SYMBOL = re.compile(r'\d{2}[A-Z]{3}\d{2}(\d+(?:\.\d+)?)(CE|PE)$')
+
 
 class TradingStrategy:
     """PCR-based trading strategy implementation"""
     
-    def __init__(self, angel_api=None, option_chain_scraper=None):
+    def __init__(self, angel_api=None, option_chain_scraper=None, db_path=None, login=True):
         """
         Initialize trading strategy
         
         Args:
-            angel_api: AngelAPI instance (optional, will create new if not provided)
+            angel_api: AngelAPI instance (optional, will create new if not provided;
+                       a PaperBroker when PAPER_TRADING is enabled)
             option_chain_scraper: OptionChain instance (optional)
+            db_path: Trades database path (optional, defaults to Config.DATABASE_PATH)
+            login: Log in to the broker now (False leaves it to the caller, e.g. a
+                   background task, so construction never waits on the network)
         """
         self.oc = option_chain_scraper if option_chain_scraper else OptionChain()
-        self.angel = angel_api if angel_api else AngelAPI()
+        if angel_api:
+            self.angel = angel_api
+        elif Config.PAPER_TRADING:
+            self.angel = PaperBroker()
+        else:
+            from angel_api import AngelAPI
+            self.angel = AngelAPI()
         
         # Login if not already logged in
-        if not self.angel.is_logged_in():
+        if login and not self.angel.is_logged_in():
             self.angel.login()
         
         self.monitoring = False
-        self.monitor_thread = None
-        self.db_path = '../database/trades.db'
+        self.monitor_job = None  # scheduler job name while monitoring
+        self.sleep = time.sleep  # Replaced by a virtual clock during replays
+        self.clock = time.time  # Time the analysis runs at (the replay's virtual time in replays)
+        self.recorder = None
+        if Config.RECORD_SESSION_PATH:
+            from replay_data import SessionRecorder
+            self.recorder = SessionRecorder(Config.RECORD_SESSION_PATH)
+        self.db_path = db_path if db_path else Config.DATABASE_PATH
+        self.trades_version = 0  # bumped on every trades table write
+        self._trade_writes = itertools.count(1)
         self._init_database()
         
         # Strategy parameters from config
         self.profit_target = Config.PROFIT_TARGET  # 70% profit target
         self.stop_loss = Config.STOP_LOSS  # 30% stop loss
+        self.manage_external_positions = Config.MANAGE_EXTERNAL_POSITIONS  # exits for positions not opened here
+        
+        # Target/SL book checked on every price update
+        self.exit_engine = ExitEngine(on_exit=self._queue_exit)
+        self._exits_pending = set()  # instruments with an exit triggered, until the position is flat
+        # Exit orders go out from one worker thread, so price listeners (e.g. the
+        # quote batch leader other callers wait on) never block on an order call
+        self._exit_orders = queue.Queue()
+        self._exit_worker = None
+        if hasattr(self.angel, 'add_price_listener'):
+            # Every quote the broker fetches (or paper price set) is checked against the levels
+            self.angel.add_price_listener(self.on_price_update)
+        
+        # Shared by request handlers, the updater and the monitor loop
+        self._analysis = SingleFlight()  # one analyze_market per symbol at a time
+        self._trade_lock = threading.Lock()  # serializes order placement
+        self._monitor_lock = threading.Lock()
+        
+        # Signal, PCR, max-pain and exit alerts, delivered off the analysis path
+        self.alerts = AlertEngine()
+        
+        # Streaming indicators per symbol, fed only the bars not seen yet
+        self._indicators = {}
+        
+        # Session OI/premium history per symbol for buildup, PCR and max-pain drift
+        self._oi_series = {}
+        
+        # Angel One and NSE hedged best-first, ordered by latency/success
+        self._chain_sources = SourceSelector('chain', [
+            ('angel', self._fetch_angel_chain),
+            ('nse', self._fetch_nse_chain)
+        ])
+        
+        # Signal generators, all evaluated on one snapshot per tick
+        self.strategies = StrategyRegistry()
+        self.strategies.register('candles', lambda snap: self.generate_signal_with_candles(
+            snap.pcr, snap.max_pain, snap.current_price, snap.candles,
+            dict(snap.indicators) if snap.indicators else None, snap.frames))
+        self.strategies.register('pcr', lambda snap: self.generate_signal(snap.pcr, snap.max_pain, snap.current_price))
+        self.strategies.load_plugins(Config.STRATEGY_PLUGINS)
         
     def _init_database(self):
         """Initialize SQLite database for trade history"""
@@ -63,16 +135,22 @@ class TradingStrategy:
                     pnl REAL,
                     pnl_percentage REAL,
                     exit_reason TEXT,
-                    order_id TEXT
+                    order_id TEXT,
+                    strategy TEXT
                 )
             ''')
             
+            # Databases created before strategies were tagged
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(trades)')]
+            if 'strategy' not in columns:
+                cursor.execute('ALTER TABLE trades ADD COLUMN strategy TEXT')
+            
             conn.commit()
             conn.close()
             logger.info("Database initialized")
             
         except Exception as e:
-            logger.error(f"Error initializing database: {str(e)}")
+            logger.error("Error initializing database: %s", e)
     
     def start_monitoring(self, symbol='NIFTY'):
         """
@@ -81,129 +159,207 @@ class TradingStrategy:
         Args:
             symbol: Symbol to monitor
         """
-        if self.monitoring:
-            logger.warning("Monitoring already active")
-            return
-        
-        self.monitoring = True
-        self.monitor_thread = threading.Thread(
-            target=self._monitor_loop,
-            args=(symbol,),
-            daemon=True
-        )
-        self.monitor_thread.start()
-        logger.info(f"Started monitoring {symbol}")
+        with self._monitor_lock:
+            if self.monitoring:
+                logger.warning("Monitoring already active")
+                return
+            
+            self.monitoring = True
+            self.monitor_job = f"monitor:{symbol}"
+            SCHEDULER.add(Job(self.monitor_job, lambda: self._monitor_tick(symbol), Config.MONITOR_INTERVAL))
+            SCHEDULER.start()
+        logger.info("Started monitoring %s", symbol)
     
     def stop_monitoring(self):
         """Stop monitoring"""
-        self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        with self._monitor_lock:
+            self.monitoring = False
+            if self.monitor_job:
+                SCHEDULER.remove(self.monitor_job)
+                self.monitor_job = None
         logger.info("Stopped monitoring")
     
+    def _monitor_tick(self, symbol):
+        """
+        One monitoring pass: analyze the market and check open positions
+        
+        Args:
+            symbol: Symbol to monitor
+        
+        Returns:
+            bool: False if the market could not be analyzed
+        """
+        # Analyze market and generate signals
+        analysis = self.analyze_market(symbol)
+        
+        if not analysis:
+            logger.warning("Failed to analyze market")
+            return False
+        
+        # Log analysis
+        logger.info("PCR: %s, Max Pain: %s, Signal: %s",
+                    analysis['pcr'], analysis['max_pain'], analysis['signal']['action'])
+        
+        # Execute strategy if signal generated
+        if analysis['signal']['action'] != 'WAIT':
+            # Auto-execute can be enabled here
+            # self.execute_trade(analysis['signal'])
+            pass
+        
+        # Check open positions
+        self._monitor_positions()
+        return True
+    
     def _monitor_loop(self, symbol):
         """
-        Main monitoring loop
+        Monitoring loop on self.sleep, used by replays (live monitoring runs
+        _monitor_tick from the scheduler)
         
         Args:
             symbol: Symbol to monitor
         """
         while self.monitoring:
             try:
-                # Analyze market and generate signals
-                analysis = self.analyze_market(symbol)
-                
-                if not analysis:
-                    logger.warning("Failed to analyze market")
-                    time.sleep(10)
-                    continue
-                
-                # Log analysis
-                logger.info(f"PCR: {analysis['pcr']}, Max Pain: {analysis['max_pain']}, "
-                          f"Signal: {analysis['signal']['action']}")
-                
-                # Execute strategy if signal generated
-                if analysis['signal']['action'] != 'WAIT':
-                    # Auto-execute can be enabled here
-                    # self.execute_trade(analysis['signal'])
-                    pass
-                
-                # Check open positions
-                self._monitor_positions()
-                
-                # Wait before next iteration
-                time.sleep(5)
-                
+                self.sleep(5 if self._monitor_tick(symbol) else 10)
             except Exception as e:
-                logger.error(f"Error in monitor loop: {str(e)}")
-                time.sleep(10)
+                logger.error("Error in monitor loop: %s", e)
+                self.sleep(10)
     
     def analyze_market(self, symbol="BANKNIFTY"):
-        """Main strategy logic - Now with 15-min candle prediction"""
+        """
+        Main strategy logic - Now with 15-min candle prediction
+        
+        Concurrent calls for the same symbol share one fetch and analysis.
+        """
+        return self._analysis.do(symbol, self._timed_analyze_market, symbol)
+    
+    def _timed_analyze_market(self, symbol):
+        with timed(STAGE_LATENCY, stage='total'):
+            analysis = self._analyze_market(symbol)
+        self.alerts.observe(symbol, analysis)
+        return analysis
+    
+    def _analyze_market(self, symbol):
+        """Fetch, analyze and generate a signal, timing each stage"""
         try:
-            # Try Angel One first for LIVE data
-            df = None
+            # LIVE data from whichever of Angel One / NSE answers first
             current_price = None
             candles = None
+            now = self.clock()
             
-            if self.angel.is_logged_in():
-                logger.info(f"🔄 Fetching LIVE data from Angel One for {symbol}")
-                df = self.angel.get_option_chain(symbol)
-                
-                if df and len(df) > 0:
-                    logger.info(f"✅ Got {len(df)} strikes from Angel One")
-                    # Get current price from Angel One data
-                    current_price = df[0].get('underlyingValue', 0)
-                else:
-                    logger.warning("Angel One option chain returned empty, trying NSE...")
-                
-                # Fetch 15-minute candle data
-                candles = self.angel.get_candle_data(symbol, interval="FIFTEEN_MINUTE", count=10)
+            with timed(STAGE_LATENCY, stage='fetch_chain'):
+                source, df = self._chain_sources.fetch(symbol)
             
-            # Fallback to NSE if Angel One fails
-            if not df or len(df) == 0:
-                logger.info(f"Trying NSE data for {symbol}...")
-                df = self.oc.get_nse_data(symbol)
-                
-                if not df or len(df) == 0:
-                    logger.warning(f"Failed to fetch option chain from both sources")
+            if df:
+                logger.debug("✅ Got %d strikes from %s", len(df), source)
+                current_price = df[0].get('underlyingValue', 0)
+            else:
+                logger.warning("Failed to fetch option chain from both sources, using simulated data")
+                df = self.oc.get_mock_data(symbol)
+                if not df:
                     return None
             
-            # Calculate metrics
-            pcr = self.oc.calculate_pcr(df)
-            max_pain = self.oc.get_max_pain(df)
-            heavy_call, heavy_put = self.oc.get_heavy_strikes(df)
+            frames = None
+            candles_1m = None
+            interval = "ONE_MINUTE" if Config.MULTI_TIMEFRAME else "FIFTEEN_MINUTE"
+            if self.angel.is_logged_in():
+                # Fetch 15-minute candle data (one 1-minute series for every timeframe in multi-timeframe mode)
+                with timed(STAGE_LATENCY, stage='fetch_candles'):
+                    # Enough bars to warm up the slowest indicator, not just the prediction's last few
+                    from indicators import WARM_UP_BARS
+                    if Config.MULTI_TIMEFRAME:
+                        from multi_timeframe import build_timeframes, parse_weights
+                        candles_1m = self.angel.get_candle_data(symbol, interval=interval,
+                                                                count=max(375, WARM_UP_BARS * 15))
+                        frames = build_timeframes(candles_1m, parse_weights(Config.TIMEFRAME_WEIGHTS))
+                        candles = frames.get(15)
+                    else:
+                        candles = self.angel.get_candle_data(symbol, interval=interval, count=WARM_UP_BARS)
+            
+            if self.recorder:
+                self.recorder.record_chain(symbol, df)
+                self.recorder.record_candles(symbol, interval, candles_1m if Config.MULTI_TIMEFRAME else candles)
+            
+            # IV and Greeks for every strike in one vectorized pass
+            with timed(STAGE_LATENCY, stage='greeks'):
+                try:
+                    from greeks import add_greeks
+                    df = add_greeks(df, now=CALENDAR.now(now))
+                except Exception as e:
+                    logger.warning("Could not compute Greeks: %s", e)
+            
+            # Calculate metrics per expiry - signals use the nearest expiry only
+            with timed(STAGE_LATENCY, stage='analytics'):
+                by_expiry = self.oc.analyze_expiries(df, symbol, today=CALENDAR.now(now).date())
+            nearest = by_expiry['expiries'].get(by_expiry['nearest'], {})
+            monthly = by_expiry['expiries'].get(by_expiry['monthly'], {})
+            pcr = nearest.get('pcr', 0)
+            max_pain = nearest.get('max_pain', 0)
+            heavy_call = nearest.get('heavy_call', 0)
+            heavy_put = nearest.get('heavy_put', 0)
             
             # Get current price if not already fetched
             if current_price is None or current_price == 0:
                 if df and len(df) > 0:
                     current_price = df[0].get('underlyingValue', 0)
-                    logger.info(f"Using underlying value from data: {current_price}")
+                    logger.debug("Using underlying value from data: %s", current_price)
                 else:
                     logger.warning("Could not get current price from any source")
                     current_price = 0
             
-            # Generate signal with candle prediction
-            signal = self.generate_signal_with_candles(pcr, max_pain, current_price, candles)
+            # Every registered strategy evaluates the same read-only snapshot
+            with timed(STAGE_LATENCY, stage='signal'):
+                # 15-minute bars in both modes: an aggregated frame's last bucket is partial
+                # until its 15 minutes are up, so it is only peeked at like a forming bar
+                indicators = self._update_indicators(symbol, candles, 15, now)
+                snapshot = MarketSnapshot(
+                    symbol, current_price, pcr, max_pain, heavy_call, heavy_put,
+                    expiry=by_expiry['nearest'], monthly=monthly,
+                    chain_rows=by_expiry['index'].get(by_expiry['nearest']),
+                    candles=candles, frames=frames, indicators=indicators, timestamp=now
+                )
+                signals = self.strategies.evaluate(snapshot)
+                signal = signals.get(Config.PRIMARY_STRATEGY) or next(iter(signals.values()), {'action': 'WAIT'})
+            
+            with timed(STAGE_LATENCY, stage='oi_history'):
+                self._update_oi(snapshot)
             
             return {
                 'pcr': pcr,
                 'max_pain': max_pain,
                 'heavy_call': heavy_call,
                 'heavy_put': heavy_put,
+                'expiry': by_expiry['nearest'],
+                'monthly': monthly,
                 'current_price': current_price,
-                'signal': signal
+                'indicators': indicators,
+                'signal': signal,
+                'signals': signals
             }
         except Exception as e:
-            logger.error(f"Error analyzing market: {str(e)}")
+            logger.error("Error analyzing market: %s", e)
             return None
     
+    def source_scores(self):
+        """Latency/success scores of the option chain sources, best first"""
+        return {'chain': self._chain_sources.snapshot(), 'nse': self.oc.source_scores()}
+    
+    def _fetch_angel_chain(self, symbol):
+        """Option chain from Angel One (None when not logged in)"""
+        if not self.angel.is_logged_in():
+            return None
+        return self.angel.get_option_chain(symbol)
+    
+    def _fetch_nse_chain(self, symbol):
+        """Option chain from NSE without the simulated-data fallback"""
+        return self.oc.get_live_data(symbol)
+    
     def generate_signal(self, pcr, max_pain, current_price):
         """Generate BUY/SELL/WAIT signal (legacy method)"""
         
         # Validate inputs
         if pcr == 0 or max_pain == 0 or current_price == 0:
-            logger.warning(f"Invalid data - PCR: {pcr}, Max Pain: {max_pain}, Price: {current_price}")
+            logger.warning("Invalid data - PCR: %s, Max Pain: %s, Price: %s", pcr, max_pain, current_price)
             return {'action': 'WAIT', 'confidence': 0, 'reason': 'Insufficient data'}
         
         # Super Bullish
@@ -245,20 +401,56 @@ class TradingStrategy:
         
         return {'action': 'WAIT', 'confidence': 0, 'reason': 'No trading setup'}
     
-    def generate_signal_with_candles(self, pcr, max_pain, current_price, candles=None):
+    def _update_indicators(self, symbol, candles, minutes, now=None):
+        """
+        Feed new closed candles to the symbol's indicators (O(1) per new bar), return their values
+        
+        A last candle that has not closed yet is only peeked at, never folded in.
+        
+        Args:
+            symbol: Symbol
+            candles: Candles, oldest first
+            minutes: Bar length of the candles
+            now: Epoch time the bars are judged closed at (defaults to now)
+        """
+        if not candles:
+            return None
+        from indicators import IndicatorSet
+        forming = not CALENDAR.bar_closed(candles[-1][0], minutes, now)
+        return self._indicators.setdefault(symbol, IndicatorSet()).on_candles(candles, forming)
+    
+    def _update_oi(self, snapshot):
+        """Append the snapshot's chain to the symbol's session OI history"""
+        from oi_analytics import OISeries
+        self._oi_series.setdefault(snapshot.symbol, OISeries()).update(snapshot)
+    
+    def oi_history(self, symbol):
+        """Session OI history (OISeries) of a symbol, None before its first analysis"""
+        return self._oi_series.get(symbol)
+    
+    def generate_signal_with_candles(self, pcr, max_pain, current_price, candles=None, indicators=None,
+                                     frames=None):
         """
         Enhanced signal generation with 15-min candle prediction
+        
+        indicators: optional IndicatorSet.snapshot() used by the prediction
+        frames: optional {minutes: candles} - predict on every timeframe and
+                combine them with TIMEFRAME_WEIGHTS instead
         """
         from candle_prediction import predict_next_candle, get_trading_recommendation
         
         # Validate inputs
         if pcr == 0 or max_pain == 0 or current_price == 0:
-            logger.warning(f"Invalid data - PCR: {pcr}, Max Pain: {max_pain}, Price: {current_price}")
+            logger.warning("Invalid data - PCR: %s, Max Pain: %s, Price: %s", pcr, max_pain, current_price)
             return {'action': 'WAIT', 'confidence': 0, 'reason': 'Insufficient data'}
         
         # If candles available, use prediction
         if candles and len(candles) >= 3:
-            candle_pred = predict_next_candle(candles, pcr, max_pain, current_price)
+            if frames:
+                from multi_timeframe import predict_multi_timeframe
+                candle_pred = predict_multi_timeframe(frames, pcr, max_pain, current_price, indicators=indicators)
+            else:
+                candle_pred = predict_next_candle(candles, pcr, max_pain, current_price, indicators)
             signal = get_trading_recommendation(candle_pred, pcr, max_pain, current_price)
             
             # Add candle prediction info to signal
@@ -267,8 +459,10 @@ class TradingStrategy:
                 'confidence': candle_pred['confidence'],
                 'reason': candle_pred.get('reason', '')
             }
+            if 'timeframes' in candle_pred:
+                signal['candle_prediction']['timeframes'] = candle_pred['timeframes']
             
-            logger.info(f"🕯️ Next candle: {candle_pred['direction']} ({candle_pred['confidence']}%)")
+            logger.debug("🕯️ Next candle: %s (%s%%)", candle_pred['direction'], candle_pred['confidence'])
             
             if signal['action'] != 'WAIT':
                 return signal
@@ -354,7 +548,12 @@ class TradingStrategy:
         }
     
     def execute_trade(self, signal):
-        """Auto execute trade"""
+        """Auto execute trade (one order at a time, so repeated clicks cannot race)"""
+        with self._trade_lock:
+            return self._execute_trade(signal)
+    
+    def _execute_trade(self, signal):
+        """Place the order for a signal and record the trade"""
         try:
             if signal['action'] == 'WAIT':
                 logger.info("No trade setup - waiting for signal")
@@ -372,7 +571,7 @@ class TradingStrategy:
             # Save trade to database
             if order:
                 self._save_trade({
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': datetime.fromtimestamp(self.clock()).isoformat(),
                     'symbol': symbol,
                     'strike': signal['entry'],
                     'option_type': signal['type'],
@@ -384,12 +583,13 @@ class TradingStrategy:
                     'pnl': None,
                     'pnl_percentage': None,
                     'exit_reason': None,
-                    'order_id': order.get('data', {}).get('orderid') if isinstance(order, dict) else None
+                    'order_id': order.get('data', {}).get('orderid') if isinstance(order, dict) else None,
+                    'strategy': signal.get('strategy')
                 })
             
             return order
         except Exception as e:
-            logger.error(f"Error executing trade: {str(e)}")
+            logger.error("Error executing trade: %s", e)
             return None
     
     def _analyze_and_trade(self, chain_data):
@@ -399,44 +599,226 @@ class TradingStrategy:
             analysis = self.analyze_market(symbol)
             
             if analysis and analysis['signal']['action'] != 'WAIT':
-                logger.info(f"Trade signal: {analysis['signal']}")
+                logger.info("Trade signal: %s", analysis['signal'])
                 # Auto-execute can be enabled here
                 # self.execute_trade(analysis['signal'])
                 
         except Exception as e:
-            logger.error(f"Error in analyze and trade: {str(e)}")
+            logger.error("Error in analyze and trade: %s", e)
     
     def _monitor_positions(self):
-        """Monitor open positions for exit signals"""
+        """Sync broker positions into the exit engine and feed their LTPs"""
         try:
             positions = self.angel.get_positions()
-            
+            open_positions = []
             for position in positions:
-                # Check profit target and stop loss
-                entry_price = float(position.get('averageprice', 0))
-                current_price = float(position.get('ltp', 0))
+                key = (position.get('exchange', 'NFO'), str(position.get('symboltoken')))
                 qty = int(position.get('netqty', 0))
-                
-                if qty == 0 or entry_price == 0:
-                    continue
-                
-                # Calculate P&L percentage
-                pnl_pct = ((current_price - entry_price) / entry_price) * 100
-                
-                # Check profit target (70%)
-                if pnl_pct >= (self.profit_target * 100):
-                    logger.info(f"✅ Profit target hit: {position['tradingsymbol']} - {pnl_pct:.2f}%")
-                    # Exit position
-                    # self._exit_position(position, 'PROFIT_TARGET')
-                
-                # Check stop loss (30%)
-                elif pnl_pct <= -(self.stop_loss * 100):
-                    logger.info(f"❌ Stop loss hit: {position['tradingsymbol']} - {pnl_pct:.2f}%")
-                    # Exit position
-                    # self._exit_position(position, 'STOP_LOSS')
+                if qty == 0:
+                    # Squared off (here or elsewhere): stop watching its levels
+                    self._exits_pending.discard(key)
+                    self._unregister_exit_levels(key)
+                elif qty > 0 and float(position.get('averageprice', 0)) != 0:
+                    # Long option positions only: exits are SELL orders
+                    open_positions.append((key, position))
+            
+            # Fresh LTPs for every open position in one batched quote request
+            ltps = self.angel.get_ltps([key for key, _ in open_positions])
+            
+            for key, position in open_positions:
+                current_price = ltps.get(key, float(position.get('ltp', 0)))
+                self._register_exit_levels(key, position)
+                self.on_price_update(key, current_price)
                     
         except Exception as e:
-            logger.error(f"Error monitoring positions: {str(e)}")
+            logger.error("Error monitoring positions: %s", e)
+    
+    def _register_exit_levels(self, key, position):
+        """
+        Register profit target and stop loss for an open broker position
+        
+        The levels come from the position itself. Positions without an open
+        trades row were opened outside this app: they are left alone unless
+        MANAGE_EXTERNAL_POSITIONS is set, in which case a row is created for them.
+        
+        Args:
+            key: (exchange, symboltoken) the price updates arrive for
+            position: Position in the SmartAPI position() format
+        """
+        if key in self._exits_pending:
+            return  # exit order sent, waiting for the position to go flat
+        
+        symbol = position.get('tradingsymbol')
+        entry_price = float(position.get('averageprice', 0))
+        qty = int(position.get('netqty', 0))
+        
+        trade_id = self._find_open_trade(symbol)
+        if trade_id is None:
+            if not self.manage_external_positions:
+                return
+            trade_id = self._save_position_trade(symbol, entry_price, qty)
+            if trade_id is None:
+                return
+        
+        tracked = next((t for t in self.exit_engine.open_trades() if t['trade_id'] == trade_id), None)
+        if tracked and tracked['token'] == key and tracked['quantity'] == qty \
+                and tracked['entry_price'] == entry_price:
+            return
+        
+        # New position, or added to / partly closed: levels follow the average price
+        self.exit_engine.register(
+            trade_id,
+            key,
+            entry_price,
+            qty,
+            target=entry_price * (1 + self.profit_target),
+            stop_loss=entry_price * (1 - self.stop_loss),
+            symbol=symbol
+        )
+    
+    def _unregister_exit_levels(self, key):
+        """Drop the exit levels of every trade on an instrument that went flat"""
+        for trade in self.exit_engine.open_trades():
+            if trade['token'] == key:
+                self.exit_engine.unregister(trade['trade_id'])
+                logger.info("Position %s is flat, exit levels removed", trade['symbol'])
+    
+    def _save_position_trade(self, symbol, entry_price, qty):
+        """Record a broker position that has no open trades row (placed outside this app)"""
+        match = OPTION_SYMBOL.search(symbol or '')
+        return self._save_trade({
+            'symbol': symbol,
+            'strike': float(match.group(1)) if match else 0,
+            'option_type': match.group(2) if match else '',
+            'entry_price': entry_price,
+            'quantity': abs(qty),
+            'side': 'BUY' if qty > 0 else 'SELL',
+            'status': 'OPEN'
+        })
+    
+    def on_price_update(self, token, ltp):
+        """
+        Check exit levels for a live price update
+        
+        Called for every quote the broker fetches, and by the positions poll
+        
+        Args:
+            token: (exchange, symboltoken) of the instrument
+            ltp: Last traded price
+        """
+        return self.exit_engine.on_price(token, ltp)
+    
+    def _queue_exit(self, trade, reason, price):
+        """Hand a triggered exit to the exit worker and return at once (exit engine callback)"""
+        # Pending before the order is sent, so a positions pass cannot register the levels again
+        self._exits_pending.add(trade['token'])
+        self._exit_orders.put((trade, reason, price))
+        if self._exit_worker is None:
+            with self._trade_lock:
+                if self._exit_worker is None:
+                    self._exit_worker = threading.Thread(target=self._run_exits, name='exit-orders', daemon=True)
+                    self._exit_worker.start()
+    
+    def _run_exits(self):
+        while True:
+            trade, reason, price = self._exit_orders.get()
+            try:
+                self._exit_position(trade, reason, price)
+            except Exception as e:
+                logger.error("Error exiting %s: %s", trade.get('symbol'), e)
+    
+    def _exit_position(self, trade, reason, price):
+        """
+        Square off a position and record the exit
+        
+        Args:
+            trade: Trade registered with the exit engine
+            reason: PROFIT_TARGET or STOP_LOSS
+            price: Price that triggered the exit
+        """
+        symbol = trade['symbol']
+        qty = abs(int(trade['quantity']))
+        
+        self._exits_pending.add(trade['token'])
+        # The position's own token: get_token() cannot resolve option symbols
+        order = self.angel.place_order(symbol, qty, "SELL", symboltoken=trade['token'][1])
+        if not order:
+            logger.error("Exit order failed for %s, will retry on next price update", symbol)
+            trade_levels = {k: v for k, v in trade.items() if not k.startswith('_')}
+            self.exit_engine.register(**trade_levels)
+            self._exits_pending.discard(trade['token'])
+            return None
+        
+        entry_price = trade['entry_price']
+        pnl = (price - entry_price) * qty
+        pnl_pct = ((price - entry_price) / entry_price) * 100 if entry_price else 0
+        
+        if reason == 'PROFIT_TARGET':
+            logger.info("✅ Profit target hit: %s - %.2f%%", symbol, pnl_pct)
+        else:
+            logger.info("❌ Stop loss hit: %s - %.2f%%", symbol, pnl_pct)
+        
+        self._close_trade(trade['trade_id'], price, pnl, pnl_pct, reason)
+        self.alerts.exit_hit(trade, reason, price, pnl_pct)
+        return order
+    
+    def _find_open_trade(self, symbol):
+        """
+        Find the latest open trade for a symbol
+        
+        Args:
+            symbol: Trading symbol
+            
+        Returns:
+            int: Trade id or None
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT id FROM trades
+                WHERE symbol = ? AND status = 'OPEN'
+                ORDER BY timestamp DESC
+                LIMIT 1
+            ''', (symbol,))
+            
+            row = cursor.fetchone()
+            conn.close()
+            return row[0] if row else None
+            
+        except Exception as e:
+            logger.error("Error finding open trade: %s", e)
+            return None
+    
+    def _close_trade(self, trade_id, exit_price, pnl, pnl_percentage, exit_reason):
+        """
+        Mark a trade as closed in the database
+        
+        Args:
+            trade_id: Trade id
+            exit_price: Exit price
+            pnl: Realised P&L
+            pnl_percentage: Realised P&L in percent
+            exit_reason: PROFIT_TARGET or STOP_LOSS
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE trades
+                SET exit_price = ?, pnl = ?, pnl_percentage = ?, exit_reason = ?, status = 'CLOSED'
+                WHERE id = ?
+            ''', (exit_price, round(pnl, 2), round(pnl_percentage, 2), exit_reason, trade_id))
+            
+            conn.commit()
+            conn.close()
+            self.trades_version = next(self._trade_writes)
+            logger.info("Trade closed: #%s %s @ %s", trade_id, exit_reason, exit_price)
+            
+        except Exception as e:
+            logger.error("Error closing trade: %s", e)
     
     def _save_trade(self, trade_data):
         """
@@ -444,6 +826,9 @@ class TradingStrategy:
         
         Args:
             trade_data: Dictionary containing trade information
+            
+        Returns:
+            int: Id of the new trade row
         """
         try:
             conn = sqlite3.connect(self.db_path)
@@ -453,10 +838,10 @@ class TradingStrategy:
                 INSERT INTO trades (
                     timestamp, symbol, strike, option_type, entry_price,
                     exit_price, quantity, side, status, pnl, pnl_percentage,
-                    exit_reason, order_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    exit_reason, order_id, strategy
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                trade_data.get('timestamp', datetime.now().isoformat()),
+                trade_data.get('timestamp', datetime.fromtimestamp(self.clock()).isoformat()),
                 trade_data.get('symbol'),
                 trade_data.get('strike'),
                 trade_data.get('option_type'),
@@ -468,15 +853,20 @@ class TradingStrategy:
                 trade_data.get('pnl'),
                 trade_data.get('pnl_percentage'),
                 trade_data.get('exit_reason'),
-                trade_data.get('order_id')
+                trade_data.get('order_id'),
+                trade_data.get('strategy')
             ))
             
+            trade_id = cursor.lastrowid
             conn.commit()
             conn.close()
-            logger.info(f"Trade saved: {trade_data.get('symbol')} {trade_data.get('strike')}")
+            self.trades_version = next(self._trade_writes)
+            logger.info("Trade saved: %s %s", trade_data.get('symbol'), trade_data.get('strike'))
+            return trade_id
             
         except Exception as e:
-            logger.error(f"Error saving trade: {str(e)}")
+            logger.error("Error saving trade: %s", e)
+            return None
     
     def get_trade_history(self, limit=100):
         """
@@ -509,5 +899,5 @@ class TradingStrategy:
             return trades
             
         except Exception as e:
-            logger.error(f"Error fetching trade history: {str(e)}")
+            logger.error("Error fetching trade history: %s", e)
             return []
@@ -0,0 +1,178 @@
+"""
+Strategy Registry
+Fetching and analytics run once per tick into a read-only MarketSnapshot; every
+registered strategy evaluates that snapshot and its signal is tagged with the
+strategy name for execution and the trade log
+"""
+
+import importlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from config import Config
+from metrics import STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Per-strike columns of the nearest expiry: (name, side, field)
+CHAIN_COLUMNS = (
+    ('strike', None, 'strikePrice'),
+    ('ce_oi', 'CE', 'openInterest'),
+    ('pe_oi', 'PE', 'openInterest'),
+    ('ce_chg_oi', 'CE', 'changeinOpenInterest'),
+    ('pe_chg_oi', 'PE', 'changeinOpenInterest'),
+    ('ce_volume', 'CE', 'totalTradedVolume'),
+    ('pe_volume', 'PE', 'totalTradedVolume'),
+    ('ce_ltp', 'CE', 'lastPrice'),
+    ('pe_ltp', 'PE', 'lastPrice'),
+    ('ce_change', 'CE', 'change'),
+    ('pe_change', 'PE', 'change'),
+    ('ce_iv', 'CE', 'impliedVolatility'),
+    ('pe_iv', 'PE', 'impliedVolatility'),
+)
+
+
+def chain_columns(rows):
+    """Option chain rows as read-only NumPy columns sorted by strike"""
+    import numpy as np
+
+    rows = sorted(rows or [], key=lambda opt: opt.get('strikePrice', 0))
+    columns = {}
+    for name, side, field in CHAIN_COLUMNS:
+        if side is None:
+            values = [opt.get(field, 0) or 0 for opt in rows]
+        else:
+            values = [opt.get(side, {}).get(field, 0) or 0 for opt in rows]
+        column = np.asarray(values, dtype=float)
+        column.setflags(write=False)
+        columns[name] = column
+    return MappingProxyType(columns)
+
+
+class MarketSnapshot:
+    """Read-only view of one tick's data and analytics, shared by every strategy"""
+
+    __slots__ = ('symbol', 'timestamp', 'current_price', 'pcr', 'max_pain', 'heavy_call', 'heavy_put',
+                 'expiry', 'monthly', 'chain', 'candles', 'frames', 'indicators')
+
+    def __init__(self, symbol, current_price, pcr, max_pain, heavy_call=0, heavy_put=0, expiry=None,
+                 monthly=None, chain_rows=None, candles=None, frames=None, indicators=None, timestamp=None):
+        """
+        Args:
+            symbol: Underlying symbol
+            current_price: Spot price
+            pcr, max_pain, heavy_call, heavy_put: Nearest-expiry analytics
+            expiry: Nearest expiry
+            monthly: Monthly expiry metrics
+            chain_rows: Nearest-expiry option chain rows (stored as columns)
+            candles: 15-minute candles
+            frames: {minutes: candles} in multi-timeframe mode
+            indicators: IndicatorSet snapshot
+            timestamp: Epoch time of the tick (defaults to now)
+        """
+        values = {
+            'symbol': symbol,
+            'timestamp': time.time() if timestamp is None else timestamp,
+            'current_price': current_price,
+            'pcr': pcr,
+            'max_pain': max_pain,
+            'heavy_call': heavy_call,
+            'heavy_put': heavy_put,
+            'expiry': expiry,
+            'monthly': MappingProxyType(dict(monthly or {})),
+            'chain': chain_columns(chain_rows),
+            'candles': tuple(tuple(c) for c in candles) if candles else (),
+            'frames': MappingProxyType({m: tuple(tuple(c) for c in bars) for m, bars in frames.items()})
+                      if frames else None,
+            'indicators': MappingProxyType(dict(indicators)) if indicators else None
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MarketSnapshot is read-only")
+
+
+class StrategyRegistry:
+    """Named strategies evaluated against one snapshot per tick"""
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers: Threads for evaluating strategies concurrently (1 = in order);
+                     only worth raising for strategies that do I/O
+        """
+        self.workers = workers or Config.STRATEGY_WORKERS
+        self._strategies = {}  # name -> callable(snapshot) -> signal
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def register(self, name, func):
+        """
+        Add or replace a strategy
+
+        Args:
+            name: Tag stored with its signals and trades
+            func: Callable(MarketSnapshot) -> signal dict ({'action': 'BUY'/'WAIT', ...})
+        """
+        with self._lock:
+            strategies = dict(self._strategies)
+            strategies[name] = func
+            self._strategies = strategies  # copy-on-write: evaluate() never sees a half-updated dict
+
+    def unregister(self, name):
+        with self._lock:
+            strategies = dict(self._strategies)
+            strategies.pop(name, None)
+            self._strategies = strategies
+
+    def load_plugins(self, spec):
+        """
+        Register strategies named in a spec like 'breakout=my_module:breakout_signal'
+
+        Args:
+            spec: Comma-separated name=module:function entries
+        """
+        for entry in filter(None, (part.strip() for part in spec.split(','))):
+            try:
+                name, target = entry.split('=', 1)
+                module_name, func_name = target.split(':', 1)
+                self.register(name.strip(), getattr(importlib.import_module(module_name), func_name))
+                logger.info("Registered strategy plugin %s", name.strip())
+            except Exception as e:
+                logger.error("Could not load strategy plugin %r: %s", entry, e)
+
+    def names(self):
+        return list(self._strategies)
+
+    def _run(self, name, func, snapshot):
+        started = time.perf_counter()
+        try:
+            signal = dict(func(snapshot) or {'action': 'WAIT', 'confidence': 0})
+        except Exception as e:
+            logger.error("Strategy %s failed: %s", name, e)
+            signal = {'action': 'WAIT', 'confidence': 0, 'reason': f'Strategy error: {e}'}
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage=f'strategy:{name}')
+        signal['strategy'] = name
+        return signal
+
+    def evaluate(self, snapshot):
+        """
+        Run every strategy on the snapshot
+
+        Returns:
+            dict: name -> signal tagged with 'strategy', in registration order
+        """
+        strategies = self._strategies
+        if self.workers <= 1 or len(strategies) <= 1:
+            return {name: self._run(name, func, snapshot) for name, func in strategies.items()}
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='strategy')
+        futures = {name: self._executor.submit(self._run, name, func, snapshot)
+                   for name, func in strategies.items()}
+        return {name: future.result() for name, future in futures.items()}
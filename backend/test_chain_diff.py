@@ -0,0 +1,77 @@
+"""
+Option Chain Delta Tests
+Payload diffs and the seq/epoch resync rules
+"""
+
+import copy
+from chain_diff import ChainDeltaLog, diff_chain
+
+
+def _chain(strikes=(54000, 54100, 54200), pcr=1.1):
+    return {
+        'expiry': '28-Oct-2026',
+        'underlying_value': 54050.0,
+        'pcr': pcr,
+        'options': [
+            {'strike': strike, 'atm': strike == 54100, 'pcr': 1.0,
+             'ce': {'oi': 1000, 'chg_oi': 10, 'volume': 500, 'ltp': 120.0, 'iv': 14.0},
+             'pe': {'oi': 900, 'chg_oi': -5, 'volume': 400, 'ltp': 80.0, 'iv': 15.0}}
+            for strike in strikes
+        ]
+    }
+
+
+def test_unchanged_payload_has_no_delta():
+    assert diff_chain(_chain(), _chain()) == {}
+
+
+def test_changed_fields_and_cells_only():
+    new = _chain(pcr=1.2)
+    new['options'][1]['ce']['ltp'] = 125.5
+    new['options'][2]['pe']['oi'] = 950
+
+    assert diff_chain(_chain(), new) == {
+        'fields': {'pcr': 1.2},
+        'rows': {'54100': {'ce': {'ltp': 125.5}}, '54200': {'pe': {'oi': 950}}}
+    }
+
+
+def test_moved_strikes_send_every_row():
+    new = _chain(strikes=(54100, 54200, 54300))
+    delta = diff_chain(_chain(), new)
+    assert delta == {'options': new['options']}
+
+
+def _log_with_updates(count, history=60):
+    log = ChainDeltaLog(history=history)
+    data = _chain()
+    log.update('NIFTY', copy.deepcopy(data))
+    for i in range(count):
+        data['options'][0]['ce']['ltp'] = 121.0 + i
+        log.update('NIFTY', copy.deepcopy(data))
+    return log, data
+
+
+def test_sequence_only_moves_on_change():
+    log = ChainDeltaLog()
+    assert log.update('NIFTY', _chain()) == 1
+    assert log.update('NIFTY', _chain()) == 1
+    assert log.update('NIFTY', _chain(pcr=1.3)) == 2
+    assert log.since('BANKNIFTY', 0) is None
+
+
+def test_deltas_since_the_clients_seq():
+    log, _ = _log_with_updates(3)
+    response = log.since('NIFTY', 2, log.epoch)
+    assert response['seq'] == 4
+    assert [d['rows']['54000']['ce']['ltp'] for d in response['deltas']] == [122.0, 123.0]
+    assert log.since('NIFTY', 4, log.epoch)['deltas'] == []
+
+
+def test_full_resync_when_seq_cannot_be_continued():
+    log, data = _log_with_updates(5, history=2)
+    assert log.since('NIFTY', 0, log.epoch)['full'] == data       # new client
+    assert log.since('NIFTY', 5, log.epoch - 1)['full'] == data   # server restarted
+    assert log.since('NIFTY', 9, log.epoch)['full'] == data       # ahead of the log
+    assert log.since('NIFTY', 3, log.epoch)['full'] == data       # older than the history
+    assert 'deltas' in log.since('NIFTY', 4, log.epoch)
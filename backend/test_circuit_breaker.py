@@ -0,0 +1,99 @@
+"""
+Circuit Breaker Tests
+State transitions and the half-open backoff, on a fake clock
+"""
+
+from circuit_breaker import CircuitBreaker, BreakerRegistry, CLOSED, OPEN, HALF_OPEN
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock):
+    return CircuitBreaker('test:endpoint', failure_threshold=3, reset_timeout=10,
+                          max_reset_timeout=30, clock=clock)
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker(_Clock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_single_probe_after_the_reset_timeout():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    _open(breaker)
+
+    clock.now = 9.9
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+
+
+def test_successful_probe_closes_and_resets_the_timeout():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    _open(breaker)
+    clock.now = 10
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.timeout == 20
+
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.timeout == 10
+    assert breaker.allow()
+
+
+def test_failed_probes_double_the_timeout_up_to_the_cap():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    _open(breaker)
+
+    timeouts = []
+    for _ in range(4):
+        clock.now += breaker.timeout
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        timeouts.append(breaker.timeout)
+    assert timeouts == [20, 30, 30, 30]
+
+    clock.now += 29
+    assert not breaker.allow()
+    assert breaker.snapshot() == {'state': OPEN, 'failures': 7, 'retry_in': 1.0}
+
+
+def test_registry_keeps_one_breaker_per_source_and_endpoint():
+    registry = BreakerRegistry()
+    breaker = registry.get('nse', 'option-chain')
+    breaker.failure_threshold = 1
+
+    assert registry.allow('nse', 'option-chain')
+    registry.record('nse', 'option-chain', ok=False)
+    assert not registry.allow('nse', 'option-chain')
+    assert registry.allow('nse', 'quote')
+    assert registry.open_breakers() == ['nse:option-chain']
@@ -0,0 +1,110 @@
+"""
+Exit Engine Tests
+Target/stop-loss triggering and the strategy's exit order handling
+"""
+
+import threading
+from alerts import AlertEngine
+from exit_engine import ExitEngine
+from paper_broker import PaperBroker
+from strategy import TradingStrategy
+
+TOKEN = ('NFO', 'BANKNIFTY28OCT2654000CE')
+
+
+def _engine():
+    exits = []
+    engine = ExitEngine(on_exit=lambda trade, reason, price: exits.append((trade['trade_id'], reason, price)))
+    return engine, exits
+
+
+def test_target_and_stop_loss_trigger_once():
+    engine, exits = _engine()
+    engine.register(1, TOKEN, 100, 15, target=170, stop_loss=70)
+    engine.register(2, TOKEN, 100, 15, target=200, stop_loss=90)
+
+    assert engine.on_price(TOKEN, 150) == []
+    engine.on_price(TOKEN, 85)
+    assert exits == [(2, 'STOP_LOSS', 85)]
+    engine.on_price(TOKEN, 175)
+    assert exits[-1] == (1, 'PROFIT_TARGET', 175)
+    assert engine.open_trades() == [] and engine.tokens() == []
+
+    engine.on_price(TOKEN, 50)
+    assert len(exits) == 2
+
+
+def test_prices_for_other_instruments_are_ignored():
+    engine, exits = _engine()
+    engine.register(1, TOKEN, 100, 15, target=170, stop_loss=70)
+    engine.on_price(('NFO', 'OTHER'), 500)
+    engine.on_price(TOKEN, None)
+    assert exits == [] and engine.is_registered(1)
+
+
+def test_re_registering_replaces_the_old_levels():
+    engine, exits = _engine()
+    engine.register(1, TOKEN, 100, 15, target=170, stop_loss=70)
+    engine.register(1, TOKEN, 120, 15, target=204, stop_loss=84)
+    engine.on_price(TOKEN, 180)  # old target only
+    assert exits == []
+    engine.on_price(TOKEN, 80)
+    assert exits == [(1, 'STOP_LOSS', 80)]
+
+
+def test_unregistered_trade_never_exits():
+    engine, exits = _engine()
+    engine.register(1, TOKEN, 100, 15, target=170, stop_loss=70)
+    engine.unregister(1)
+    engine.on_price(TOKEN, 10)
+    assert exits == [] and not engine.is_registered(1)
+
+
+class _RejectingBroker(PaperBroker):
+    def __init__(self, gate=None):
+        super().__init__(latency_ms=0, slippage_bps=0)
+        self.gate = gate
+        self.orders = []
+
+    def place_order(self, symbol, qty, order_type="BUY", symboltoken=None):
+        if self.gate:
+            self.gate.wait(5)
+        self.orders.append((symbol, qty, order_type, symboltoken))
+        return None
+
+
+def _strategy(broker, tmp_path):
+    broker.login()
+    strategy = TradingStrategy(angel_api=broker, db_path=str(tmp_path / 'trades.db'))
+    strategy.alerts = AlertEngine(sinks=[])
+    return strategy
+
+
+def test_failed_exit_is_registered_again(tmp_path):
+    broker = _RejectingBroker()
+    strategy = _strategy(broker, tmp_path)
+    trade = strategy.exit_engine.register(7, TOKEN, 100, 15, target=170, stop_loss=70, symbol=TOKEN[1])
+    strategy.exit_engine.unregister(7)
+
+    assert strategy._exit_position(trade, 'STOP_LOSS', 65) is None
+    assert broker.orders == [(TOKEN[1], 15, 'SELL', TOKEN[1])]  # the position's own token
+    assert strategy.exit_engine.is_registered(7)
+    assert TOKEN not in strategy._exits_pending
+
+
+def test_triggered_exit_is_pending_before_the_order_is_sent(tmp_path):
+    gate = threading.Event()
+    broker = _RejectingBroker(gate)
+    strategy = _strategy(broker, tmp_path)
+    strategy.exit_engine.register(7, TOKEN, 100, 15, target=170, stop_loss=70, symbol=TOKEN[1])
+
+    strategy.on_price_update(TOKEN, 65)  # returns at once, the worker waits on the broker
+    assert TOKEN in strategy._exits_pending
+    assert not strategy.exit_engine.is_registered(7)
+
+    gate.set()
+    for _ in range(100):
+        if TOKEN not in strategy._exits_pending:
+            break
+        threading.Event().wait(0.01)
+    assert strategy.exit_engine.is_registered(7)
@@ -0,0 +1,95 @@
+"""
+Indicator Tests
+Vectorized warm_up() must match streaming update(), and forming bars stay out
+"""
+
+import pytest
+from benchmarks import make_candles
+from indicators import EMA, RSI, ATR, VWAP, SuperTrend, IndicatorSet
+
+CANDLES = make_candles(300)
+HIGHS = [c[2] for c in CANDLES]
+LOWS = [c[3] for c in CANDLES]
+CLOSES = [c[4] for c in CANDLES]
+
+
+def _streamed(indicator, *series):
+    for values in zip(*series):
+        indicator.update(*values)
+    return indicator
+
+
+@pytest.mark.parametrize('period', [9, 21])
+def test_ema_warm_up_matches_updates(period):
+    streamed = _streamed(EMA(period), CLOSES)
+    warmed = EMA(period)
+    warmed.warm_up(CLOSES)
+    assert warmed.value == pytest.approx(streamed.value)
+    assert warmed.update(CLOSES[0]) == pytest.approx(streamed.update(CLOSES[0]))
+
+
+def test_ema_is_not_ready_before_its_period():
+    ema = EMA(21)
+    ema.warm_up(CLOSES[:20])
+    assert not ema.ready
+    assert ema.update(CLOSES[20]) == pytest.approx(sum(CLOSES[:21]) / 21)
+
+
+def test_rsi_warm_up_matches_updates():
+    streamed = _streamed(RSI(14), CLOSES)
+    warmed = RSI(14)
+    warmed.warm_up(CLOSES)
+    assert warmed.value == pytest.approx(streamed.value)
+    assert warmed.update(CLOSES[0]) == pytest.approx(streamed.update(CLOSES[0]))
+
+
+def test_atr_warm_up_matches_updates():
+    streamed = _streamed(ATR(14), HIGHS, LOWS, CLOSES)
+    warmed = ATR(14)
+    warmed.warm_up(HIGHS, LOWS, CLOSES)
+    assert warmed.value == pytest.approx(streamed.value)
+
+
+def test_supertrend_warm_up_matches_updates():
+    streamed = _streamed(SuperTrend(10, 3.0), HIGHS, LOWS, CLOSES)
+    warmed = SuperTrend(10, 3.0)
+    warmed.warm_up(HIGHS, LOWS, CLOSES)
+    assert warmed.value == pytest.approx(streamed.value)
+    assert warmed.direction == streamed.direction
+
+
+def test_vwap_warm_up_matches_updates():
+    prices = [(c[2] + c[3] + c[4]) / 3 for c in CANDLES]
+    volumes = [c[5] for c in CANDLES]
+    sessions = [c[0][:10] for c in CANDLES]
+    streamed = _streamed(VWAP(), prices, volumes, sessions)
+    warmed = VWAP()
+    warmed.warm_up(prices, volumes, sessions)
+    assert warmed.value == pytest.approx(streamed.value)
+
+
+def test_on_candles_only_adds_new_closed_bars():
+    incremental = IndicatorSet()
+    incremental.on_candles(CANDLES[:150])
+    incremental.on_candles(CANDLES[100:200])  # overlapping fetch
+    batch = IndicatorSet()
+    batch.on_candles(CANDLES[:200])
+    assert incremental.snapshot() == pytest.approx(batch.snapshot())
+
+
+def test_forming_bar_is_peeked_but_not_folded_in():
+    indicators = IndicatorSet()
+    snapshot = indicators.on_candles(CANDLES[:200], forming=True)
+    assert indicators.last_timestamp == CANDLES[198][0]
+
+    closed = IndicatorSet()
+    closed.on_candles(CANDLES[:199])
+    assert indicators.snapshot() == closed.snapshot()
+    # EMAs and RSI show the forming close; the bar-range indicators wait for the close
+    assert snapshot['ema_fast'] == round(closed.ema_fast.peek(CLOSES[199]), 2)
+    assert snapshot['atr'] == closed.snapshot()['atr']
+
+    # Once it closes it is added exactly once
+    indicators.on_candles(CANDLES[:201], forming=True)
+    closed.on_candles(CANDLES[:200])
+    assert indicators.snapshot() == closed.snapshot()
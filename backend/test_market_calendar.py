@@ -0,0 +1,64 @@
+"""
+Market Calendar Tests
+Holidays, sessions, expiry shifting and closed bars in IST
+"""
+
+from datetime import date, datetime
+from market_calendar import MarketCalendar, IST
+from config import NSE_HOLIDAYS
+
+
+def _calendar(holidays='2026-10-20,2026-12-29', expiry_weekday=1):
+    return MarketCalendar('09:15', '15:30', holidays=holidays, expiry_weekday=expiry_weekday)
+
+
+def _ts(*args):
+    return datetime(*args, tzinfo=IST).timestamp()
+
+
+def test_weekends_and_holidays_are_not_trading_days():
+    calendar = _calendar()
+    assert calendar.is_trading_day(date(2026, 10, 19))
+    assert not calendar.is_trading_day(date(2026, 10, 20))
+    assert not calendar.is_trading_day(date(2026, 10, 18))
+    assert calendar.session(date(2026, 10, 20)) is None
+    assert calendar.session(date(2026, 10, 19)) == (_ts(2026, 10, 19, 9, 15), _ts(2026, 10, 19, 15, 30))
+
+
+def test_default_calendar_bundles_the_nse_holidays():
+    calendar = MarketCalendar(holidays=NSE_HOLIDAYS)
+    assert len(calendar.holidays) == 15
+    assert not calendar.is_trading_day(date(2026, 1, 26))
+
+
+def test_next_open_skips_holidays():
+    calendar = _calendar()
+    assert calendar.next_open(_ts(2026, 10, 19, 16, 0)) == _ts(2026, 10, 21, 9, 15)
+    assert calendar.next_open(_ts(2026, 10, 19, 10, 0)) == _ts(2026, 10, 19, 10, 0)
+    assert not calendar.is_open(_ts(2026, 10, 20, 11, 0))
+    assert calendar.last_close(_ts(2026, 10, 21, 9, 0)) == _ts(2026, 10, 19, 15, 30)
+
+
+def test_weekly_expiry_on_a_holiday_moves_to_the_previous_trading_day():
+    calendar = _calendar()
+    assert calendar.expiry(_ts(2026, 10, 16, 12, 0)) == date(2026, 10, 19)
+    assert calendar.expiry(_ts(2026, 10, 19, 15, 30)) == date(2026, 10, 19)
+    assert calendar.expiry(_ts(2026, 10, 19, 15, 31)) == date(2026, 10, 27)
+    assert _calendar(holidays='').expiry(_ts(2026, 10, 16, 12, 0)) == date(2026, 10, 20)
+
+
+def test_monthly_expiry_is_the_last_expiry_weekday():
+    calendar = _calendar()
+    assert calendar.expiry(_ts(2026, 10, 16, 12, 0), monthly=True) == date(2026, 10, 27)
+    assert calendar.expiry(_ts(2026, 10, 28, 12, 0), monthly=True) == date(2026, 11, 24)
+    # Last Tuesday of December is a holiday here
+    assert calendar.expiry(_ts(2026, 12, 1, 12, 0), monthly=True) == date(2026, 12, 28)
+
+
+def test_bar_closed_at_its_end_or_the_session_close():
+    calendar = _calendar()
+    assert not calendar.bar_closed('2026-10-19T09:15:00+05:30', 15, _ts(2026, 10, 19, 9, 29))
+    assert calendar.bar_closed('2026-10-19T09:15:00+05:30', 15, _ts(2026, 10, 19, 9, 30))
+    # The last hourly bar is cut short by the 15:30 close
+    assert calendar.bar_closed('2026-10-19T15:15:00+05:30', 60, _ts(2026, 10, 19, 15, 30))
+    assert not calendar.bar_closed('2026-10-19T09:15:00', None, _ts(2026, 10, 19, 15, 0))
@@ -0,0 +1,87 @@
+"""
+OI Analytics Tests
+Buildup classification, the session ring buffer and the report
+"""
+
+from datetime import datetime
+from market_calendar import IST
+from oi_analytics import OISeries, classify
+from strategy_registry import MarketSnapshot
+
+START = datetime(2026, 10, 19, 10, 0, tzinfo=IST).timestamp()
+
+
+def _row(strike, ce_oi, ce_ltp, pe_oi, pe_ltp, ce_chg=0, ce_change=0, pe_chg=0, pe_change=0):
+    return {
+        'strikePrice': strike,
+        'CE': {'openInterest': ce_oi, 'lastPrice': ce_ltp, 'changeinOpenInterest': ce_chg, 'change': ce_change},
+        'PE': {'openInterest': pe_oi, 'lastPrice': pe_ltp, 'changeinOpenInterest': pe_chg, 'change': pe_change}
+    }
+
+
+def _snapshot(rows, minute=0, max_pain=54000, timestamp=None):
+    return MarketSnapshot('BANKNIFTY', 54050, 1.0, max_pain, chain_rows=rows,
+                          timestamp=START + 60 * minute if timestamp is None else timestamp)
+
+
+def test_classify_codes():
+    codes = classify([10, 10, -10, -10, 0, 10, float('nan')], [1, -1, 1, -1, 1, 0, 1])
+    assert codes.tolist() == [1, 2, 3, 4, 0, 0, 0]
+
+
+def test_first_reading_is_classified_against_the_previous_close():
+    series = OISeries(capacity=10)
+    series.update(_snapshot([
+        _row(54000, 1000, 100, 1000, 90, ce_chg=50, ce_change=5, pe_chg=-20, pe_change=-3),
+        _row(54100, 1000, 60, 1000, 130, ce_chg=30, ce_change=-2, pe_chg=-10, pe_change=4),
+    ]))
+    report = series.report()
+    buildup = report['buildup']
+    assert buildup['basis'] == 'previous_close'
+    assert [row['CE']['buildup'] for row in buildup['strikes']] == ['long_buildup', 'short_buildup']
+    assert [row['PE']['buildup'] for row in buildup['strikes']] == ['long_unwinding', 'short_covering']
+    assert report['pcr']['current'] == 1.0
+
+
+def test_intraday_buildup_over_the_window():
+    series = OISeries(capacity=10)
+    series.update(_snapshot([_row(54000, 1000, 100, 1000, 90), _row(54100, 1000, 60, 1000, 130)], 0))
+    series.update(_snapshot([_row(54000, 1200, 110, 800, 95), _row(54100, 1100, 50, 900, 120)], 1,
+                            max_pain=54100))
+
+    report = series.report(window=5)
+    buildup = report['buildup']
+    assert buildup['basis'] == 'intraday' and buildup['window'] == 1
+    assert buildup['summary']['CE'] == {'neutral': 0, 'long_buildup': 1, 'short_buildup': 1,
+                                        'short_covering': 0, 'long_unwinding': 0}
+    assert buildup['summary']['PE'] == {'neutral': 0, 'long_buildup': 0, 'short_buildup': 0,
+                                        'short_covering': 1, 'long_unwinding': 1}
+    assert buildup['strikes'][0]['CE'] == {'oi_change': 200, 'price_change': 10, 'buildup': 'long_buildup'}
+    assert report['pcr']['current'] == round(1700 / 2300, 2)
+    assert report['max_pain']['drift'] == 100
+    assert report['pcr']['series'][0] == ['10:00:00', 1.0]
+
+
+def test_ring_keeps_the_latest_readings_and_new_strikes_widen_it():
+    series = OISeries(capacity=3)
+    for minute in range(5):
+        series.update(_snapshot([_row(54000, 1000 + 100 * minute, 100 + minute, 1000, 90)], minute))
+    series.update(_snapshot([_row(54000, 1500, 105, 1000, 90), _row(54200, 500, 40, 700, 150)], 5))
+
+    report = series.report(window=10)
+    assert report['readings'] == 6
+    assert [point[0] for point in report['pcr']['series']] == ['10:03:00', '10:04:00', '10:05:00']
+    assert report['buildup']['window'] == 2
+    assert [row['strike'] for row in report['buildup']['strikes']] == [54000, 54200]
+    assert report['buildup']['strikes'][1]['CE']['buildup'] == 'neutral'  # no earlier reading
+
+
+def test_new_session_starts_a_fresh_series():
+    series = OISeries(capacity=10)
+    series.update(_snapshot([_row(54000, 1000, 100, 1000, 90)], 0))
+    series.update(_snapshot([_row(54000, 1200, 110, 1000, 90)], timestamp=START + 86400))
+
+    report = series.report()
+    assert report['session'] == '2026-10-20'
+    assert report['readings'] == 1
+    assert OISeries(capacity=10).report() is None
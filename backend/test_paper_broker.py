@@ -0,0 +1,113 @@
+"""
+Paper Broker Tests
+Fill latency, slippage and position averages across flat
+"""
+
+from paper_broker import PaperBroker
+
+SYMBOL = 'BANKNIFTY28OCT2654000CE'
+
+
+class _Clock:
+    def __init__(self, now=1_790_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _broker(latency_ms=0, slippage_bps=0, clock=None):
+    broker = PaperBroker(latency_ms=latency_ms, slippage_bps=slippage_bps, clock=clock)
+    broker.login()
+    return broker
+
+
+def _position(broker):
+    return next(p for p in broker.get_positions() if p['tradingsymbol'] == SYMBOL)
+
+
+def _status(broker, order):
+    order_id = order['data']['orderid']
+    return next(o for o in broker.get_order_book() if o['orderid'] == order_id)
+
+
+def test_orders_fill_after_the_latency_with_slippage():
+    clock = _Clock()
+    broker = _broker(latency_ms=500, slippage_bps=10, clock=clock)
+    broker.set_price(SYMBOL, 100)
+
+    buy = broker.place_order(SYMBOL, 15, 'BUY')
+    assert _status(broker, buy)['status'] == 'open'
+
+    clock.now += 0.5
+    broker.set_price(SYMBOL, 110)  # filled at the price when the latency elapses
+    assert _status(broker, buy)['status'] == 'complete'
+    assert _status(broker, buy)['averageprice'] == 110.11
+
+    sell = broker.place_order(SYMBOL, 15, 'SELL')
+    clock.now += 0.5
+    assert _status(broker, sell)['averageprice'] == 109.89
+
+
+def test_orders_are_rejected_without_a_session_price_or_quantity():
+    broker = PaperBroker(latency_ms=0, slippage_bps=0)
+    assert broker.place_order(SYMBOL, 15) is None
+
+    broker.login()
+    assert broker.place_order(SYMBOL, 0) is None
+    assert broker.place_order(SYMBOL, 15, 'HOLD') is None
+    order = broker.place_order(SYMBOL, 15)
+    assert _status(broker, order)['status'] == 'rejected'
+
+
+def test_order_carries_the_given_symboltoken():
+    broker = _broker()
+    broker.set_price(SYMBOL, 100)
+    order = broker.place_order(SYMBOL, 15, symboltoken='41234')
+    assert _status(broker, order)['symboltoken'] == '41234'
+
+
+def test_pending_order_can_be_cancelled():
+    clock = _Clock()
+    broker = _broker(latency_ms=1000, clock=clock)
+    broker.set_price(SYMBOL, 100)
+    order = broker.place_order(SYMBOL, 15)
+
+    assert broker.cancel_order(order['data']['orderid'])
+    clock.now += 2
+    assert _status(broker, order)['status'] == 'cancelled'
+    assert broker.cancel_order(order['data']['orderid']) is None
+
+
+def test_average_restarts_after_the_position_goes_flat():
+    broker = _broker()
+    broker.set_price(SYMBOL, 100)
+    broker.place_order(SYMBOL, 15, 'BUY')
+    broker.set_price(SYMBOL, 120)
+    broker.place_order(SYMBOL, 15, 'SELL')
+
+    position = _position(broker)
+    assert position['netqty'] == '0'
+    assert position['pnl'] == '300.00'
+
+    broker.set_price(SYMBOL, 200)
+    broker.place_order(SYMBOL, 15, 'BUY')
+    position = _position(broker)
+    assert position['netqty'] == '15'
+    assert position['averageprice'] == '200.00'
+    assert position['pnl'] == '300.00'  # realised profit kept, the new leg is flat
+
+    broker.set_price(SYMBOL, 210)
+    assert _position(broker)['pnl'] == '450.00'
+
+
+def test_short_position_uses_the_sell_average():
+    broker = _broker()
+    broker.set_price(SYMBOL, 100)
+    broker.place_order(SYMBOL, 15, 'SELL')
+    broker.set_price(SYMBOL, 90)
+
+    position = _position(broker)
+    assert position['netqty'] == '-15'
+    assert position['averageprice'] == '100.00'
+    assert position['pnl'] == '150.00'
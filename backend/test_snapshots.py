@@ -0,0 +1,74 @@
+"""
+Snapshot Tests
+Versioning, ETag revalidation and response compression
+"""
+
+import gzip
+import json
+from flask import Flask
+import snapshots
+from snapshots import SnapshotStore, snapshot_response
+
+app = Flask(__name__)
+SMALL = {'spot': 54012.5}
+LARGE = {'rows': [{'strike': 50000 + 100 * i, 'ce_oi': 1000 + i} for i in range(50)]}
+
+
+def _respond(snapshot, headers=None):
+    with app.test_request_context('/', headers=headers or {}):
+        return snapshot_response(snapshot)
+
+
+def test_version_moves_only_when_content_changes():
+    store = SnapshotStore()
+    first = store.publish('market-data', SMALL, source=1)
+    same = store.publish('market-data', dict(SMALL), source=2)
+    assert same is first and first.version == 1 and first.source == 2
+
+    changed = store.publish('market-data', {'spot': 54020.0})
+    assert changed.version == 2 and changed.etag != first.etag
+    assert store.get('market-data') is changed
+
+
+def test_current_checks_source_and_age():
+    store = SnapshotStore()
+    store.publish(('chain', 'NIFTY'), SMALL, source=5)
+    assert store.current(('chain', 'NIFTY'), source=5, max_age=60) is not None
+    assert store.current(('chain', 'NIFTY'), source=6) is None
+    assert store.current(('chain', 'NIFTY'), max_age=0) is None
+    assert store.current(('chain', 'BANKNIFTY')) is None
+
+
+def test_matching_etag_returns_304():
+    snapshot = SnapshotStore().publish('market-data', SMALL)
+    response = _respond(snapshot, {'If-None-Match': f'"{snapshot.etag}"'})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['X-Snapshot-Version'] == '1'
+
+    response = _respond(snapshot, {'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert json.loads(response.get_data()) == SMALL
+    assert response.headers['ETag'] == f'"{snapshot.etag}"'
+
+
+def test_large_bodies_are_gzipped_when_accepted(monkeypatch):
+    monkeypatch.setattr(snapshots, 'brotli', None)
+    snapshot = SnapshotStore().publish('chain', LARGE)
+    assert len(snapshot.body) >= snapshots.MIN_COMPRESS_BYTES
+
+    response = _respond(snapshot, {'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data())) == LARGE
+    assert snapshot.encoded('gzip') is snapshot.encoded('gzip')
+
+    response = _respond(snapshot)
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == snapshot.body
+
+
+def test_small_bodies_are_sent_uncompressed():
+    snapshot = SnapshotStore().publish('market-data', SMALL)
+    response = _respond(snapshot, {'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
@@ -0,0 +1,83 @@
+"""
+Source Selector Tests
+Hedged, score-ordered fetches across option chain sources
+"""
+
+import time
+from source_selector import SourceScore, SourceSelector
+
+
+def _healthy(delay=0.0):
+    def fetch(symbol):
+        time.sleep(delay)
+        return {'symbol': symbol}
+    return fetch
+
+
+def _failing(symbol):
+    return None
+
+
+def test_untried_sources_keep_configured_order():
+    selector = SourceSelector('test', [('a', _healthy()), ('b', _healthy())], timeout=5)
+    assert [source for source, _ in selector.ranked()] == ['a', 'b']
+
+
+def test_failed_source_is_replaced_at_once():
+    selector = SourceSelector('test', [('failing', _failing), ('healthy', _healthy())],
+                              race_width=1, hedge_delay=5, timeout=5)
+    started = time.monotonic()
+    assert selector.fetch('NIFTY') == ('healthy', {'symbol': 'NIFTY'})
+    assert time.monotonic() - started < 1
+    assert selector.scores['failing'].success < 1.0
+
+
+def test_slow_source_is_hedged():
+    selector = SourceSelector('test', [('slow', _healthy(1.0)), ('fast', _healthy())],
+                              race_width=1, hedge_delay=0.05, min_hedge_delay=0.05, timeout=5)
+    started = time.monotonic()
+    assert selector.fetch('NIFTY') == ('fast', {'symbol': 'NIFTY'})
+    assert time.monotonic() - started < 0.5
+
+
+def test_every_source_failing_returns_nothing():
+    selector = SourceSelector('test', [('a', _failing), ('b', _failing)], timeout=5)
+    assert selector.fetch('NIFTY') == (None, None)
+
+
+def test_faster_healthy_source_ranks_first():
+    selector = SourceSelector('test', [('slow', _healthy()), ('fast', _healthy())], timeout=5)
+    selector.scores['slow'].record(0.5, True)
+    selector.scores['fast'].record(0.1, True)
+    assert [source for source, _ in selector.ranked()] == ['fast', 'slow']
+
+
+def test_p95_needs_five_samples():
+    score = SourceScore()
+    for elapsed in (0.1, 0.2, 0.3, 0.4):
+        score.record(elapsed, True)
+    assert score.p95() is None
+    score.record(0.5, True)
+    assert score.p95() == 0.5
+
+
+def test_fast_failing_source_ranks_behind_healthy_source():
+    # e.g. breaker open: fails in microseconds, must not look cheap
+    selector = SourceSelector('test', [('failing', _failing), ('healthy', _healthy(0.05))],
+                              race_width=1, hedge_delay=5, timeout=5)
+    for _ in range(3):
+        assert selector.fetch('NIFTY') == ('healthy', {'symbol': 'NIFTY'})
+
+    assert [source for source, _ in selector.ranked()] == ['healthy', 'failing']
+    assert selector.scores['failing'].cost() > selector.scores['healthy'].cost()
+
+
+def test_failures_cost_the_penalty():
+    healthy = SourceScore(failure_penalty=30)
+    healthy.record(0.5, True)
+    broken = SourceScore(failure_penalty=30)
+    for _ in range(5):
+        broken.record(0.001, False)
+
+    assert healthy.cost() == 0.5
+    assert broken.cost() > 0.5
@@ -5,6 +5,22 @@ let isTradingActive = false;
 // API Base URL - use relative URLs for dynamic port support
 const API_BASE = '';
 
+// Option chain kept in sync through /api/option-chain/<symbol>/delta
+let chainState = { symbol: null, seq: 0, epoch: null, data: null };
+
+// Option chain table columns: [side, field, formatter] (null = strike)
+const CHAIN_COLUMNS = [
+    ['ce', 'oi', formatNumber],
+    ['ce', 'volume', formatNumber],
+    ['ce', 'ltp', formatPrice],
+    ['ce', 'iv', formatPercent],
+    null,
+    ['pe', 'iv', formatPercent],
+    ['pe', 'ltp', formatPrice],
+    ['pe', 'volume', formatNumber],
+    ['pe', 'oi', formatNumber]
+];
+
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
@@ -174,16 +190,30 @@ function renderPositions(positions) {
     `).join('');
 }
 
-// Update option chain
+// Update option chain (only the cells that changed since the last update)
 async function updateOptionChain(symbol) {
     try {
-        const response = await fetch(`${API_BASE}/api/option-chain/${symbol}`);
+        if (chainState.symbol !== symbol) {
+            chainState = { symbol: symbol, seq: 0, epoch: null, data: null };
+        }
+        
+        const query = chainState.seq ? `?since=${chainState.seq}&epoch=${chainState.epoch}` : '';
+        const response = await fetch(`${API_BASE}/api/option-chain/${symbol}/delta${query}`);
         const data = await response.json();
         
-        if (data.success && data.data) {
-            renderOptionChain(data.data);
-            updateMarketOverview(data.data);
+        // Ignore responses for a symbol the user already switched away from
+        if (!data.success || chainState.symbol !== symbol) return;
+        
+        if (data.full) {
+            chainState.data = data.full;
+            renderOptionChain(chainState.data);
+        } else {
+            data.deltas.forEach(applyChainDelta);
         }
+        chainState.seq = data.seq;
+        chainState.epoch = data.epoch;
+        
+        updateMarketOverview(chainState.data);
     } catch (error) {
         console.error('Error updating option chain:', error);
     }
@@ -198,21 +228,54 @@ function renderOptionChain(chainData) {
         return;
     }
     
-    tbody.innerHTML = chainData.options.slice(0, 20).map(opt => `
-        <tr class="${opt.atm ? 'atm-row' : ''}">
-            <td>${formatNumber(opt.ce.oi)}</td>
-            <td>${formatNumber(opt.ce.volume)}</td>
-            <td>₹${opt.ce.ltp.toFixed(2)}</td>
-            <td>${opt.ce.iv.toFixed(2)}%</td>
-            <td><strong>${opt.strike}</strong></td>
-            <td>${opt.pe.iv.toFixed(2)}%</td>
-            <td>₹${opt.pe.ltp.toFixed(2)}</td>
-            <td>${formatNumber(opt.pe.volume)}</td>
-            <td>${formatNumber(opt.pe.oi)}</td>
+    tbody.innerHTML = chainData.options.map(opt => `
+        <tr class="${opt.atm ? 'atm-row' : ''}" data-strike="${opt.strike}">
+            ${CHAIN_COLUMNS.map(column => column
+                ? `<td>${column[2](opt[column[0]][column[1]])}</td>`
+                : `<td><strong>${opt.strike}</strong></td>`).join('')}
         </tr>
     `).join('');
 }
 
+// Apply one server delta to the cached chain and patch the table in place
+function applyChainDelta(delta) {
+    const chainData = chainState.data;
+    
+    if (delta.fields) {
+        Object.assign(chainData, delta.fields);
+    }
+    
+    // Strikes shown changed (e.g. ATM moved) - rebuild the table
+    if (delta.options) {
+        chainData.options = delta.options;
+        renderOptionChain(chainData);
+        return;
+    }
+    
+    if (!delta.rows) return;
+    
+    const tbody = document.getElementById('option-chain-body');
+    chainData.options.forEach(opt => {
+        const change = delta.rows[opt.strike];
+        if (!change) return;
+        
+        if (change.ce) Object.assign(opt.ce, change.ce);
+        if (change.pe) Object.assign(opt.pe, change.pe);
+        if ('atm' in change) opt.atm = change.atm;
+        if ('pcr' in change) opt.pcr = change.pcr;
+        
+        const row = tbody.querySelector(`tr[data-strike="${opt.strike}"]`);
+        if (!row) return;
+        
+        row.className = opt.atm ? 'atm-row' : '';
+        CHAIN_COLUMNS.forEach((column, i) => {
+            if (column && change[column[0]] && column[1] in change[column[0]]) {
+                row.cells[i].textContent = column[2](opt[column[0]][column[1]]);
+            }
+        });
+    });
+}
+
 // Update market overview
 function updateMarketOverview(chainData) {
     document.getElementById('underlying-value').textContent = chainData.underlying_value.toFixed(2);
@@ -372,6 +435,14 @@ function showNotification(message, type = 'info') {
     alert(`${prefix} ${message}`);
 }
 
+function formatPrice(num) {
+    return `₹${num.toFixed(2)}`;
+}
+
+function formatPercent(num) {
+    return `${num.toFixed(2)}%`;
+}
+
 function formatNumber(num) {
     if (num >= 10000000) {
         return (num / 10000000).toFixed(2) + 'Cr';